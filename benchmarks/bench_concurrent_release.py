@@ -0,0 +1,271 @@
+#!/usr/bin/env python
+
+"""Measure release throughput when several artists release to the same repo at once.
+
+Each process clones a local bare remote and makes a number of releases of its own
+HDA, staging each release on the latest main, versioning it up from the config and
+pushing it with node_manager.utils.gitutils.push_release(). When another process
+pushes first, the release is staged again with a new version and retried. The run
+is made once without retries, and once with them, reporting how many releases were
+made, the throughput, and whether every released version was unique.
+
+Requires GitPython, but not Houdini.
+
+Usage:
+    python benchmarks/bench_concurrent_release.py [--processes 4] [--releases 5]
+        [--retries 3] [--delay 0.05]
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "lib", "python")
+)
+
+import houstub  # noqa: E402
+
+houstub.install()
+
+import git  # noqa: E402
+
+from node_manager.utils import gitutils  # noqa: E402
+
+
+def setup(root):
+    """Create a bare remote with an initial release.
+
+    Args:
+        root(str): The directory to create the remote in.
+
+    Returns:
+        (str): The path to the remote.
+    """
+    remote = os.path.join(root, "remote.git")
+    seed = os.path.join(root, "seed")
+    subprocess.run(
+        ["git", "init", "-q", "--bare", "--initial-branch=main", remote], check=True
+    )
+    seed_repo = git.Repo.init(seed, initial_branch="main")
+    configure(seed_repo)
+    write_config(seed, "1.0.0")
+    seed_repo.git.add(A=True)
+    seed_repo.git.commit(m="Initial")
+    seed_repo.git.push(remote, "main")
+    return remote
+
+
+def configure(git_repo):
+    """Set the commit author of the given repo.
+
+    Args:
+        git_repo(git.Repo): The repository to configure.
+    """
+    with git_repo.config_writer() as config:
+        config.set_value("user", "name", "bench")
+        config.set_value("user", "email", "bench@example.com")
+
+
+def config_path(clone):
+    """Get the path to the repo config.
+
+    Args:
+        clone(str): The path to the clone.
+
+    Returns:
+        (str): The config path.
+    """
+    return os.path.join(clone, "config", "config.json")
+
+
+def write_config(clone, version):
+    """Write the repo config with the given version.
+
+    Args:
+        clone(str): The path to the clone.
+        version(str): The version to write.
+    """
+    if not os.path.isdir(os.path.dirname(config_path(clone))):
+        os.makedirs(os.path.dirname(config_path(clone)))
+    with open(config_path(clone), "w") as config:
+        json.dump({"version": version}, config)
+
+
+def stage(git_repo, clone, branch, hda, index):
+    """Stage, commit, version up and tag a release on the latest main.
+
+    Args:
+        git_repo(git.Repo): The clone to release from.
+        clone(str): The path to the clone.
+        branch(str): The name of the release branch.
+        hda(str): The name of the HDA being released.
+        index(int): The release number.
+
+    Returns:
+        (str): The release version.
+    """
+    gitutils.abandon_release(git_repo, branch)
+    gitutils.update_main(git_repo)
+
+    with open(config_path(clone)) as config:
+        major, minor, patch = json.load(config)["version"].split(".")
+    version = "{0}.{1}.{2}".format(major, minor, int(patch) + 1)
+
+    git_repo.create_head(branch).checkout()
+    hda_dir = os.path.join(clone, "dcc", "houdini", "hda", hda)
+    if not os.path.isdir(hda_dir):
+        os.makedirs(hda_dir)
+    with open(os.path.join(hda_dir, "section"), "w") as section:
+        section.write("release {0}\n".format(index))
+    git_repo.git.add(A=True)
+    git_repo.git.commit(m="Updated {0}".format(hda))
+
+    write_config(clone, version)
+    git_repo.git.commit(config_path(clone), m="Version up")
+    git_repo.create_tag(version, message="Release {0}".format(version))
+    return version
+
+
+def release_worker(remote, root, worker, releases, retries, delay, start, results):
+    """Make a number of releases, as one artist would.
+
+    Args:
+        remote(str): The path to the remote.
+        root(str): The directory to clone into.
+        worker(int): The worker number.
+        releases(int): The number of releases to make.
+        retries(int): The number of times to restage a release.
+        delay(float): The delay in seconds before the first retry.
+        start(multiprocessing.Event): Set once every worker has been started.
+        results(multiprocessing.Queue): Receives the released versions, the number
+            of failed releases and the number of times releases were restaged.
+    """
+    gitutils.RETRY_DELAY = delay
+    logging.getLogger("node_manager").setLevel(logging.ERROR)
+
+    clone = os.path.join(root, "clone{0}".format(worker))
+    git_repo = git.Repo.clone_from(remote, clone, depth=1)
+    configure(git_repo)
+
+    hda = "worker{0}.hda".format(worker)
+    released = []
+    failed = 0
+    restaged = [0]
+    start.wait()
+
+    for index in range(releases):
+        branch = "release_{0}_{1}".format(worker, index)
+
+        def restage():
+            restaged[0] += 1
+            return stage(git_repo, clone, branch, hda, index)
+
+        try:
+            version = gitutils.push_release(
+                git_repo,
+                branch,
+                stage(git_repo, clone, branch, hda, index),
+                restage,
+                retries=retries,
+            )
+            released.append(version)
+        except RuntimeError:
+            failed += 1
+            gitutils.abandon_release(git_repo, branch)
+
+    results.put((released, failed, restaged[0]))
+
+
+def measure(processes, releases, retries, delay):
+    """Run the workers against a new remote.
+
+    Args:
+        processes(int): The number of artists releasing at once.
+        releases(int): The number of releases each artist makes.
+        retries(int): The number of times to restage a release.
+        delay(float): The delay in seconds before the first retry.
+
+    Returns:
+        (dict): The results of the run.
+    """
+    root = tempfile.mkdtemp(prefix="bench_concurrent_release_")
+    try:
+        remote = setup(root)
+        start = multiprocessing.Event()
+        results = multiprocessing.Queue()
+        workers = [
+            multiprocessing.Process(
+                target=release_worker,
+                args=(remote, root, worker, releases, retries, delay, start, results),
+            )
+            for worker in range(processes)
+        ]
+        for worker in workers:
+            worker.start()
+
+        # Let the workers clone before timing the releases.
+        time.sleep(1.0)
+        started = time.perf_counter()
+        start.set()
+        outcomes = [results.get() for _ in workers]
+        elapsed = time.perf_counter() - started
+        for worker in workers:
+            worker.join()
+
+        versions = [version for released, _, _ in outcomes for version in released]
+        tags = subprocess.run(
+            ["git", "tag"], cwd=remote, check=True, capture_output=True, text=True
+        ).stdout.split()
+        return {
+            "released": len(versions),
+            "failed": sum(failed for _, failed, _ in outcomes),
+            "restaged": sum(restaged for _, _, restaged in outcomes),
+            "elapsed": elapsed,
+            "unique": len(set(versions)) == len(versions) == len(tags),
+        }
+    finally:
+        shutil.rmtree(root)
+
+
+def report(name, result):
+    """Print the results of a run.
+
+    Args:
+        name(str): The name of the run.
+        result(dict): The results of the run.
+    """
+    print(
+        "{name:<12} released {released:>3}, failed {failed:>3}, restaged {restaged:>3}, "
+        "{rate:.2f} releases/s, versions unique: {unique}".format(
+            name=name, rate=result["released"] / result["elapsed"], **result
+        )
+    )
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark concurrent releases.")
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--releases", type=int, default=5)
+    parser.add_argument("--retries", type=int, default=gitutils.RELEASE_RETRIES)
+    parser.add_argument("--delay", type=float, default=0.05)
+    args = parser.parse_args()
+
+    report("no retries", measure(args.processes, args.releases, 0, args.delay))
+    report(
+        "{0} retries".format(args.retries),
+        measure(args.processes, args.releases, args.retries, args.delay),
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
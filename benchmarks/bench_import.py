@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+
+"""Benchmark the import time of the node_manager modules.
+
+Each module is imported in a fresh interpreter using -X importtime, with the hou
+stand-in installed, and the median cumulative import time over a number of runs is
+compared against its budget. The modules costing the most to import are listed for
+each, so regressions can be traced.
+
+Usage:
+    python benchmarks/bench_import.py [--runs 5] [--top 10] [module ...]
+
+Exits with a non-zero status if any module is over budget.
+"""
+
+import argparse
+import collections
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+LIB_DIR = os.path.join(os.path.dirname(BENCHMARK_DIR), "lib", "python")
+
+# The import time budget for each module in milliseconds. node_manager is imported
+# by pythonrc.py at every Houdini start, followed by node_manager.manager when it
+# initialises. Modules such as nodeutils and catalog are also used on their own, so
+# shouldn't pull in the manager.
+BUDGETS = collections.OrderedDict(
+    [
+        ("node_manager", 25),
+        ("node_manager.utils.nodeutils", 30),
+        ("node_manager.catalog", 35),
+        ("node_manager.manager", 50),
+        ("node_manager.menu", 50),
+    ]
+)
+
+IMPORT_TIME = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$")
+
+
+def import_times(module):
+    """
+    Import the given module in a new interpreter and read its -X importtime output.
+
+    Args:
+        module(str): The module to import.
+
+    Returns:
+        (dict): The (self, cumulative) import time of each module imported by the
+            module, in microseconds, keyed by module name.
+    """
+    code = "import houstub; houstub.install(); import {module}".format(module=module)
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [BENCHMARK_DIR, LIB_DIR] + [path for path in [env.get("PYTHONPATH")] if path]
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        env=env,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+
+    # Only keep the modules imported after the stand-in, which belong to the module.
+    times = {}
+    for line in result.stderr.splitlines():
+        match = IMPORT_TIME.match(line)
+        if not match:
+            continue
+        if match.group(4) == "houstub":
+            times = {}
+            continue
+        times[match.group(4)] = (int(match.group(1)), int(match.group(2)))
+    return times
+
+
+def measure(module, runs):
+    """
+    Measure the median import times for the given module.
+
+    Args:
+        module(str): The module to import.
+        runs(int): The number of runs to take the median of.
+
+    Returns:
+        (tuple): The median cumulative time of the module, and the median self time
+            of every module it imported, in microseconds.
+    """
+    # Run once first so that bytecode is compiled and cached.
+    import_times(module)
+
+    cumulative = []
+    self_times = collections.defaultdict(list)
+    for _ in range(runs):
+        times = import_times(module)
+        cumulative.append(times[module][1])
+        for name, (self_time, _) in times.items():
+            self_times[name].append(self_time)
+
+    return statistics.median(cumulative), {
+        name: statistics.median(values) for name, values in self_times.items()
+    }
+
+
+def main():
+    """Run the benchmark.
+
+    Returns:
+        (int): The exit status, 1 if any module is over budget.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark node_manager import time.")
+    parser.add_argument("modules", nargs="*", default=list(BUDGETS))
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    over_budget = []
+    for module in args.modules:
+        cumulative, self_times = measure(module, args.runs)
+        budget = BUDGETS.get(module)
+        status = ""
+        if budget is not None:
+            status = "OK" if cumulative <= budget * 1000 else "OVER BUDGET"
+            if cumulative > budget * 1000:
+                over_budget.append(module)
+
+        print(
+            "{module}: {time:.1f} ms (budget {budget} ms) {status}".format(
+                module=module,
+                time=cumulative / 1000.0,
+                budget=budget if budget is not None else "-",
+                status=status,
+            )
+        )
+        for name, self_time in sorted(
+            self_times.items(), key=lambda item: item[1], reverse=True
+        )[: args.top]:
+            print("    {time:8.1f} ms  {name}".format(time=self_time / 1000.0, name=name))
+
+    return 1 if over_budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+
+"""Benchmark hou.node() lookups made by the path and node object nodeutils APIs.
+
+Usage:
+    python benchmarks/bench_nodeutils.py [--nodes 10000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "lib", "python")
+)
+
+import houstub  # noqa: E402
+
+hou = houstub.install()
+
+from node_manager.utils import nodeutils  # noqa: E402
+
+
+def path_api(nodes):
+    """Classify nodes the way callers did before the node object API.
+
+    Args:
+        nodes(list(hou.Node)): The nodes to classify.
+    """
+    for current_node in nodes:
+        if nodeutils.is_digital_asset(current_node.path(), include_hidden=True):
+            nodeutils.definition_from_node(current_node.path())
+            nodeutils.has_node_type(current_node.path(), "box", category="Sop")
+    [
+        current_node
+        for current_node in hou.root().recursiveGlob("*")
+        if nodeutils.type_name(current_node.path()) == "box"
+    ]
+
+
+def node_api(nodes):
+    """Classify nodes using the node object API.
+
+    Args:
+        nodes(list(hou.Node)): The nodes to classify.
+    """
+    for current_node in nodes:
+        if nodeutils.node_is_digital_asset(current_node, include_hidden=True):
+            nodeutils.node_definition(current_node)
+            nodeutils.node_has_node_type(current_node, "box", category="Sop")
+    nodeutils.all_nodes_of_type("box")
+
+
+def run(name, function, nodes):
+    """Run and report a benchmark.
+
+    Args:
+        name(str): The benchmark name.
+        function(function): The function to benchmark.
+        nodes(list(hou.Node)): The nodes to pass to the function.
+    """
+    hou.calls.clear()
+    start = time.perf_counter()
+    function(nodes)
+    duration = time.perf_counter() - start
+    print(
+        "{name:<10} hou.node() calls: {calls:>8}  time: {duration:.4f}s".format(
+            name=name,
+            calls=hou.calls["node"],
+            duration=duration,
+        )
+    )
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--nodes", type=int, default=10000)
+    args = parser.parse_args()
+
+    nodes = hou.build_scene(args.nodes, ["test::box::1.0", "test::sphere::2.0"])
+    print("Nodes: {count}".format(count=len(nodes)))
+    run("path", path_api, nodes)
+    run("node", node_api, nodes)
+
+
+if __name__ == "__main__":
+    main()
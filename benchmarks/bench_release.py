@@ -0,0 +1,216 @@
+#!/usr/bin/env python
+
+"""Benchmark the git operations made by a GitRelease against a local bare remote.
+
+The release used to push five times; the release branch, the version up commit, the
+tag, the merge to main and the deletion of the release branch. It now finalises the
+release locally and pushes main and the tag with a single atomic push. Both
+sequences are run using the git command line, so neither Houdini nor GitPython are
+needed, and the median time of each is reported.
+
+A local remote has no network latency, so the remote can be given a delay for each
+connection made to it, standing in for the round trip to a real remote.
+
+Usage:
+    python benchmarks/bench_release.py [--runs 10] [--files 200] [--latency 0.05]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def git(cwd, *args):
+    """Run a git command.
+
+    Args:
+        cwd(str): The repository to run the command in.
+        *args(str): The git arguments.
+    """
+    subprocess.run(
+        ["git"] + list(args),
+        cwd=cwd,
+        check=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def setup(root, files, latency):
+    """Create a bare remote and a clone of it, with an expanded HDA to release.
+
+    Args:
+        root(str): The directory to create the repositories in.
+        files(int): The number of files in the expanded HDA.
+        latency(float): The delay in seconds for each connection to the remote.
+
+    Returns:
+        (str): The path to the clone.
+    """
+    remote = os.path.join(root, "remote.git")
+    clone = os.path.join(root, "clone")
+    git(root, "init", "--bare", "--initial-branch=main", remote)
+    git(root, "clone", remote, clone)
+    git(clone, "config", "user.email", "bench@example.com")
+    git(clone, "config", "user.name", "bench")
+
+    hda_dir = os.path.join(clone, "dcc", "houdini", "hda", "bench.hda")
+    os.makedirs(hda_dir)
+    for index in range(files):
+        with open(os.path.join(hda_dir, "section{0}".format(index)), "w") as section:
+            section.write("section {0}\n".format(index) * 100)
+    write_config(clone, "1.0.0")
+    git(clone, "add", "-A")
+    git(clone, "commit", "-m", "Initial")
+    git(clone, "push", "--set-upstream", "origin", "main")
+
+    if latency:
+        # Connect through the ext transport, sleeping before each connection.
+        git(clone, "config", "protocol.ext.allow", "always")
+        git(
+            clone,
+            "remote",
+            "set-url",
+            "origin",
+            "ext::sh -c sleep% {latency};% git% %s% {remote}".format(
+                latency=latency, remote=remote
+            ),
+        )
+    return clone
+
+
+def write_config(clone, version):
+    """Write the repo config with the given version.
+
+    Args:
+        clone(str): The path to the clone.
+        version(str): The version to write.
+    """
+    config_dir = os.path.join(clone, "config")
+    if not os.path.isdir(config_dir):
+        os.makedirs(config_dir)
+    with open(os.path.join(config_dir, "config.json"), "w") as config:
+        json.dump({"version": version}, config)
+
+
+def change(clone, index):
+    """Commit a change to the HDA on a new release branch.
+
+    Args:
+        clone(str): The path to the clone.
+        index(int): The release number.
+
+    Returns:
+        (tuple): The release branch and version.
+    """
+    branch = "release_{0}".format(index)
+    version = "1.0.{0}".format(index + 1)
+    git(clone, "checkout", "-b", branch)
+    section = os.path.join(clone, "dcc", "houdini", "hda", "bench.hda", "section0")
+    with open(section, "a") as section_file:
+        section_file.write("release {0}\n".format(index))
+    git(clone, "add", "-A")
+    git(clone, "commit", "-m", "Updated bench")
+    return branch, version
+
+
+def version_up(clone, version):
+    """Commit the version up and tag it.
+
+    Args:
+        clone(str): The path to the clone.
+        version(str): The release version.
+    """
+    write_config(clone, version)
+    git(clone, "commit", "-a", "-m", "Version up")
+    git(clone, "tag", "-a", version, "-m", "Release {0}".format(version))
+
+
+def release_per_step(clone, index):
+    """Release by pushing after every step, as GitRelease used to.
+
+    Args:
+        clone(str): The path to the clone.
+        index(int): The release number.
+    """
+    branch, version = change(clone, index)
+    git(clone, "push", "--set-upstream", "origin", branch)
+    write_config(clone, version)
+    git(clone, "commit", "-a", "-m", "Version up")
+    git(clone, "push")
+    git(clone, "tag", "-a", version, "-m", "Release {0}".format(version))
+    git(clone, "push", "origin", version)
+    git(clone, "checkout", "main")
+    git(clone, "pull")
+    git(clone, "merge", branch, "--no-ff")
+    git(clone, "push")
+    git(clone, "push", "origin", ":{0}".format(branch))
+    git(clone, "branch", "-D", branch)
+
+
+def release_atomic(clone, index):
+    """Release by finalising locally and pushing main and the tag atomically.
+
+    Args:
+        clone(str): The path to the clone.
+        index(int): The release number.
+    """
+    branch, version = change(clone, index)
+    version_up(clone, version)
+    git(clone, "checkout", "main")
+    git(clone, "pull", "--ff-only", "origin", "main")
+    git(clone, "merge", branch, "--no-ff")
+    git(clone, "push", "--atomic", "origin", "main", "refs/tags/{0}".format(version))
+    git(clone, "branch", "-D", branch)
+
+
+def measure(release, runs, files, latency):
+    """Measure the median time of the given release sequence.
+
+    Args:
+        release(callable): The release sequence to run.
+        runs(int): The number of releases to make.
+        files(int): The number of files in the expanded HDA.
+        latency(float): The delay in seconds for each connection to the remote.
+
+    Returns:
+        (float): The median release time in seconds.
+    """
+    root = tempfile.mkdtemp(prefix="bench_release_")
+    try:
+        clone = setup(root, files, latency)
+        # Release once first so the clone's caches are warm.
+        release(clone, runs)
+        times = []
+        for index in range(runs):
+            start = time.perf_counter()
+            release(clone, index)
+            times.append(time.perf_counter() - start)
+        return statistics.median(times)
+    finally:
+        shutil.rmtree(root)
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark GitRelease pushes.")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args()
+
+    per_step = measure(release_per_step, args.runs, args.files, args.latency)
+    atomic = measure(release_atomic, args.runs, args.files, args.latency)
+    print("push per step:  {0:.1f} ms".format(per_step * 1000))
+    print("atomic push:    {0:.1f} ms".format(atomic * 1000))
+    print("speedup:        {0:.2f}x".format(per_step / atomic))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
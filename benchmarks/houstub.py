@@ -0,0 +1,214 @@
+#!/usr/bin/env python
+
+"""A minimal stand-in for the hou module, used to benchmark Node Manager outside of Houdini.
+
+Only the parts of hou that the benchmarks exercise are implemented. Every call to
+hou.node() is counted so that benchmarks can report the number of path lookups made.
+"""
+
+import collections
+import sys
+import types
+
+
+calls = collections.Counter()
+
+
+class _Enum(object):
+    """Simple attribute based enum stand-in."""
+
+    def __init__(self, *names):
+        for name in names:
+            setattr(self, name, name)
+
+
+class NodeTypeCategory(object):
+    """Stand-in for hou.NodeTypeCategory."""
+
+    def __init__(self, name):
+        self._name = name
+
+    def name(self):
+        return self._name
+
+
+class HDADefinition(object):
+    """Stand-in for hou.HDADefinition."""
+
+    def __init__(self, node_type, library_path):
+        self._node_type = node_type
+        self._library_path = library_path
+
+    def nodeType(self):
+        return self._node_type
+
+    def nodeTypeName(self):
+        return self._node_type.name()
+
+    def nodeTypeCategory(self):
+        return self._node_type.category()
+
+    def libraryFilePath(self):
+        return self._library_path
+
+    def modificationTime(self):
+        return 0
+
+
+class NodeType(object):
+    """Stand-in for hou.NodeType."""
+
+    def __init__(self, name, category="Sop", library_path=None):
+        self._name = name
+        self._category = NodeTypeCategory(category)
+        self._definition = (
+            HDADefinition(self, library_path) if library_path else None
+        )
+        self._instances = []
+
+    def name(self):
+        return self._name
+
+    def nameComponents(self):
+        components = self._name.split("::")
+        if len(components) == 3:
+            return ("", components[0], components[1], components[2])
+        return ("", "", components[0], "")
+
+    def category(self):
+        return self._category
+
+    def definition(self):
+        return self._definition
+
+    def instances(self):
+        return tuple(self._instances)
+
+    def setHidden(self, hidden):
+        pass
+
+
+class Node(object):
+    """Stand-in for hou.Node."""
+
+    def __init__(self, path, node_type=None, parent=None):
+        self._path = path
+        self._type = node_type
+        self._parent = parent
+        self._children = []
+        self._comment = ""
+        if node_type:
+            node_type._instances.append(self)
+
+    def path(self):
+        return self._path
+
+    def name(self):
+        return self._path.rsplit("/", 1)[-1]
+
+    def type(self):
+        return self._type
+
+    def parent(self):
+        return self._parent
+
+    def children(self):
+        return tuple(self._children)
+
+    def allSubChildren(self):
+        nodes = []
+        for child in self._children:
+            nodes.append(child)
+            nodes.extend(child.allSubChildren())
+        return tuple(nodes)
+
+    def recursiveGlob(self, pattern, filter=None):
+        return self.allSubChildren()
+
+    def isInsideLockedHDA(self):
+        return False
+
+    def setComment(self, comment):
+        self._comment = comment
+
+    def comment(self):
+        return self._comment
+
+    def setGenericFlag(self, flag, value):
+        pass
+
+
+_nodes = {}
+_root = Node("/")
+
+
+def node(path):
+    """Stand-in for hou.node(), counting each lookup."""
+    calls["node"] += 1
+    return _nodes.get(path)
+
+
+def root():
+    return _root
+
+
+def build_scene(count, node_type_names, library_path="/tmp/hda/library.hda"):
+    """Populate the stand-in scene.
+
+    Args:
+        count(int): The number of nodes to create.
+        node_type_names(list(str)): The node types to cycle through.
+        library_path(str): The library path used for every definition.
+
+    Returns:
+        list(Node): The created nodes.
+    """
+    _nodes.clear()
+    del _root._children[:]
+    node_types = [NodeType(name, library_path=library_path) for name in node_type_names]
+    nodes = []
+    for index in range(count):
+        node_type = node_types[index % len(node_types)]
+        current = Node("/obj/node{index}".format(index=index), node_type, _root)
+        _root._children.append(current)
+        _nodes[current.path()] = current
+        nodes.append(current)
+    return nodes
+
+
+def install():
+    """Install the stand-in as the hou module.
+
+    Returns:
+        (module): The installed module.
+    """
+    module = types.ModuleType("hou")
+    module.calls = calls
+    module.node = node
+    module.root = root
+    module.build_scene = build_scene
+    module.Node = Node
+    module.NodeType = NodeType
+    module.HDADefinition = HDADefinition
+    module.NotAvailable = type("NotAvailable", (Exception,), {})
+    module.isUIAvailable = lambda: False
+    module.isApprentice = lambda: False
+    module.severityType = _Enum("Message", "Warning", "Error", "Fatal")
+    module.nodeTypeFilter = _Enum("NoFilter")
+    module.nodeFlag = _Enum("DisplayComment")
+    module.hdaEventType = _Enum(
+        "AssetCreated",
+        "AssetDeleted",
+        "AssetSaved",
+        "LibraryInstalled",
+        "LibraryUninstalled",
+    )
+    module.hda = types.SimpleNamespace(
+        installFile=lambda *args, **kwargs: None,
+        uninstallFile=lambda *args, **kwargs: None,
+        definitionsInFile=lambda path: [],
+        addEventCallback=lambda *args, **kwargs: None,
+        removeEventCallback=lambda *args, **kwargs: None,
+    )
+    sys.modules["hou"] = module
+    return module
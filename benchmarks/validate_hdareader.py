@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+
+"""Validate the pure-Python HDA reader against hou, and compare their timings.
+
+This must be run with hython so that hou is available, eg.
+
+    hython benchmarks/validate_hdareader.py /path/to/hda/libraries
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "lib", "python")
+)
+
+import hou  # noqa: E402
+
+from node_manager import hdareader  # noqa: E402
+
+
+EXTENSIONS = (".hda", ".hdanc", ".otl", ".otlnc")
+
+
+def library_files(root):
+    """Find the library files under the given directory.
+
+    Args:
+        root(str): The directory to search.
+
+    Returns:
+        list(str): The library file paths.
+    """
+    paths = []
+    for directory, _, filenames in os.walk(root):
+        paths.extend(
+            os.path.join(directory, filename)
+            for filename in filenames
+            if filename.endswith(EXTENSIONS)
+        )
+    return sorted(paths)
+
+
+def main():
+    """Run the validation."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("root", help="Directory containing the library corpus.")
+    args = parser.parse_args()
+
+    mismatches = 0
+    errors = 0
+    reader_time = 0.0
+    hou_time = 0.0
+    paths = library_files(args.root)
+    for path in paths:
+        start = time.perf_counter()
+        try:
+            read = {
+                (definition.category, definition.node_type_name)
+                for definition in hdareader.definitions_in_file(path)
+            }
+        except hdareader.HDAReaderError as error:
+            print("ERROR {path}: {error}".format(path=path, error=error))
+            errors += 1
+            continue
+        reader_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        expected = {
+            (definition.nodeTypeCategory().name(), definition.nodeTypeName())
+            for definition in hou.hda.definitionsInFile(path)
+        }
+        hou_time += time.perf_counter() - start
+
+        if read != expected:
+            mismatches += 1
+            print(
+                "MISMATCH {path}: missing {missing}, unexpected {unexpected}".format(
+                    path=path,
+                    missing=sorted(expected - read),
+                    unexpected=sorted(read - expected),
+                )
+            )
+
+    print(
+        "Libraries: {count}  mismatches: {mismatches}  errors: {errors}".format(
+            count=len(paths), mismatches=mismatches, errors=errors
+        )
+    )
+    print("hdareader: {time:.3f}s  hou: {hou_time:.3f}s".format(time=reader_time, hou_time=hou_time))
+    return 1 if mismatches or errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
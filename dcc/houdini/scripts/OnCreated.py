@@ -13,4 +13,4 @@ logger = logging.getLogger("node_manager.dcc.houdini.scripts.OnCreated")
 current_node = kwargs.get("node", None)
 logger.debug("OnCreated: {node}".format(node=current_node.name()))
 
-callbackutils.node_changed(current_node)
+callbackutils.queue_node_changed(current_node)
@@ -0,0 +1,16 @@
+#!/usr/bin/env python
+
+"""Houdini Callback for when a node is deleted."""
+
+import logging
+
+from node_manager.utils import callbackutils
+
+
+logger = logging.getLogger("node_manager.dcc.houdini.scripts.OnDeleted")
+
+
+current_node = kwargs.get("node", None)
+logger.debug("OnDeleted: {node}".format(node=current_node.name()))
+
+callbackutils.node_deleted(current_node)
@@ -5,8 +5,6 @@
 import logging
 import sys
 
-from node_manager import manager
-
 
 def initialise():
     """Initialise the Node Manager."""
@@ -17,5 +15,8 @@ def initialise():
         stream=sys.stdout,
     )
 
-    # Initialise the Node Manager
+    # Initialise the Node Manager, importing here so that modules which don't depend
+    # on Houdini (such as the catalog) can be used outside of it.
+    from node_manager import manager
+
     manager.initialise_node_manager()
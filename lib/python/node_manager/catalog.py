@@ -0,0 +1,632 @@
+#!/usr/bin/env python
+
+"""Node manager catalog.
+
+A persistent SQLite catalog of the repos, library files, node types and versions the
+Node Manager has loaded, along with any releases made. The catalog doesn't depend on
+Houdini so it can also be queried by external tools, eg.
+
+    python -m node_manager.catalog /path/to/catalog.db types "foo::"
+"""
+
+import getpass
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+
+logger = logging.getLogger(__name__)
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS repos (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    path TEXT,
+    load_path TEXT,
+    updated REAL
+);
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    repo_id INTEGER NOT NULL REFERENCES repos(id) ON DELETE CASCADE,
+    path TEXT NOT NULL UNIQUE,
+    fingerprint TEXT,
+    indexed REAL
+);
+CREATE TABLE IF NOT EXISTS node_types (
+    id INTEGER PRIMARY KEY,
+    repo_id INTEGER NOT NULL REFERENCES repos(id) ON DELETE CASCADE,
+    category TEXT NOT NULL,
+    namespace TEXT,
+    name TEXT NOT NULL,
+    UNIQUE (repo_id, category, namespace, name)
+);
+CREATE TABLE IF NOT EXISTS versions (
+    id INTEGER PRIMARY KEY,
+    node_type_id INTEGER NOT NULL REFERENCES node_types(id) ON DELETE CASCADE,
+    file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    type_name TEXT NOT NULL,
+    version TEXT,
+    hidden INTEGER NOT NULL DEFAULT 0,
+    installed INTEGER NOT NULL DEFAULT 1,
+    added REAL
+);
+CREATE TABLE IF NOT EXISTS releases (
+    id INTEGER PRIMARY KEY,
+    repo_id INTEGER REFERENCES repos(id) ON DELETE SET NULL,
+    type_name TEXT NOT NULL,
+    version TEXT,
+    comment TEXT,
+    user TEXT,
+    released REAL
+);
+CREATE TABLE IF NOT EXISTS release_stages (
+    id INTEGER PRIMARY KEY,
+    repo_id INTEGER REFERENCES repos(id) ON DELETE SET NULL,
+    version TEXT,
+    stage TEXT NOT NULL,
+    duration REAL NOT NULL,
+    recorded REAL
+);
+CREATE INDEX IF NOT EXISTS node_types_name ON node_types (name);
+CREATE INDEX IF NOT EXISTS versions_type_name ON versions (type_name);
+CREATE INDEX IF NOT EXISTS versions_node_type ON versions (node_type_id);
+CREATE INDEX IF NOT EXISTS versions_file ON versions (file_id);
+CREATE INDEX IF NOT EXISTS versions_added ON versions (added);
+CREATE INDEX IF NOT EXISTS releases_type_name ON releases (type_name);
+CREATE INDEX IF NOT EXISTS releases_released ON releases (released);
+CREATE INDEX IF NOT EXISTS release_stages_stage ON release_stages (stage);
+"""
+
+
+def file_fingerprint(path, definitions=None):
+    """
+    Get a cheap fingerprint for the given file, based on its size and modification time.
+
+    The definitions recorded for the file can also be included, so the file is seen
+    as changed when anything recorded for it changes, eg. which of its versions are
+    hidden or installed by the load policy.
+
+    Args:
+        path(str): The path to the file.
+        definitions(:obj:`list(dict)`,optional): The definitions recorded for the file.
+
+    Returns:
+        (str): The fingerprint, or None if the file doesn't exist.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    fingerprint = "{size}:{mtime}".format(size=stat.st_size, mtime=stat.st_mtime_ns)
+    if definitions is not None:
+        digest = hashlib.sha1(
+            json.dumps(definitions, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+        fingerprint = "{fingerprint}:{digest}".format(
+            fingerprint=fingerprint, digest=digest
+        )
+    return fingerprint
+
+
+def _parse_version(version):
+    """Parse a node type version, returning None if it isn't a valid version.
+
+    Args:
+        version(str): The version to parse.
+
+    Returns:
+        (packaging.version.Version): The parsed version.
+    """
+    from packaging.version import InvalidVersion, Version
+
+    try:
+        return Version(version)
+    except (InvalidVersion, TypeError):
+        return None
+
+
+def _version_key(row):
+    """
+    Get a key to sort the versions of a node type by, per repo.
+
+    Versions that can't be parsed are sorted as text, before those that can.
+
+    Args:
+        row(dict): The version row.
+
+    Returns:
+        (tuple): The sort key.
+    """
+    version = _parse_version(row["version"])
+    if version is None:
+        return (row["repo"], 0, row["version"] or "")
+    return (row["repo"], 1, version)
+
+
+def prefix_range(prefix):
+    """
+    Get the range of strings starting with the given prefix.
+
+    Comparing against a range, rather than using LIKE, allows SQLite to use an index.
+
+    Args:
+        prefix(str): The prefix to get the range for.
+
+    Returns:
+        (tuple): The lower (inclusive) and upper (exclusive) bounds.
+    """
+    return prefix, prefix + "\U0010ffff"
+
+
+class NodeCatalog(object):
+    """NodeCatalog - A persistent record of everything the Node Manager has loaded."""
+
+    def __init__(self, path):
+        """
+        Initialise the NodeCatalog, creating the database if it doesn't exist.
+
+        Args:
+            path(str): The path to the SQLite database.
+        """
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # The catalog is updated from the background loading thread and queried from
+        # the main thread, so share one connection and serialise access to it.
+        self._lock = threading.RLock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.executescript(SCHEMA)
+        logger.debug("Initialised Node Catalog: {path}".format(path=path))
+
+    def close(self):
+        """Close the catalog."""
+        with self._lock:
+            self.connection.close()
+
+    def _repo_id(self, repo_name):
+        """
+        Get the id for the given repo.
+
+        Args:
+            repo_name(str): The name of the repo.
+
+        Returns:
+            (int): The repo id, or None if the repo isn't in the catalog.
+        """
+        row = self.connection.execute(
+            "SELECT id FROM repos WHERE name = ?", (repo_name,)
+        ).fetchone()
+        return row["id"] if row else None
+
+    def update_repo(self, repo_name, path, load_path=None):
+        """
+        Add or update the given repo.
+
+        Args:
+            repo_name(str): The name of the repo.
+            path(str): The repo path.
+            load_path(:obj:`str`,optional): The path the repo is loaded from.
+
+        Returns:
+            (int): The repo id.
+        """
+        with self._lock, self.connection:
+            self.connection.execute(
+                "INSERT INTO repos (name, path, load_path, updated) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET "
+                "path = excluded.path, load_path = excluded.load_path, "
+                "updated = excluded.updated",
+                (repo_name, path, load_path, time.time()),
+            )
+            return self._repo_id(repo_name)
+
+    def file_changed(self, path, definitions=None):
+        """
+        Has the given file changed since it was last recorded?
+
+        Args:
+            path(str): The path to the library file.
+            definitions(:obj:`list(dict)`,optional): The definitions to record for the
+                file, which are also compared with those last recorded.
+
+        Returns:
+            (bool): Has the file changed.
+        """
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT fingerprint FROM files WHERE path = ?", (path,)
+            ).fetchone()
+        return not row or row["fingerprint"] != file_fingerprint(path, definitions)
+
+    def update_file(self, repo_name, path, definitions):
+        """
+        Record the definitions found in the given library file.
+
+        Any versions previously recorded for the file are replaced. Versions already
+        recorded in the repo keep the time they were first added.
+
+        Args:
+            repo_name(str): The name of the repo the file belongs to.
+            path(str): The path to the library file.
+            definitions(list(dict)): The definitions in the file. Each should provide
+                category, namespace, name, type_name and version, and optionally
+                hidden and installed.
+        """
+        now = time.time()
+        with self._lock, self.connection:
+            repo_id = self._repo_id(repo_name)
+            if repo_id is None:
+                raise RuntimeError(
+                    "Repo {repo} not found in catalog.".format(repo=repo_name)
+                )
+
+            self.connection.execute(
+                "INSERT INTO files (repo_id, path, fingerprint, indexed) "
+                "VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(path) DO UPDATE SET "
+                "repo_id = excluded.repo_id, fingerprint = excluded.fingerprint, "
+                "indexed = excluded.indexed",
+                (repo_id, path, file_fingerprint(path, definitions), now),
+            )
+            file_id = self.connection.execute(
+                "SELECT id FROM files WHERE path = ?", (path,)
+            ).fetchone()["id"]
+
+            # Keep the original added time for versions that were already recorded,
+            # even from another file in the repo, as the same version can be loaded
+            # from a new path, eg. each session's GitLoad build or each rez package.
+            previous = {}
+            for definition in definitions:
+                row = self.connection.execute(
+                    "SELECT MIN(versions.added) AS added FROM versions "
+                    "JOIN node_types ON node_types.id = versions.node_type_id "
+                    "WHERE versions.type_name = ? AND node_types.repo_id = ? "
+                    "AND node_types.category = ?",
+                    (definition["type_name"], repo_id, definition["category"]),
+                ).fetchone()
+                if row["added"] is not None:
+                    previous[
+                        (definition["category"], definition["type_name"])
+                    ] = row["added"]
+            self.connection.execute("DELETE FROM versions WHERE file_id = ?", (file_id,))
+
+            for definition in definitions:
+                self.connection.execute(
+                    "INSERT OR IGNORE INTO node_types "
+                    "(repo_id, category, namespace, name) VALUES (?, ?, ?, ?)",
+                    (
+                        repo_id,
+                        definition["category"],
+                        definition.get("namespace") or "",
+                        definition["name"],
+                    ),
+                )
+                node_type_id = self.connection.execute(
+                    "SELECT id FROM node_types WHERE repo_id = ? AND category = ? "
+                    "AND namespace = ? AND name = ?",
+                    (
+                        repo_id,
+                        definition["category"],
+                        definition.get("namespace") or "",
+                        definition["name"],
+                    ),
+                ).fetchone()["id"]
+                self.connection.execute(
+                    "INSERT INTO versions "
+                    "(node_type_id, file_id, type_name, version, hidden, installed, "
+                    "added) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        node_type_id,
+                        file_id,
+                        definition["type_name"],
+                        definition.get("version"),
+                        int(definition.get("hidden", False)),
+                        int(definition.get("installed", True)),
+                        previous.get(
+                            (definition["category"], definition["type_name"]), now
+                        ),
+                    ),
+                )
+
+    def prune_files(self, repo_name, paths):
+        """
+        Remove any files recorded for the given repo that aren't in the given paths.
+
+        Args:
+            repo_name(str): The name of the repo.
+            paths(list(str)): The library files currently in the repo.
+        """
+        with self._lock, self.connection:
+            repo_id = self._repo_id(repo_name)
+            if repo_id is None:
+                return
+            current = set(paths)
+            stale = [
+                row["id"]
+                for row in self.connection.execute(
+                    "SELECT id, path FROM files WHERE repo_id = ?", (repo_id,)
+                )
+                if row["path"] not in current
+            ]
+            self.connection.executemany(
+                "DELETE FROM files WHERE id = ?", [(file_id,) for file_id in stale]
+            )
+            self.connection.execute(
+                "DELETE FROM node_types WHERE repo_id = ? AND id NOT IN "
+                "(SELECT node_type_id FROM versions)",
+                (repo_id,),
+            )
+            if stale:
+                logger.debug(
+                    "Removed {count} stale files from catalog for {repo}".format(
+                        count=len(stale), repo=repo_name
+                    )
+                )
+
+    def record_release(self, repo_name, type_name, version=None, comment=None):
+        """
+        Record a release.
+
+        Args:
+            repo_name(str): The name of the repo released to.
+            type_name(str): The node type name that was released.
+            version(:obj:`str`,optional): The version released.
+            comment(:obj:`str`,optional): The release comment.
+        """
+        with self._lock, self.connection:
+            self.connection.execute(
+                "INSERT INTO releases (repo_id, type_name, version, comment, user, "
+                "released) VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    self._repo_id(repo_name),
+                    type_name,
+                    version,
+                    comment,
+                    getpass.getuser(),
+                    time.time(),
+                ),
+            )
+
+    def record_release_stages(self, repo_name, version, timings):
+        """
+        Record how long each stage of a release took.
+
+        Args:
+            repo_name(str): The name of the repo released to.
+            version(str): The version released.
+            timings(dict): The duration in seconds of each stage, keyed by stage.
+        """
+        recorded = time.time()
+        with self._lock, self.connection:
+            repo_id = self._repo_id(repo_name)
+            self.connection.executemany(
+                "INSERT INTO release_stages (repo_id, version, stage, duration, "
+                "recorded) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (repo_id, version, stage, duration, recorded)
+                    for stage, duration in timings.items()
+                ],
+            )
+
+    def release_stage_timings(self, repo_name=None):
+        """
+        Summarise how long each stage of a release takes.
+
+        Args:
+            repo_name(:obj:`str`,optional): Only include releases to this repo.
+
+        Returns:
+            (list(dict)): The number of times each stage has run, and its mean and
+                longest duration in seconds.
+        """
+        sql = (
+            "SELECT release_stages.stage, COUNT(*) AS runs, "
+            "AVG(release_stages.duration) AS mean, "
+            "MAX(release_stages.duration) AS longest FROM release_stages "
+            "LEFT JOIN repos ON repos.id = release_stages.repo_id"
+        )
+        parameters = ()
+        if repo_name:
+            sql += " WHERE repos.name = ?"
+            parameters = (repo_name,)
+        return self._query(
+            sql + " GROUP BY release_stages.stage ORDER BY mean DESC", parameters
+        )
+
+    def _query(self, sql, parameters=()):
+        """
+        Run the given query.
+
+        Args:
+            sql(str): The query to run.
+            parameters(tuple): The query parameters.
+
+        Returns:
+            (list(dict)): The resulting rows.
+        """
+        with self._lock:
+            return [dict(row) for row in self.connection.execute(sql, parameters)]
+
+    def find_versions(self, prefix="", repo_name=None, include_hidden=True):
+        """
+        Find all versions whose node type name starts with the given prefix.
+
+        Args:
+            prefix(:obj:`str`,optional): The node type name prefix, eg. "foo::".
+            repo_name(:obj:`str`,optional): Only search the given repo.
+            include_hidden(:obj:`bool`,optional): Include hidden versions.
+
+        Returns:
+            (list(dict)): The matching versions, with their repo, category and file.
+        """
+        low, high = prefix_range(prefix)
+        sql = (
+            "SELECT repos.name AS repo, node_types.category, node_types.namespace, "
+            "node_types.name, versions.type_name, versions.version, versions.hidden, "
+            "versions.installed, versions.added, files.path "
+            "FROM versions "
+            "JOIN node_types ON node_types.id = versions.node_type_id "
+            "JOIN repos ON repos.id = node_types.repo_id "
+            "JOIN files ON files.id = versions.file_id "
+            "WHERE versions.type_name >= ? AND versions.type_name < ?"
+        )
+        parameters = [low, high]
+        if repo_name:
+            sql += " AND repos.name = ?"
+            parameters.append(repo_name)
+        if not include_hidden:
+            sql += " AND versions.hidden = 0"
+        sql += " ORDER BY versions.type_name, repos.name"
+        return self._query(sql, tuple(parameters))
+
+    def node_type_versions(self, name, namespace=None, category=None):
+        """
+        Find all versions of the given node type across all repos.
+
+        The versions are sorted by repo, then by version, eg. 2.0 before 10.0.
+
+        Args:
+            name(str): The node type name, without namespace or version.
+            namespace(:obj:`str`,optional): Only match the given namespace.
+            category(:obj:`str`,optional): Only match the given category.
+
+        Returns:
+            (list(dict)): The matching versions.
+        """
+        sql = (
+            "SELECT repos.name AS repo, node_types.category, node_types.namespace, "
+            "node_types.name, versions.type_name, versions.version, versions.hidden, "
+            "versions.installed, files.path "
+            "FROM node_types "
+            "JOIN versions ON versions.node_type_id = node_types.id "
+            "JOIN repos ON repos.id = node_types.repo_id "
+            "JOIN files ON files.id = versions.file_id "
+            "WHERE node_types.name = ?"
+        )
+        parameters = [name]
+        if namespace is not None:
+            sql += " AND node_types.namespace = ?"
+            parameters.append(namespace)
+        if category:
+            sql += " AND node_types.category = ?"
+            parameters.append(category)
+        return sorted(self._query(sql, tuple(parameters)), key=_version_key)
+
+    def libraries(self, prefix=""):
+        """
+        Find the library files that define node types starting with the given prefix.
+
+        Args:
+            prefix(:obj:`str`,optional): The node type name prefix, eg. "foo::".
+
+        Returns:
+            (list(str)): The library file paths.
+        """
+        low, high = prefix_range(prefix)
+        return [
+            row["path"]
+            for row in self._query(
+                "SELECT DISTINCT files.path FROM versions "
+                "JOIN files ON files.id = versions.file_id "
+                "WHERE versions.type_name >= ? AND versions.type_name < ? "
+                "ORDER BY files.path",
+                (low, high),
+            )
+        ]
+
+    def changed_since(self, timestamp):
+        """
+        Find the versions added and releases made since the given time.
+
+        Args:
+            timestamp(float): The time to look from, in seconds since the epoch.
+
+        Returns:
+            (dict): The added versions and releases.
+        """
+        return {
+            "versions": self._query(
+                "SELECT repos.name AS repo, versions.type_name, versions.version, "
+                "versions.added, files.path FROM versions "
+                "JOIN node_types ON node_types.id = versions.node_type_id "
+                "JOIN repos ON repos.id = node_types.repo_id "
+                "JOIN files ON files.id = versions.file_id "
+                "WHERE versions.added >= ? ORDER BY versions.added",
+                (timestamp,),
+            ),
+            "releases": self._query(
+                "SELECT repos.name AS repo, releases.type_name, releases.version, "
+                "releases.comment, releases.user, releases.released FROM releases "
+                "LEFT JOIN repos ON repos.id = releases.repo_id "
+                "WHERE releases.released >= ? ORDER BY releases.released",
+                (timestamp,),
+            ),
+        }
+
+
+def main(argv=None):
+    """Query a Node Manager catalog from the command line.
+
+    Args:
+        argv(:obj:`list`,optional): The command line arguments.
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Query a Node Manager catalog.")
+    parser.add_argument("catalog", help="Path to the catalog database.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    types_parser = subparsers.add_parser("types", help="Find versions by type prefix.")
+    types_parser.add_argument("prefix", nargs="?", default="")
+    libraries_parser = subparsers.add_parser(
+        "libraries", help="Find libraries defining a type prefix."
+    )
+    libraries_parser.add_argument("prefix", nargs="?", default="")
+    versions_parser = subparsers.add_parser(
+        "versions", help="Find all versions of a node type."
+    )
+    versions_parser.add_argument("name")
+    versions_parser.add_argument("--namespace")
+    since_parser = subparsers.add_parser(
+        "since", help="Find changes in the last number of hours."
+    )
+    since_parser.add_argument("hours", type=float)
+    stages_parser = subparsers.add_parser(
+        "stages", help="Summarise the duration of each release stage."
+    )
+    stages_parser.add_argument("--repo")
+    args = parser.parse_args(argv)
+
+    node_catalog = NodeCatalog(args.catalog)
+    if args.command == "types":
+        rows = node_catalog.find_versions(args.prefix)
+    elif args.command == "libraries":
+        rows = [{"path": path} for path in node_catalog.libraries(args.prefix)]
+    elif args.command == "versions":
+        rows = node_catalog.node_type_versions(args.name, namespace=args.namespace)
+    elif args.command == "stages":
+        rows = node_catalog.release_stage_timings(repo_name=args.repo)
+    else:
+        changes = node_catalog.changed_since(time.time() - args.hours * 3600)
+        rows = changes["versions"] + changes["releases"]
+
+    for row in rows:
+        sys.stdout.write(
+            "\t".join("" if value is None else str(value) for value in row.values())
+            + "\n"
+        )
+    node_catalog.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+
+"""Node manager node classification cache."""
+
+import collections
+import logging
+
+import hou
+
+from node_manager import utils
+from node_manager.utils import nodeutils
+
+
+logger = logging.getLogger(__name__)
+
+
+Classification = collections.namedtuple(
+    "Classification",
+    ["digital_asset", "managed", "editable", "released", "latest"],
+)
+
+# Nodes the Node Manager doesn't handle never have a newer version available.
+UNMANAGED = Classification(
+    digital_asset=False,
+    managed=False,
+    editable=False,
+    released=False,
+    latest=True,
+)
+
+INVALIDATING_EVENTS = (
+    "AssetCreated",
+    "AssetDeleted",
+    "AssetSaved",
+    "LibraryInstalled",
+    "LibraryUninstalled",
+)
+
+
+class ClassificationCache(object):
+    """ClassificationCache - Cached Node Manager state for node definitions.
+
+    Menus, callbacks and validators all need to know whether a node's definition is
+    managed by the Node Manager, editable, released and at the latest version. The
+    classification is cached per definition, keyed by its library path and
+    modification time, so that it is only worked out once until a definition is
+    installed, uninstalled or saved.
+    """
+
+    def __init__(self, manager):
+        """
+        Initialise the ClassificationCache.
+
+        Args:
+            manager(NodeManager): The instance of the running Node manager.
+        """
+        self.manager = manager
+        self.classifications = dict()
+        self.callbacks_registered = False
+
+    def register_callbacks(self):
+        """Register HDA event callbacks that will invalidate the cache."""
+        if self.callbacks_registered:
+            return
+
+        event_types = tuple(
+            getattr(hou.hdaEventType, event_type) for event_type in INVALIDATING_EVENTS
+        )
+        hou.hda.addEventCallback(event_types, self._hda_event)
+        self.callbacks_registered = True
+        logger.debug("Registered classification cache HDA event callbacks.")
+
+    def unregister_callbacks(self):
+        """Remove the HDA event callbacks registered by this cache."""
+        if not self.callbacks_registered:
+            return
+
+        event_types = tuple(
+            getattr(hou.hdaEventType, event_type) for event_type in INVALIDATING_EVENTS
+        )
+        hou.hda.removeEventCallback(event_types, self._hda_event)
+        self.callbacks_registered = False
+        logger.debug("Removed classification cache HDA event callbacks.")
+
+    def _hda_event(self, event_type, **kwargs):
+        """Handle a HDA event by invalidating the cache.
+
+        Args:
+            event_type(hou.hdaEventType): The type of event that occurred.
+        """
+        self.invalidate()
+
+    def invalidate(self):
+        """Invalidate all cached classifications.
+
+        The latest and managed flags depend on every other version known to the Node
+        Manager, so any install or uninstall invalidates the whole cache.
+        """
+        if self.classifications:
+            logger.debug(
+                "Invalidating {count} cached classifications.".format(
+                    count=len(self.classifications),
+                )
+            )
+        self.classifications.clear()
+
+    @staticmethod
+    def definition_key(definition):
+        """
+        Get the cache key for the given definition.
+
+        Args:
+            definition(hou.HDADefinition): The definition to get the key for.
+
+        Returns:
+            (tuple): The cache key.
+        """
+        return (
+            definition.libraryFilePath(),
+            definition.nodeTypeCategory().name(),
+            definition.nodeTypeName(),
+            definition.modificationTime(),
+        )
+
+    def classify(self, current_node):
+        """
+        Get the classification for the given node.
+
+        Args:
+            current_node(hou.Node): The node to classify.
+
+        Returns:
+            (Classification): The classification for the node's definition.
+        """
+        return self.classify_definition(nodeutils.node_definition(current_node))
+
+    def classify_definition(self, definition):
+        """
+        Get the classification for the given definition.
+
+        Args:
+            definition(hou.HDADefinition): The definition to classify.
+
+        Returns:
+            (Classification): The classification for the definition.
+        """
+        if not definition:
+            return UNMANAGED
+
+        key = self.definition_key(definition)
+        classification = self.classifications.get(key)
+        if classification is None:
+            classification = self._classify(definition)
+            self.classifications[key] = classification
+
+        return classification
+
+    def _classify(self, definition):
+        """
+        Work out the classification for the given definition.
+
+        Args:
+            definition(hou.HDADefinition): The definition to classify.
+
+        Returns:
+            (Classification): The classification for the node's definition.
+        """
+        logger.debug(
+            "Classifying {definition}".format(definition=definition.nodeTypeName())
+        )
+        if not nodeutils.is_digital_asset_definition(
+            definition,
+            include_hidden=self.manager.config.get("include_all_hdas", False),
+        ):
+            return UNMANAGED
+
+        managed = self.manager.is_node_manager_definition(definition)
+        return Classification(
+            digital_asset=True,
+            managed=managed,
+            editable=not managed,
+            released=utils.is_released(definition.libraryFilePath()),
+            latest=self.manager.is_latest_definition(definition),
+        )
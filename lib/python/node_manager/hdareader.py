@@ -0,0 +1,278 @@
+#!/usr/bin/env python
+
+"""Read HDA libraries without Houdini.
+
+HDA libraries are stored as an indexed container ("INDX"). The container starts with
+an index table of named sections, followed by the section data:
+
+    4 bytes     magic, "INDX"
+    4 bytes     big-endian uint32, the size in bytes of the index table
+    index table one entry per section:
+                    4 bytes     big-endian uint32, the length of the section name
+                    n bytes     the section name
+                    4 bytes     big-endian uint32, the offset of the section data,
+                                relative to the end of the index table
+                    4 bytes     big-endian uint32, the size of the section data
+    data        the section data
+
+The library's INDEX_SECTION describes each definition as a block of "Key: value"
+lines, and each definition's sections are stored in a nested container in the
+"<category>/<node type name>" section.
+
+The library is memory-mapped, so only the index tables and INDEX_SECTION are read.
+"""
+
+import collections
+import logging
+import mmap
+import os
+import struct
+
+
+logger = logging.getLogger(__name__)
+
+
+MAGIC = b"INDX"
+INDEX_SECTION = "INDEX_SECTION"
+
+_UINT32 = struct.Struct(">I")
+
+
+Section = collections.namedtuple("Section", ["name", "offset", "size"])
+
+LibraryDefinition = collections.namedtuple(
+    "LibraryDefinition",
+    ["node_type_name", "category", "label", "section", "modified", "sections"],
+)
+
+
+class HDAReaderError(RuntimeError):
+    """The library couldn't be read."""
+
+
+def _read_uint32(buffer, offset):
+    """
+    Read a big-endian uint32 from the buffer.
+
+    Args:
+        buffer(mmap.mmap): The buffer to read from.
+        offset(int): The offset to read at.
+
+    Returns:
+        (int): The value read.
+
+    Raises:
+        HDAReaderError: The buffer is too short.
+    """
+    if offset + _UINT32.size > len(buffer):
+        raise HDAReaderError("Unexpected end of library at {offset}".format(offset=offset))
+    return _UINT32.unpack_from(buffer, offset)[0]
+
+
+def read_index(buffer, start=0, end=None):
+    """
+    Read the index table of the container found at the given offset.
+
+    Args:
+        buffer(mmap.mmap): The buffer containing the library.
+        start(int): The offset the container starts at.
+        end(:obj:`int`,optional): The offset the container ends at.
+
+    Returns:
+        (collections.OrderedDict): The sections in the container, keyed by name, with
+            offsets relative to the start of the buffer.
+
+    Raises:
+        HDAReaderError: The container isn't valid.
+    """
+    if end is None:
+        end = len(buffer)
+
+    if buffer[start : start + len(MAGIC)] != MAGIC:
+        raise HDAReaderError("Not an indexed library at offset {offset}".format(offset=start))
+
+    index_size = _read_uint32(buffer, start + len(MAGIC))
+    position = start + len(MAGIC) + _UINT32.size
+    data_start = position + index_size
+    if data_start > end:
+        raise HDAReaderError("Index table extends past the end of the container.")
+
+    sections = collections.OrderedDict()
+    while position < data_start:
+        name_length = _read_uint32(buffer, position)
+        position += _UINT32.size
+        name = bytes(buffer[position : position + name_length]).decode("utf-8")
+        position += name_length
+        offset = _read_uint32(buffer, position)
+        size = _read_uint32(buffer, position + _UINT32.size)
+        position += 2 * _UINT32.size
+
+        section_start = data_start + offset
+        if section_start + size > end:
+            raise HDAReaderError(
+                "Section {name} extends past the end of the container.".format(name=name)
+            )
+        sections[name] = Section(name, section_start, size)
+
+    return sections
+
+
+def parse_index_section(text):
+    """
+    Parse the INDEX_SECTION of a library.
+
+    Args:
+        text(str): The contents of the INDEX_SECTION.
+
+    Returns:
+        (list(dict)): The fields for each definition in the library.
+    """
+    definitions = []
+    current = {}
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+
+        key, _, value = line.partition(":")
+        key = key.strip()
+        value = value.strip()
+        if key == "Operator" and current:
+            definitions.append(current)
+            current = {}
+        current[key] = value
+
+    if current:
+        definitions.append(current)
+
+    return definitions
+
+
+class HDALibrary(object):
+    """HDALibrary - A memory-mapped HDA library."""
+
+    def __init__(self, path):
+        """
+        Open the HDA library.
+
+        Args:
+            path(str): The path to the library file.
+
+        Raises:
+            HDAReaderError: The library couldn't be opened.
+        """
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError as error:
+            # Empty files can't be memory-mapped.
+            self._file.close()
+            raise HDAReaderError("Couldn't map {path}: {error}".format(path=path, error=error))
+        self._sections = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """Close the library."""
+        self._buffer.close()
+        self._file.close()
+
+    def sections(self):
+        """
+        Get the top level sections in the library.
+
+        Returns:
+            (collections.OrderedDict): The sections keyed by name.
+        """
+        if self._sections is None:
+            self._sections = read_index(self._buffer)
+        return self._sections
+
+    def read_section(self, section):
+        """
+        Read the data for the given section.
+
+        Args:
+            section(Section): The section to read.
+
+        Returns:
+            (bytes): The section data.
+        """
+        return bytes(self._buffer[section.offset : section.offset + section.size])
+
+    def definition_sections(self, section):
+        """
+        Get the sections stored for the definition in the given section.
+
+        Args:
+            section(Section): The definition section.
+
+        Returns:
+            (collections.OrderedDict): The definition's sections keyed by name.
+        """
+        return read_index(
+            self._buffer, start=section.offset, end=section.offset + section.size
+        )
+
+    def definitions(self):
+        """
+        Get the definitions in the library.
+
+        Returns:
+            (list(LibraryDefinition)): The definitions in the library.
+
+        Raises:
+            HDAReaderError: The library has no INDEX_SECTION.
+        """
+        sections = self.sections()
+        index_section = sections.get(INDEX_SECTION)
+        if not index_section:
+            raise HDAReaderError(
+                "No {name} found in {path}".format(name=INDEX_SECTION, path=self.path)
+            )
+
+        text = self.read_section(index_section).decode("utf-8", "replace")
+        definitions = []
+        for fields in parse_index_section(text):
+            node_type_name = fields.get("Operator")
+            category = fields.get("Table")
+            section_name = "{category}/{name}".format(
+                category=category, name=node_type_name
+            )
+            section = sections.get(section_name)
+            definitions.append(
+                LibraryDefinition(
+                    node_type_name=node_type_name,
+                    category=category,
+                    label=fields.get("Label"),
+                    section=section_name,
+                    modified=fields.get("Modified"),
+                    sections=self.definition_sections(section) if section else {},
+                )
+            )
+
+        return definitions
+
+
+def definitions_in_file(path):
+    """
+    Get the definitions in the given library file without loading Houdini.
+
+    Args:
+        path(str): The path to the library file.
+
+    Returns:
+        (list(LibraryDefinition)): The definitions in the library.
+
+    Raises:
+        HDAReaderError: The library couldn't be read.
+    """
+    if not os.path.isfile(path):
+        raise HDAReaderError("Library not found: {path}".format(path=path))
+
+    with HDALibrary(path) as library:
+        return library.definitions()
@@ -0,0 +1,331 @@
+#!/usr/bin/env python
+
+"""Scan hip files for the node types they use without Houdini.
+
+Hip files are stored as a cpio archive using the portable ASCII ("odc") format. Each
+entry has a fixed size header followed by its name and data:
+
+    6 bytes     magic, "070707"
+    42 bytes    device, inode, mode, uid, gid, nlink and rdev, 6 octal digits each
+    11 bytes    modification time, octal
+    6 bytes     name size in bytes, including the trailing NUL, octal
+    11 bytes    data size in bytes, octal
+    n bytes     the entry name
+    n bytes     the entry data
+
+The archive ends with an entry named "TRAILER!!!". Each node in the scene has a
+"<node path>.init" entry with a "type = <node type name>" line, so only those entries
+are read and all other data is skipped.
+
+The scanner can be run over a project directory to report which versions in a Node
+Manager catalog are unused, eg.
+
+    python -m node_manager.hipscanner /path/to/catalog.db /path/to/project
+"""
+
+import collections
+import concurrent.futures
+import logging
+import os
+import sys
+
+from node_manager import catalog
+
+
+logger = logging.getLogger(__name__)
+
+
+HIP_EXTENSIONS = (".hip", ".hipnc", ".hiplc")
+
+MAGIC = b"070707"
+HEADER_SIZE = 76
+TRAILER = "TRAILER!!!"
+INIT_SUFFIX = ".init"
+
+
+ScanResult = collections.namedtuple("ScanResult", ["path", "node_types", "error"])
+
+VersionUsage = collections.namedtuple(
+    "VersionUsage", ["type_name", "repo", "version", "hip_files"]
+)
+
+UsageReport = collections.namedtuple(
+    "UsageReport", ["used", "unused", "retained", "unknown", "errors"]
+)
+
+
+class HipScanError(RuntimeError):
+    """The hip file couldn't be read."""
+
+
+def _read_octal(header, start, size):
+    """
+    Read an octal field from a cpio header.
+
+    Args:
+        header(bytes): The header to read from.
+        start(int): The offset of the field.
+        size(int): The size of the field.
+
+    Returns:
+        (int): The value of the field.
+
+    Raises:
+        HipScanError: The field isn't valid.
+    """
+    try:
+        return int(header[start : start + size], 8)
+    except ValueError:
+        raise HipScanError("Invalid archive header: {header}".format(header=header))
+
+
+def read_node_types(path):
+    """
+    Read the node types used in the given hip file.
+
+    Args:
+        path(str): The path to the hip file.
+
+    Returns:
+        (collections.Counter): The number of nodes of each node type name.
+
+    Raises:
+        HipScanError: The hip file isn't a cpio archive.
+    """
+    node_types = collections.Counter()
+    with open(path, "rb") as hip_file:
+        while True:
+            header = hip_file.read(HEADER_SIZE)
+            if not header:
+                break
+            if len(header) < HEADER_SIZE or not header.startswith(MAGIC):
+                raise HipScanError(
+                    "Not a hip archive, or archive is truncated: {path}".format(path=path)
+                )
+
+            name_size = _read_octal(header, 59, 6)
+            data_size = _read_octal(header, 65, 11)
+            name = hip_file.read(name_size).rstrip(b"\0").decode("utf-8", "replace")
+            if name == TRAILER:
+                break
+
+            if not name.endswith(INIT_SUFFIX):
+                hip_file.seek(data_size, os.SEEK_CUR)
+                continue
+
+            data = hip_file.read(data_size).decode("utf-8", "replace")
+            for line in data.splitlines():
+                key, _, value = line.partition("=")
+                if key.strip() == "type":
+                    node_types[value.strip()] += 1
+                    break
+
+    return node_types
+
+
+def find_hip_files(root, extensions=HIP_EXTENSIONS):
+    """
+    Find all hip files under the given directory.
+
+    Args:
+        root(str): The directory to search.
+        extensions(:obj:`tuple` of :obj:`str`,optional): The hip file extensions.
+
+    Returns:
+        (list(str)): The paths to the hip files found.
+    """
+    paths = []
+    for directory, _, file_names in os.walk(root):
+        for file_name in file_names:
+            if file_name.endswith(extensions):
+                paths.append(os.path.join(directory, file_name))
+    return sorted(paths)
+
+
+def _scan_file(path):
+    """
+    Scan a single hip file, catching any errors so a bad file doesn't stop a scan.
+
+    Args:
+        path(str): The path to the hip file.
+
+    Returns:
+        (ScanResult): The node types found, or the error raised.
+    """
+    try:
+        return ScanResult(path, dict(read_node_types(path)), None)
+    except (HipScanError, OSError) as error:
+        return ScanResult(path, {}, str(error))
+
+
+def scan(paths, processes=None, chunksize=8):
+    """
+    Scan the given hip files for the node types they use, using a process pool.
+
+    Args:
+        paths(list(str)): The paths to the hip files to scan.
+        processes(:obj:`int`,optional): The number of processes to use. Defaults to
+            the number of CPUs. If 1, the files are scanned in this process.
+        chunksize(:obj:`int`,optional): The number of files sent to each process at
+            a time.
+
+    Returns:
+        (list(ScanResult)): The result for each hip file.
+    """
+    if processes == 1 or len(paths) <= 1:
+        return [_scan_file(path) for path in paths]
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=processes) as executor:
+        return list(executor.map(_scan_file, paths, chunksize=chunksize))
+
+
+def _parse_version(version):
+    """Parse a node type version, returning None if it isn't a valid version.
+
+    Args:
+        version(str): The version to parse.
+
+    Returns:
+        (packaging.version.Version): The parsed version.
+    """
+    from packaging.version import InvalidVersion, Version
+
+    try:
+        return Version(version)
+    except (InvalidVersion, TypeError):
+        return None
+
+
+def _base_name(record):
+    """
+    Get the node type name without a version for the given version record.
+
+    Args:
+        record(dict): The version record.
+
+    Returns:
+        (str): The namespace and name of the node type.
+    """
+    if record.get("namespace"):
+        return "{namespace}::{name}".format(**record)
+    return record["name"]
+
+
+def usage_report(results, versions):
+    """
+    Combine scan results with the known versions to report which versions are used.
+
+    The latest version of each node type is always retained, even if it is unused,
+    as it is the version new nodes are created with.
+
+    Args:
+        results(list(ScanResult)): The hip file scan results.
+        versions(list(dict)): The known versions. Each should provide repo, category,
+            namespace, name, type_name and version, as recorded in the catalog.
+
+    Returns:
+        (UsageReport): The versions used along with the hip files using them, the
+            unused versions that are safe to stop loading, the unused versions
+            retained as they are the latest, any referenced versions of known node
+            types that aren't available, and the hip files that couldn't be read.
+    """
+    hip_files = collections.defaultdict(list)
+    errors = {}
+    for result in results:
+        if result.error:
+            errors[result.path] = result.error
+        for type_name in result.node_types:
+            hip_files[type_name].append(result.path)
+
+    latest = {}
+    known = set()
+    for record in versions:
+        known.add(record["type_name"])
+        parsed = _parse_version(record.get("version"))
+        key = (record.get("category"), _base_name(record))
+        if parsed and (key not in latest or parsed > latest[key]):
+            latest[key] = parsed
+
+    used = []
+    unused = []
+    retained = []
+    for record in sorted(versions, key=lambda record: record["type_name"]):
+        type_name = record["type_name"]
+        if type_name in hip_files:
+            used.append(
+                VersionUsage(
+                    type_name,
+                    record.get("repo"),
+                    record.get("version"),
+                    sorted(hip_files[type_name]),
+                )
+            )
+            continue
+
+        key = (record.get("category"), _base_name(record))
+        if _parse_version(record.get("version")) == latest.get(key):
+            retained.append(record)
+        else:
+            unused.append(record)
+
+    base_names = set(_base_name(record) for record in versions)
+    unknown = {
+        type_name: sorted(paths)
+        for type_name, paths in hip_files.items()
+        if type_name not in known and type_name.rpartition("::")[0] in base_names
+    }
+
+    return UsageReport(used, unused, retained, unknown, errors)
+
+
+def main(argv=None):
+    """Report the catalog versions used by the hip files in a directory.
+
+    Args:
+        argv(:obj:`list`,optional): The command line arguments.
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Report the node type versions used by hip files."
+    )
+    parser.add_argument("catalog", help="Path to the catalog database.")
+    parser.add_argument("root", help="Directory to search for hip files.")
+    parser.add_argument("--repo", help="Only report versions from the given repo.")
+    parser.add_argument("--processes", type=int, help="Number of processes to use.")
+    args = parser.parse_args(argv)
+
+    node_catalog = catalog.NodeCatalog(args.catalog)
+    versions = node_catalog.find_versions(repo_name=args.repo)
+    node_catalog.close()
+
+    paths = find_hip_files(args.root)
+    logger.info("Scanning {count} hip files.".format(count=len(paths)))
+    report = usage_report(scan(paths, processes=args.processes), versions)
+
+    write = sys.stdout.write
+    write("Used:\n")
+    for usage in report.used:
+        write(
+            "\t{type_name}\t{repo}\t{count} hip files\n".format(
+                type_name=usage.type_name,
+                repo=usage.repo,
+                count=len(usage.hip_files),
+            )
+        )
+    write("Unused:\n")
+    for record in report.unused:
+        write("\t{type_name}\t{repo}\t{path}\n".format(**record))
+    write("Unused, retained as latest:\n")
+    for record in report.retained:
+        write("\t{type_name}\t{repo}\n".format(**record))
+    write("Missing:\n")
+    for type_name, hip_files in sorted(report.unknown.items()):
+        write("\t{type_name}\t{files}\n".format(type_name=type_name, files=", ".join(hip_files)))
+    write("Unreadable:\n")
+    for path, error in sorted(report.errors.items()):
+        write("\t{path}\t{error}\n".format(path=path, error=error))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+
+"""Node manager scene inventory."""
+
+import collections
+import logging
+
+import hou
+
+from node_manager.utils import nodetypeutils
+
+
+logger = logging.getLogger(__name__)
+
+
+LATEST = "latest"
+OUTDATED = "outdated"
+EDITABLE = "editable"
+UNMANAGED = "unmanaged"
+
+InventoryGroup = collections.namedtuple(
+    "InventoryGroup",
+    ["node_type_name", "category", "version", "library_path", "state", "nodes"],
+)
+
+
+class SceneInventory(object):
+    """SceneInventory - The digital asset instances in the current scene.
+
+    Instances are found in a single pass over the installed digital asset node types
+    using hou.NodeType.instances(), rather than by globbing every node in the scene.
+    The instances are cached until nodes are created, loaded, updated or deleted, or
+    a new scene is loaded. The state of each group is worked out from the
+    classification cache when the inventory is read, so it is always up to date with
+    the definitions installed.
+    """
+
+    def __init__(self, manager):
+        """
+        Initialise the SceneInventory.
+
+        Args:
+            manager(NodeManager): The instance of the running Node manager.
+        """
+        self.manager = manager
+        self._instances = None
+        self.callbacks_registered = False
+
+    def register_callbacks(self):
+        """Register a hip file callback that will invalidate the inventory."""
+        if self.callbacks_registered:
+            return
+
+        hou.hipFile.addEventCallback(self._hip_file_event)
+        self.callbacks_registered = True
+
+    def _hip_file_event(self, event_type):
+        """Invalidate the inventory when the scene is cleared or loaded.
+
+        Args:
+            event_type(hou.hipFileEventType): The hip file event that occurred.
+        """
+        if event_type in (hou.hipFileEventType.AfterClear, hou.hipFileEventType.AfterLoad):
+            self.invalidate()
+
+    def invalidate(self):
+        """Invalidate the cached instances."""
+        self._instances = None
+
+    def instances(self):
+        """
+        Get the digital asset instances in the scene, grouped by definition.
+
+        Returns:
+            (dict): The instances of each node type, keyed by hou.NodeType.
+        """
+        if self._instances is None:
+            self._instances = {}
+            for category in hou.nodeTypeCategories().values():
+                for node_type in category.nodeTypes().values():
+                    if not node_type.definition():
+                        continue
+                    instances = node_type.instances()
+                    if instances:
+                        self._instances[node_type] = instances
+            logger.debug(
+                "Scene inventory found {count} digital asset types in use.".format(
+                    count=len(self._instances),
+                )
+            )
+        return self._instances
+
+    def state(self, definition):
+        """
+        Get the inventory state for the given definition.
+
+        Args:
+            definition(hou.HDADefinition): The definition to get the state for.
+
+        Returns:
+            (str): The state, or None if the Node Manager doesn't handle the definition.
+        """
+        classification = self.manager.classifications.classify_definition(definition)
+        if not classification.digital_asset:
+            return None
+
+        if classification.managed:
+            return LATEST if classification.latest else OUTDATED
+
+        edit_dir = self.manager.context.get("manager_edit_dir")
+        if edit_dir and definition.libraryFilePath().startswith(edit_dir):
+            return EDITABLE
+
+        return UNMANAGED
+
+    def groups(self, states=None):
+        """
+        Get the instances in the scene grouped by node type and version.
+
+        Args:
+            states(:obj:`list` of :obj:`str`,optional): Only return groups in these
+                states.
+
+        Returns:
+            (list(InventoryGroup)): The inventory groups.
+        """
+        groups = []
+        for node_type, instances in self.instances().items():
+            try:
+                definition = node_type.definition()
+            except hou.ObjectWasDeleted:
+                continue
+            if not definition:
+                continue
+
+            state = self.state(definition)
+            if state is None or (states and state not in states):
+                continue
+
+            current_name = definition.nodeTypeName()
+            groups.append(
+                InventoryGroup(
+                    node_type_name=current_name,
+                    category=definition.nodeTypeCategory().name(),
+                    version=nodetypeutils.node_type_version(current_name),
+                    library_path=definition.libraryFilePath(),
+                    state=state,
+                    nodes=instances,
+                )
+            )
+
+        return sorted(groups, key=lambda group: (group.category, group.node_type_name))
+
+    def outdated_nodes(self):
+        """
+        Get all of the nodes in the scene that aren't using the latest version.
+
+        Returns:
+            (list(hou.Node)): The outdated nodes.
+        """
+        return [
+            current_node
+            for group in self.groups(states=[OUTDATED])
+            for current_node in group.nodes
+        ]
@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+
+"""Node manager scene inventory panel."""
+
+import logging
+
+import hou
+
+from hutil.Qt import QtWidgets
+
+from node_manager import inventory
+from node_manager import menu
+from node_manager import utils
+
+
+logger = logging.getLogger(__name__)
+
+
+class InventoryPanel(QtWidgets.QWidget):
+    """Python panel listing the digital asset instances in the scene by state."""
+
+    columns = ["Node Type", "Version", "State", "Instances", "Library"]
+    states = [
+        inventory.LATEST,
+        inventory.OUTDATED,
+        inventory.EDITABLE,
+        inventory.UNMANAGED,
+    ]
+
+    def __init__(self, parent=None):
+        """Initialise the panel.
+
+        Args:
+            parent(:obj:`QtWidgets.QWidget`,optional): The parent widget.
+        """
+        super(InventoryPanel, self).__init__(parent)
+
+        self.state_filter = QtWidgets.QComboBox()
+        self.state_filter.addItems(["all"] + self.states)
+        self.state_filter.currentIndexChanged.connect(self.refresh)
+
+        refresh_button = QtWidgets.QPushButton("Refresh")
+        refresh_button.clicked.connect(self.refresh)
+
+        upgrade_button = QtWidgets.QPushButton("Upgrade Outdated")
+        upgrade_button.clicked.connect(self.upgrade_outdated)
+
+        self.tree = QtWidgets.QTreeWidget()
+        self.tree.setHeaderLabels(self.columns)
+        self.tree.setSortingEnabled(True)
+        self.tree.itemDoubleClicked.connect(self.select_instances)
+
+        toolbar = QtWidgets.QHBoxLayout()
+        toolbar.addWidget(self.state_filter)
+        toolbar.addStretch()
+        toolbar.addWidget(upgrade_button)
+        toolbar.addWidget(refresh_button)
+
+        layout = QtWidgets.QVBoxLayout()
+        layout.addLayout(toolbar)
+        layout.addWidget(self.tree)
+        self.setLayout(layout)
+
+        self._groups = []
+        self.refresh()
+
+    def refresh(self):
+        """Rebuild the tree from the scene inventory."""
+        self.tree.clear()
+        manager = utils.get_manager()
+        if not manager or not manager.is_ready():
+            return
+
+        state = self.state_filter.currentText()
+        self._groups = manager.inventory.groups(
+            states=None if state == "all" else [state]
+        )
+        for index, group in enumerate(self._groups):
+            item = QtWidgets.QTreeWidgetItem(
+                [
+                    group.node_type_name,
+                    group.version or "",
+                    group.state,
+                    str(len(group.nodes)),
+                    group.library_path,
+                ]
+            )
+            item.setData(0, QtWidgets.QTreeWidgetItem.UserType, index)
+            self.tree.addTopLevelItem(item)
+
+        for column in range(len(self.columns)):
+            self.tree.resizeColumnToContents(column)
+
+    def select_instances(self, item, column):
+        """Select the instances of the double clicked group in the scene.
+
+        Args:
+            item(QtWidgets.QTreeWidgetItem): The item that was double clicked.
+            column(int): The column that was double clicked.
+        """
+        group = self._groups[item.data(0, QtWidgets.QTreeWidgetItem.UserType)]
+        hou.clearAllSelected()
+        for current_node in group.nodes:
+            current_node.setSelected(True)
+
+    def upgrade_outdated(self):
+        """Upgrade all outdated nodes in the scene, then refresh the tree."""
+        menu.confirm_upgrade_nodes()
+        self.refresh()
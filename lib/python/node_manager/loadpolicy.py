@@ -0,0 +1,241 @@
+#!/usr/bin/env python
+
+"""Node manager repo load policy."""
+
+import fnmatch
+import logging
+import re
+
+from node_manager.utils import nodetypeutils
+
+
+logger = logging.getLogger(__name__)
+
+
+def _compile_pattern(patterns):
+    """Compile a list of regular expressions into a single expression.
+
+    Args:
+        patterns(list(str)): The regular expressions to compile.
+
+    Returns:
+        (re.Pattern): The compiled expression, or None if no patterns were provided.
+    """
+    if not patterns:
+        return None
+    return re.compile("|".join("(?:{pattern})".format(pattern=p) for p in patterns))
+
+
+def _parse_version(version):
+    """Parse a node type version, returning None if it isn't a valid version.
+
+    Args:
+        version(str): The version to parse.
+
+    Returns:
+        (packaging.version.Version): The parsed version.
+    """
+    if not version:
+        return None
+
+    from packaging.version import InvalidVersion, Version
+
+    try:
+        return Version(version)
+    except InvalidVersion:
+        return None
+
+
+class LoadPolicy(object):
+    """LoadPolicy - Rules determining how a repo's definitions are loaded.
+
+    Hide rules control which node types are hidden from the user once installed, and
+    retention rules control which versions are installed at all. All rules are
+    compiled once when the policy is created so that checking a definition doesn't
+    depend on the number of rules configured.
+    """
+
+    def __init__(
+        self,
+        hide_substring=None,
+        hide_exact=None,
+        hide_glob=None,
+        hide_regex=None,
+        latest_per_major=None,
+        min_version=None,
+    ):
+        """
+        Initialise the LoadPolicy.
+
+        Args:
+            hide_substring(:obj:`list` of :obj:`str`,optional): Hide node types whose
+                name contains any of these strings.
+            hide_exact(:obj:`list` of :obj:`str`,optional): Hide node types whose name
+                exactly matches any of these names.
+            hide_glob(:obj:`list` of :obj:`str`,optional): Hide node types whose name
+                matches any of these glob patterns.
+            hide_regex(:obj:`list` of :obj:`str`,optional): Hide node types whose name
+                matches any of these regular expressions.
+            latest_per_major(:obj:`int`,optional): Only install the latest N versions
+                for each major version of a node type.
+            min_version(:obj:`str`,optional): Never install versions older than this.
+        """
+        self.hide_exact = frozenset(hide_exact or [])
+        self._hide_pattern = _compile_pattern(
+            [re.escape(substring) for substring in hide_substring or []]
+            + [fnmatch.translate(pattern) for pattern in hide_glob or []]
+            + list(hide_regex or [])
+        )
+        self.latest_per_major = latest_per_major
+        self.min_version = _parse_version(min_version)
+        if min_version and not self.min_version:
+            raise RuntimeError(
+                "Invalid minimum version in load policy: {version}".format(
+                    version=min_version,
+                )
+            )
+
+    @classmethod
+    def from_config(cls, repo_config):
+        """
+        Create a LoadPolicy from a repo config.
+
+        The legacy "ophide" list is treated as a set of substring hide rules.
+
+        Args:
+            repo_config(dict): The repo config, as loaded from config.json.
+
+        Returns:
+            (LoadPolicy): The compiled load policy.
+        """
+        policy_config = repo_config.get("load_policy", {})
+        hide_config = policy_config.get("hide", {})
+        return cls(
+            hide_substring=repo_config.get("ophide", []),
+            hide_exact=hide_config.get("exact", []),
+            hide_glob=hide_config.get("glob", []),
+            hide_regex=hide_config.get("regex", []),
+            latest_per_major=policy_config.get("latest_per_major"),
+            min_version=policy_config.get("min_version"),
+        )
+
+    def requires_all_definitions(self):
+        """
+        Do the rules need every definition in the repo before deciding what to install?
+
+        Returns:
+            (bool): True if version retention rules are configured.
+        """
+        return bool(self.latest_per_major)
+
+    def is_hidden(self, node_type_name):
+        """
+        Should the given node type be hidden?
+
+        Args:
+            node_type_name(str): The node type name to check.
+
+        Returns:
+            (bool): Should the node type be hidden.
+        """
+        if node_type_name in self.hide_exact:
+            return True
+        if self._hide_pattern and self._hide_pattern.search(node_type_name):
+            return True
+        return False
+
+    def is_version_allowed(self, node_type_name):
+        """
+        Does the version of the given node type pass the minimum version rule?
+
+        Definitions without a valid version are always allowed.
+
+        Args:
+            node_type_name(str): The node type name to check.
+
+        Returns:
+            (bool): Is the version allowed.
+        """
+        if not self.min_version:
+            return True
+        version = _parse_version(nodetypeutils.node_type_version(node_type_name))
+        if not version:
+            return True
+        return version >= self.min_version
+
+    def filter_names(self, names):
+        """
+        Filter the given node types, removing any versions excluded by the policy.
+
+        Args:
+            names(list(tuple)): The (category, node type name) of each definition.
+
+        Returns:
+            (list(tuple)): The (category, node type name) of the definitions that
+                should be installed, in their original order.
+        """
+        allowed = []
+        for category, current_name in names:
+            if self.is_version_allowed(current_name):
+                allowed.append((category, current_name))
+            else:
+                logger.debug(
+                    "Excluded by minimum version: {name}".format(name=current_name)
+                )
+
+        if not self.latest_per_major:
+            return allowed
+
+        # Group the versions found for each major version of each node type.
+        majors = {}
+        parsed = {}
+        for category, current_name in allowed:
+            version = _parse_version(nodetypeutils.node_type_version(current_name))
+            if not version:
+                continue
+            key = (
+                category,
+                nodetypeutils.node_type_namespace(current_name),
+                nodetypeutils.node_type_name(current_name),
+                version.major,
+            )
+            parsed[(category, current_name)] = (key, version)
+            majors.setdefault(key, set()).add(version)
+
+        retained = set()
+        for key, versions in majors.items():
+            latest = sorted(versions, reverse=True)[: self.latest_per_major]
+            retained.update((key, version) for version in latest)
+
+        filtered = []
+        for entry in allowed:
+            if entry in parsed and parsed[entry] not in retained:
+                logger.debug(
+                    "Excluded by version retention: {name}".format(name=entry[1])
+                )
+                continue
+            filtered.append(entry)
+
+        return filtered
+
+    def filter_definitions(self, definitions):
+        """
+        Filter the given definitions, removing any versions excluded by the policy.
+
+        Args:
+            definitions(list(hou.HDADefinition)): The definitions to filter.
+
+        Returns:
+            (list(hou.HDADefinition)): The definitions that should be installed, in
+                their original order.
+        """
+        names = [
+            (definition.nodeTypeCategory().name(), definition.nodeTypeName())
+            for definition in definitions
+        ]
+        retained = set(self.filter_names(names))
+        return [
+            definition
+            for definition, name in zip(definitions, names)
+            if name in retained
+        ]
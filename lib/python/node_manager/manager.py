@@ -5,36 +5,57 @@
 import getpass
 import logging
 import os
+import threading
 import time
 
-from packaging.version import parse
-
+from concurrent.futures import Future
 from tempfile import mkdtemp
 
 import hou
 
+from node_manager import catalog
+from node_manager import classification
 from node_manager import config
+from node_manager import inventory
+from node_manager import releasejournal
 from node_manager import utils
 from node_manager.utils import (
     callbackutils,
     definitionutils,
     nodetypeutils,
     nodeutils,
+    pathutils,
     pluginutils,
 )
 
-if hou.isUIAvailable():
-    from hdefereval import do_work_in_background_thread
-else:
-    do_work_in_background_thread = None
-
 logger = logging.getLogger(__name__)
 
 
+# Node Manager load states.
+CREATED = "created"
+LOADING = "loading"
+READY = "ready"
+FAILED = "failed"
+
+# Release version increments, largest first.
+MAJOR = "major"
+MINOR = "minor"
+PATCH = "patch"
+RELEASE_INCREMENTS = (MAJOR, MINOR, PATCH)
+
+
 class NodeManager(object):
-    """Main Node Manager Class."""
+    """Main Node Manager Class.
+
+    There is a single instance per session, created by init(). It is loaded exactly
+    once, possibly in the background thread, and the ready future is resolved once
+    loading is complete. Until then the instance can be used by the plugins doing
+    the loading, but menus and callbacks should check is_ready() rather than read
+    the partially loaded repos.
+    """
 
     instance = None
+    _instance_lock = threading.Lock()
     config = config.node_manager_config
     publish_node = None
 
@@ -47,9 +68,11 @@ class NodeManager(object):
             (HDAManager): The HDAManager instance.
         """
         if cls.instance is None:
-            start = time.time()
-            cls.instance = cls()
-            cls.instance.stats["init"] = time.time() - start
+            with cls._instance_lock:
+                if cls.instance is None:
+                    start = time.time()
+                    cls.instance = cls()
+                    cls.instance.stats["init"] = time.time() - start
         return cls.instance
 
     def __init__(self):
@@ -65,25 +88,161 @@ class NodeManager(object):
         self.validate_plugin = self.config.get("validate_plugin")
         self.release_plugin = self.config.get("release_plugin")
 
+        self.classifications = classification.ClassificationCache(self)
+        self.catalog = None
+        self.inventory = inventory.SceneInventory(self)
+
         self.stats = {}
 
+        self.state = CREATED
+        self.ready = Future()
+        self._load_lock = threading.Lock()
+        self._retry_thread = None
+        # The failed releases found, with the state of the journals they were found in.
+        self._resumable_releases = None
+        # Held while a release is running, as the release plugin and its clone are
+        # shared by every release.
+        self._release_lock = threading.Lock()
+
+    def is_ready(self):
+        """
+        Has the Node Manager finished loading?
+
+        Returns:
+            (bool): Is the Node Manager ready to use.
+        """
+        return self.state == READY
+
+    def wait_until_ready(self, timeout=None):
+        """
+        Block until the Node Manager has finished loading.
+
+        Args:
+            timeout(:obj:`float`,optional): The number of seconds to wait.
+
+        Returns:
+            (NodeManager): The loaded Node Manager.
+
+        Raises:
+            concurrent.futures.TimeoutError: Loading didn't finish in time.
+            Exception: Any error raised while loading.
+        """
+        return self.ready.result(timeout=timeout)
+
+    def when_ready(self, callback, failed_callback=None):
+        """
+        Call the given function on the main thread once the Node Manager has loaded.
+
+        The function is called straight away if the Node Manager is already loaded,
+        and never if loading fails, when failed_callback is called instead.
+
+        Args:
+            callback(function): The function to call, taking no arguments.
+            failed_callback(:obj:`function`,optional): The function to call if loading
+                fails, taking no arguments.
+        """
+
+        def done(future):
+            if future.exception() is None:
+                function = callback
+            elif failed_callback:
+                function = failed_callback
+            else:
+                return
+            in_background = threading.current_thread() is not threading.main_thread()
+            if in_background and hou.isUIAvailable():
+                import hdefereval
+
+                hdefereval.executeDeferred(function)
+            else:
+                function()
+
+        self.ready.add_done_callback(done)
+
     def load(self):
-        """Load the Node Manager."""
-        self._plugins = pluginutils.import_plugins()
+        """Load the Node Manager.
+
+        Only the first call loads, any others made while it is loading or once it has
+        loaded return straight away. Use the returned future to wait for it.
+
+        Returns:
+            (concurrent.futures.Future): Resolved with the Node Manager once loaded.
+        """
+        with self._load_lock:
+            if self.state in (LOADING, READY):
+                logger.debug("Node Manager already {state}.".format(state=self.state))
+                return self.ready
+            if self.state == FAILED:
+                self.ready = Future()
+            self.state = LOADING
+
+        start = time.time()
+        try:
+            self._load()
+        except Exception as error:
+            logger.exception("Node Manager failed to load.")
+            self.state = FAILED
+            self.ready.set_exception(error)
+            raise
+
+        self.stats["load"] = time.time() - start
+        self.state = READY
+        self.ready.set_result(self)
+        logger.info("Node Manager ready.")
+        return self.ready
+
+    def _load(self):
+        """Discover the repos and load their definitions."""
+        # Only the selected plugins are imported, any others are imported on request.
+        self.plugins = pluginutils.PluginRegistry()
+        self.plugins.discover()
+        self.plugins.import_plugins(self.selected_plugins())
+        self.classifications.register_callbacks()
+        self.inventory.register_callbacks()
 
         self.context = {}
         self.context["manager_temp_dir"] = mkdtemp(prefix="node-manager-")
         self.context["manager_base_dir"] = self.get_base_dir()
+        self.context["manager_data_dir"] = self.get_data_dir()
         self.context["manager_edit_dir"] = self.get_edit_dir()
         self.context["manager_backup_dir"] = os.path.join(
             self.context.get("manager_edit_dir"), "backup"
         )
         self.context["manager_module_root"] = os.path.dirname(os.path.abspath(__file__))
+        self.context["manager_catalog_path"] = self.get_catalog_path()
+        self.catalog = catalog.NodeCatalog(self.context.get("manager_catalog_path"))
         self.releases = list()
         self.node_repos = self.initialise_repos()
         start = time.time()
         self.load_all()
         self.stats["load_hdas"] = time.time() - start
+        self.start_degraded_repo_retry()
+
+        # Create the plugins used by menu actions up front, so they start straight away.
+        # This is only a warm up, any that can't be created yet, eg. the release plugin
+        # without any repos, are created again when they're first used.
+        for plugin_type, name in self.selected_plugins():
+            if plugin_type not in ("edit", "validate", "release"):
+                continue
+            try:
+                self.plugins.get_instance(plugin_type, name)
+            except Exception as error:
+                logger.debug(
+                    "Couldn't create {plugin_type} plugin {name} yet: {error}".format(
+                        plugin_type=plugin_type, name=name, error=error
+                    )
+                )
+
+    def selected_plugins(self):
+        """Get the plugins selected by the config.
+
+        Returns:
+            list(tuple): The (plugin type, name) of each selected plugin.
+        """
+        return [
+            (plugin_type, getattr(self, plugin_type + "_plugin") or default)
+            for plugin_type, default in pluginutils.DEFAULT_PLUGINS.items()
+        ]
 
     def initialise_repos(self):
         """Initialise the NodeRepos.
@@ -115,6 +274,19 @@ class NodeManager(object):
             os.environ["NODE_MANAGER_BASE"] = self.context.get("manager_temp_dir")
         return base_dir
 
+    def get_data_dir(self):
+        """Get the directory the Node Manager keeps data in between sessions.
+
+        This can be set using the NODE_MANAGER_DATA env var, otherwise the
+        .node_manager directory in the user's home directory is used.
+
+        Returns:
+            str: The data directory for the Node Manager.
+        """
+        return os.getenv("NODE_MANAGER_DATA") or os.path.join(
+            os.path.expanduser("~"), ".node_manager"
+        )
+
     def get_edit_dir(self, create_on_disk=True):
         """Get the edit directory for the Node Manager.
 
@@ -132,6 +304,24 @@ class NodeManager(object):
             os.makedirs(edit_dir, exist_ok=True)
         return edit_dir
 
+    def get_catalog_path(self):
+        """Get the path to the Node Manager catalog.
+
+        This can be set using the catalog_path config option or the
+        NODE_MANAGER_CATALOG env var, otherwise it is stored in the data directory.
+
+        Returns:
+            str: The path to the Node Manager catalog.
+        """
+        catalog_path = self.config.get("catalog_path") or os.getenv(
+            "NODE_MANAGER_CATALOG"
+        )
+        if not catalog_path:
+            catalog_path = os.path.join(
+                self.context.get("manager_data_dir"), "catalog.db"
+            )
+        return catalog_path
+
     def git_dir(self):
         """Get the git directory for the Node Manager.
 
@@ -140,10 +330,109 @@ class NodeManager(object):
         """
         return os.path.join(self.context.get("manager_temp_dir"), "git")
 
+    def record_probe_results(self, probe_results):
+        """
+        Record the time taken to probe each repo path in the stats.
+
+        Args:
+            probe_results(list(pathutils.ProbeResult)): The probe results.
+        """
+        probe_stats = self.stats.setdefault("probe", {})
+        for probe_result in probe_results:
+            probe_stats[probe_result.path] = {
+                "reachable": probe_result.reachable,
+                "elapsed": probe_result.elapsed,
+                "error": probe_result.error,
+            }
+
+    def degraded_repos(self):
+        """
+        Get the repos that couldn't be reached.
+
+        Returns:
+            (list(NodeRepo)): The degraded repos.
+        """
+        return [
+            node_repo for node_repo in list(self.node_repos.values()) if node_repo.degraded
+        ]
+
+    def start_degraded_repo_retry(self):
+        """Start retrying any degraded repos in a background thread."""
+        if not self.degraded_repos():
+            return
+        if self._retry_thread and self._retry_thread.is_alive():
+            return
+
+        self._retry_thread = threading.Thread(
+            target=self._retry_degraded_repos,
+            name="NodeManagerRepoRetry",
+            daemon=True,
+        )
+        self._retry_thread.start()
+
+    def _retry_degraded_repos(self):
+        """Probe the degraded repos periodically, loading each once it is reachable."""
+        interval = self.config.get("repo_retry_interval", 30)
+        timeout = self.config.get("probe_timeout", pathutils.DEFAULT_PROBE_TIMEOUT)
+        while True:
+            degraded = self.degraded_repos()
+            if not degraded:
+                return
+
+            time.sleep(interval)
+            probe_results = pathutils.probe_paths(
+                [node_repo.context.get("repo_path") for node_repo in degraded],
+                timeout=timeout,
+            )
+            self.record_probe_results(probe_results)
+            for node_repo, probe_result in zip(degraded, probe_results):
+                if not probe_result.reachable:
+                    continue
+
+                logger.info(
+                    "Repo {name} is reachable again, loading.".format(
+                        name=node_repo.get_name()
+                    )
+                )
+                node_repo.degraded = False
+                if hou.isUIAvailable():
+                    import hdefereval
+
+                    hdefereval.executeDeferred(self.load_repo, node_repo)
+                else:
+                    self.load_repo(node_repo)
+
+    def load_repo(self, node_repo):
+        """
+        Load the definitions from a single repo.
+
+        If the repo can't be loaded it is marked as degraded again, so it is retried.
+
+        Args:
+            node_repo(NodeRepo): The repo to load.
+        """
+        try:
+            node_repo.initialise_repo()
+            node_repo.load_nodes()
+        except Exception:
+            logger.exception(
+                "Couldn't load repo {name}".format(name=node_repo.get_name())
+            )
+            node_repo.degraded = True
+            self.start_degraded_repo_retry()
+            return
+
+        self.classifications.invalidate()
+
     def load_all(self, force=False):
         """Load all node definitions from the repositories."""
         for repo_name in self.node_repos:
             node_repo = self.node_repos.get(repo_name)
+            if node_repo.degraded:
+                logger.warning(
+                    "Skipping unreachable repo {name}".format(name=repo_name)
+                )
+                continue
             node_repo.initialise_repo()
             node_repo.load_nodes(force=force)
 
@@ -158,12 +447,52 @@ class NodeManager(object):
                     oplibraries_file="Scanned Asset Library Directories",
                     force_use_assets=True,
                 )
+                self.classifications.invalidate()
                 logger.debug(
                     "Installed from Node Manager edit directory: {path}".format(
                         path=node_definition_path
                     )
                 )
 
+    def scan_hip_usage(self, root):
+        """
+        Report which of the loaded versions are used by the hip files in a directory.
+
+        The hip files are read without hou, but in this process rather than a
+        process pool. Forking Houdini, or starting its executable as a worker, isn't
+        safe. Use the hipscanner command line to scan with several processes.
+
+        Args:
+            root(str): The directory to search for hip files.
+
+        Returns:
+            (hipscanner.UsageReport): The version usage report.
+        """
+        from node_manager import hipscanner
+
+        versions = []
+        for node_repo in self.node_repos.values():
+            versions.extend(node_repo.version_records())
+
+        paths = hipscanner.find_hip_files(root)
+        logger.info(
+            "Scanning {count} hip files in {root}".format(count=len(paths), root=root)
+        )
+        return hipscanner.usage_report(
+            hipscanner.scan(paths, processes=1), versions
+        )
+
+    def classify(self, current_node):
+        """Get the cached classification for the given node.
+
+        Args:
+            current_node(hou.Node): The node to classify.
+
+        Returns:
+            (node_manager.classification.Classification): The node classification.
+        """
+        return self.classifications.classify(current_node)
+
     def is_node_manager_node(self, current_node, compare_path=True):
         """Check if the given node is a Node Manager node.
 
@@ -174,43 +503,65 @@ class NodeManager(object):
         Returns:
             (bool): Is the node a Node Manager node?
         """
+        definition = nodeutils.node_definition(current_node)
+
         # We can reject nodes straight away if they are not digital assets.
-        if not nodeutils.is_digital_asset(
-            current_node.path(),
+        if not nodeutils.is_digital_asset_definition(
+            definition,
             include_hidden=self.config.get("include_all_hdas", False)
         ):
             return False
 
-        definition = nodeutils.definition_from_node(current_node.path())
-        if not definition:
-            raise RuntimeError(
-                "Couldn't find definition for {node}".format(node=current_node)
-            )
+        return self.is_node_manager_definition(definition, compare_path=compare_path)
+
+    def is_node_manager_definition(self, definition, compare_path=True):
+        """Check if the given definition is a Node Manager definition.
 
+        Args:
+            definition(hou.HDADefinition): The definition to check.
+            compare_path(bool, optional): Should the definition path be used as an
+                additional check?
+
+        Returns:
+            (bool): Is the definition a Node Manager definition?
+        """
         nodetypeversion = self.nodetypeversion_from_definition(definition)
         logger.debug(
             "Nodetypeversion: {nodetypeversion}".format(nodetypeversion=nodetypeversion)
         )
         if not nodetypeversion:
-            logger.debug("{node} is not a Node Manager node.".format(node=current_node))
+            logger.debug(
+                "{name} is not a Node Manager node.".format(
+                    name=definition.nodeTypeName(),
+                )
+            )
             return False
 
         # If we are not comparing the library file path then we can consider this a match
         if not compare_path:
-            logger.debug("{node} is a Node Manager node.".format(node=current_node))
+            logger.debug(
+                "{name} is a Node Manager node.".format(name=definition.nodeTypeName())
+            )
             return True
 
         # Otherwise lets compare the definition paths on disk
+        library_path = definition.libraryFilePath()
         matched_definitions = [
             version
             for version in nodetypeversion
-            if version.definition.libraryFilePath() == definition.libraryFilePath()
+            if version.definition.libraryFilePath() == library_path
         ]
         if matched_definitions:
-            logger.debug("{node} is a Node Manager node.".format(node=current_node))
+            logger.debug(
+                "{name} is a Node Manager node.".format(name=definition.nodeTypeName())
+            )
             return True
         else:
-            logger.debug("{node} is not a Node Manager node.".format(node=current_node))
+            logger.debug(
+                "{name} is not a Node Manager node.".format(
+                    name=definition.nodeTypeName(),
+                )
+            )
             return False
 
     def nodetypeversion_from_definition(self, definition):
@@ -306,10 +657,10 @@ class NodeManager(object):
             node_manager.repo.NodeRepo: The HDA repo instance for the given path.
         """
         logger.debug("Checking if {path} is in a repo.".format(path=path))
-        for repo_name in self.node_repos:
-            repo = self.node_repos.get(repo_name)
+        for repo in list(self.node_repos.values()):
             logger.debug("Checking repo with path: {path}".format(path=repo.context))
-            if path.startswith(repo.context.get("repo_load_path")):
+            load_path = repo.context.get("repo_load_path")
+            if load_path and path.startswith(load_path):
                 return repo
         return None
 
@@ -343,13 +694,25 @@ class NodeManager(object):
         Returns:
             (bool): Is the definition at the latest version.
         """
-        definition = nodeutils.definition_from_node(current_node.path())
+        return self.is_latest_definition(nodeutils.node_definition(current_node))
+
+    def is_latest_definition(self, definition):
+        """
+        Check if the given definition is the latest version.
+
+        Args:
+            definition(hou.HDADefinition): The definition to check the version for.
 
+        Returns:
+            (bool): Is the definition at the latest version.
+        """
         # get all versions
         nodetype = self.nodetype_from_definition(definition)
 
         # If nodetype exists check that it is the latest version
         if nodetype:
+            from packaging.version import parse
+
             versions = [parse(version) for version in nodetype.all_versions().keys()]
             versions_sorted = sorted(versions, reverse=True)
             latest_version = versions_sorted[0]
@@ -364,6 +727,29 @@ class NodeManager(object):
 
         return True
 
+    def upgrade_nodes(self, nodes=None, dry_run=False, allow_major=False):
+        """
+        Upgrade nodes to the latest compatible version of their node type.
+
+        Args:
+            nodes(:obj:`list` of :obj:`hou.Node`,optional): The nodes to upgrade. If not
+                provided, all outdated nodes in the scene are upgraded.
+            dry_run(:obj:`bool`,optional): Only report the upgrades that would be made.
+            allow_major(:obj:`bool`,optional): Allow upgrades to a different major
+                version.
+
+        Returns:
+            (list(upgrade.UpgradeAction)): The upgrades made, or that would be made if
+                this is a dry run.
+        """
+        from node_manager import upgrade
+
+        actions = upgrade.plan_upgrades(self, nodes=nodes, allow_major=allow_major)
+        if dry_run or not actions:
+            return actions
+
+        return upgrade.apply_upgrades(self, actions)
+
     def get_release_version(self, definition, package_version):
         """
         Get the release version for the given definition.
@@ -376,6 +762,59 @@ class NodeManager(object):
         Returns:
             str: The release version.
 
+        Raises:
+            RuntimeError: Invalid version increment.
+        """
+        return self.increment_version(
+            package_version, self.release_increment(definition)
+        )
+
+    def get_batch_release_version(self, definitions, package_version):
+        """
+        Get the single release version for a batch of definitions released together.
+
+        The package version is incremented once, by the largest increment needed by
+        any of the definitions.
+
+        Args:
+            definitions(list(hou.HDADefinition)): The definitions being released.
+            package_version(str): The package version to use as a base.
+
+        Returns:
+            str: The release version.
+
+        Raises:
+            RuntimeError: Invalid version increment.
+        """
+        return self.increment_version(
+            package_version,
+            self.largest_increment(
+                [self.release_increment(definition) for definition in definitions]
+            ),
+        )
+
+    def largest_increment(self, increments):
+        """
+        Get the largest of the given version increments.
+
+        Args:
+            increments(list(str)): The increments, each one of RELEASE_INCREMENTS.
+
+        Returns:
+            str: The largest increment.
+        """
+        return min(increments, key=RELEASE_INCREMENTS.index)
+
+    def release_increment(self, definition):
+        """
+        Get the package version increment needed to release the given definition.
+
+        Args:
+            definition(hou.HDADefinition): The definition to get the increment for.
+
+        Returns:
+            str: The increment, one of RELEASE_INCREMENTS.
+
         Raises:
             RuntimeError: Invalid version increment.
         """
@@ -413,6 +852,35 @@ class NodeManager(object):
         if major + minor + patch != 1:
             raise RuntimeError("Invalid version increment.")
 
+        if major:
+            return MAJOR
+        if minor:
+            return MINOR
+        return PATCH
+
+    def increment_version(self, package_version, increment):
+        """
+        Increment the given package version.
+
+        Args:
+            package_version(str): The package version to increment.
+            increment(str): The increment, one of RELEASE_INCREMENTS.
+
+        Returns:
+            str: The incremented version.
+
+        Raises:
+            RuntimeError: Invalid version increment.
+        """
+        if increment not in RELEASE_INCREMENTS:
+            raise RuntimeError("Invalid version increment.")
+
+        patch = increment == PATCH
+        minor = increment == MINOR
+        major = increment == MAJOR
+
+        from packaging.version import parse
+
         release_version = None
         parsed_version = parse(package_version)
         if patch:
@@ -465,8 +933,9 @@ class NodeManager(object):
 
         edit_plugin.edit_definition(current_node, major=major, minor=minor)
 
-        # Force node callback to run
-        callbackutils.node_changed(nodeutils.node_at_path(path))
+        # Refresh every instance of the node type, re-resolving the node as changing
+        # its type replaces the hou.Node.
+        callbackutils.refresh_node_type(nodeutils.node_at_path(path).type())
 
     def discard_definition(self, current_node):
         """
@@ -483,13 +952,13 @@ class NodeManager(object):
             current_node.matchCurrentDefinition()
 
             # Uninstall the definition
-            definition = nodeutils.definition_from_node(current_node.path())
+            definition = nodeutils.node_definition(current_node)
             definitionutils.uninstall_definition(
                 definition, backup_dir=self.context.get("backup_dir")
             )
 
-            # Force node callback to run
-            callbackutils.node_changed(current_node)
+            # Refresh every instance of the node type
+            callbackutils.refresh_node_type(current_node.type())
         else:
             raise RuntimeError("Can't discard definition from NodeManager HDA repo.")
 
@@ -508,100 +977,455 @@ class NodeManager(object):
             logger.warning("Node is not ready to release.")
             return
 
-    def publish_definition(self, current_node):
-        path = current_node.path()
+    def prepare_batch_publish(self, current_nodes):
+        """
+        Validate several nodes and publish them together.
 
+        Args:
+            current_nodes(list(hou.Node)): The nodes we are attempting to publish from.
+        """
+        validate_plugin = pluginutils.get_validate_plugin(self.validate_plugin)
+        if not validate_plugin:
+            raise RuntimeError("Couldn't find Node Manager Validate Plugin.")
+
+        if not hasattr(validate_plugin, "validate_batch"):
+            utils.display_message(
+                "The {plugin} validate plugin can't validate several nodes at once, "
+                "please publish them one at a time.".format(plugin=validate_plugin.name),
+                title="Node Manager: Publish Nodes",
+            )
+            return
+
+        if not validate_plugin.validate_batch(current_nodes):
+            logger.warning("Nodes are not ready to release.")
+            return
+
+    def _read_release_comment(self, title):
+        """
+        Ask the user for a release comment.
+
+        Args:
+            title(str): The title of the input dialog.
+
+        Returns:
+            tuple(bool, str): Was the publish confirmed, and the comment entered.
+        """
         result = hou.ui.readInput(
             "Please enter a release comment for this node publish:",
             buttons=("Publish", "Cancel"),
-            title="Node Manager: Publish Node",
+            title=title,
         )
         if not result or result[0] == 1:
-            logger.info("HDA Release cancelled by user.")
-            return
+            return False, None
+
+        return True, result[1] or None
+
+    def publish_definition(self, current_node):
+        """
+        Publish the definition of the given node.
+
+        Args:
+            current_node(hou.Node): The node to publish the definition for.
+
+        Returns:
+            (concurrent.futures.Future): Resolved with the nodes whose definitions were
+                released, once the release has finished.
+        """
+        return self.publish_definitions(
+            [current_node], title="Node Manager: Publish Node"
+        )
+
+    def publish_definitions(self, current_nodes, title="Node Manager: Publish Nodes"):
+        """
+        Publish the definitions of several nodes together as a single release.
+
+        If the release plugin supports it, and the UI is available, the release runs
+        in the background with a progress dialog. Only capturing the definitions
+        before the release, and installing the released definitions after it, are
+        done on the main thread.
+
+        Args:
+            current_nodes(list(hou.Node)): The nodes to publish the definitions for.
+            title(:obj:`str`,optional): The title of the release dialogs.
+
+        Returns:
+            (concurrent.futures.Future): Resolved with the nodes whose definitions were
+                released, once the release has finished.
+        """
+        published = Future()
+        if not self._begin_release(title):
+            published.set_result([])
+            return published
+
+        started = False
+        try:
+            confirmed, release_comment = self._read_release_comment(title)
+            if not confirmed:
+                logger.info("HDA Release cancelled by user.")
+                published.set_result([])
+                return published
+
+            release_plugin = pluginutils.get_release_plugin(self.release_plugin)
+            if not release_plugin:
+                raise RuntimeError("Couldn't find Node Manager Release Plugin.")
+
+            if not self._release_in_background(release_plugin):
+                released = release_plugin.release_batch(
+                    current_nodes, release_comment=release_comment
+                )
+                self._release_finished(
+                    release_plugin, current_nodes, released, release_comment, title
+                )
+                published.set_result(released)
+                return published
 
-        release_comment = None
-        if result and result[1]:
-            release_comment = result[1]
+            release_plugin.prepare_release(
+                current_nodes, release_comment=release_comment
+            )
+            self._start_release(
+                release_plugin, current_nodes, release_comment, title, published
+            )
+            started = True
+        finally:
+            # A background release ends the release once it has finished.
+            if not started:
+                self._end_release()
+        return published
+
+    def resumable_releases(self):
+        """
+        Find the releases that failed and can be resumed.
+
+        The journals are only read again once one has been saved, or a release
+        directory added or removed, as this is checked by the node menus.
 
+        Returns:
+            (list(releasejournal.ReleaseJournal)): The journals of the failed releases,
+                oldest first.
+        """
         release_plugin = pluginutils.get_release_plugin(self.release_plugin)
-        if not release_plugin:
-            raise RuntimeError("Couldn't find Node Manager Release Plugin.")
+        if not release_plugin or not release_plugin.release_stages:
+            return []
+
+        release_root = release_plugin.release_dir()
+        state = (release_root, releasejournal.journals_state(release_root))
+        if not self._resumable_releases or self._resumable_releases[0] != state:
+            self._resumable_releases = (
+                state,
+                releasejournal.find_journals(
+                    release_root, status=releasejournal.FAILED
+                ),
+            )
+        return list(self._resumable_releases[1])
 
-        success = release_plugin.release(current_node, release_comment=release_comment)
+    def resume_release(self, path, title="Node Manager: Resume Release"):
+        """
+        Resume a release that failed, from the stage that failed.
 
-        if success:
-            # Get the old definition.
-            definition = nodeutils.definition_from_node(current_node.path())
+        The nodes being released are looked up in the current scene. Any that can't
+        be found are still released, but their editable definitions are left
+        installed.
 
-            # Force the newly released definition to be loaded
-            self.load_all(force=True)
-            callbackutils.node_changed(nodeutils.node_at_path(path))
+        Args:
+            path(str): The path to the release journal, or its release directory.
+            title(:obj:`str`,optional): The title of the release dialogs.
 
-            # Remove the editable definition
-            definitionutils.uninstall_definition(
-                definition, backup_dir=self.context.get("backup_dir")
+        Raises:
+            RuntimeError: The release can't be resumed.
+
+        Returns:
+            (concurrent.futures.Future): Resolved with the nodes whose definitions were
+                released, once the release has finished.
+        """
+        published = Future()
+        if not self._begin_release(title):
+            published.set_result([])
+            return published
+
+        started = False
+        try:
+            started = self._resume_release(path, title, published)
+        finally:
+            # A background release ends the release once it has finished.
+            if not started:
+                self._end_release()
+        return published
+
+    def _resume_release(self, path, title, published):
+        """
+        Resume a release that failed, once no other release is running.
+
+        Args:
+            path(str): The path to the release journal, or its release directory.
+            title(str): The title of the release dialogs.
+            published(concurrent.futures.Future): Resolved with the nodes whose
+                definitions were released, once the release has finished.
+
+        Raises:
+            RuntimeError: The release can't be resumed.
+
+        Returns:
+            (bool): True if the release was started in the background.
+        """
+        journal = releasejournal.ReleaseJournal.load(path)
+        if journal.status == releasejournal.COMPLETE:
+            raise RuntimeError(
+                "Release {path} has already completed.".format(path=journal.release_dir)
             )
 
-            # Success
-            utils.display_message(
-                "HDA release successful!", title="Node Manager: Publish HDA"
+        release_plugin = pluginutils.get_release_plugin(journal.data["plugin"])
+        if not release_plugin or not release_plugin.release_stages:
+            raise RuntimeError(
+                "Couldn't find Node Manager Release Plugin {name}.".format(
+                    name=journal.data["plugin"]
+                )
             )
-        else:
+        if journal.data["repo"] != release_plugin.repo.context.get("repo_name"):
+            raise RuntimeError(
+                "Release {path} was made to {repo}, not the release repo.".format(
+                    path=journal.release_dir, repo=journal.data["repo"]
+                )
+            )
+
+        release_plugin.resume_release(journal)
+        current_nodes = [
+            item.node for item in release_plugin.release_items if item.node
+        ]
+        release_comment = journal.data["comment"]
+
+        if not self._release_in_background(release_plugin):
+            from node_manager import releasejob
+
+            released = releasejob.ReleaseJob(release_plugin.run_release).run()
+            self._release_finished(
+                release_plugin, current_nodes, released, release_comment, title
+            )
+            published.set_result(released)
+            return False
+
+        self._start_release(
+            release_plugin, current_nodes, release_comment, title, published
+        )
+        return True
+
+    def _begin_release(self, title):
+        """
+        Start a release, unless another release is still running.
+
+        Args:
+            title(str): The title of the message shown if a release is running.
+
+        Returns:
+            (bool): True if the release can go ahead, in which case _end_release()
+                must be called once it has finished.
+        """
+        if self._release_lock.acquire(blocking=False):
+            return True
+
+        utils.display_message(
+            "Another release is still running, try again once it has finished.",
+            severity=hou.severityType.Warning,
+            title=title,
+        )
+        return False
+
+    def _end_release(self):
+        """Finish the running release, so another can be started."""
+        self._release_lock.release()
+
+    def _release_in_background(self, release_plugin):
+        """
+        Should releases with the given plugin run in the background?
+
+        Args:
+            release_plugin(object): The release plugin.
+
+        Returns:
+            (bool): True if the release should run in the background.
+        """
+        return bool(
+            hou.isUIAvailable()
+            and release_plugin.release_stages
+            and self.config.get("background_release", True)
+        )
+
+    def _start_release(
+        self, release_plugin, current_nodes, release_comment, title, published
+    ):
+        """
+        Run a prepared release in the background, showing its progress.
+
+        The release is ended once it has finished, and the result has been handled.
+
+        Args:
+            release_plugin(object): The release plugin to release with.
+            current_nodes(list(hou.Node)): The nodes being released.
+            release_comment(str): The release comment.
+            title(str): The title of the release dialogs.
+            published(concurrent.futures.Future): Resolved with the nodes whose
+                definitions were released, once the release has finished.
+        """
+        from node_manager import releasedialog
+        from node_manager import releasejob
+
+        def finished(job):
+            try:
+                released = job.future.result()
+            except releasejob.ReleaseCancelled:
+                logger.info("HDA Release cancelled by user.")
+                self._end_release()
+                published.set_result([])
+                return
+            except Exception as error:
+                self._end_release()
+                utils.display_message(
+                    "HDA release failed: {error}".format(error=error),
+                    severity=hou.severityType.Error,
+                    title=title,
+                )
+                published.set_exception(error)
+                return
+
+            try:
+                self._release_finished(
+                    release_plugin, current_nodes, released, release_comment, title
+                )
+            finally:
+                self._end_release()
+            published.set_result(released)
+
+        releasedialog.show(
+            releasejob.ReleaseJob(release_plugin.run_release),
+            title,
+            finished_callback=finished,
+        )
+
+    def _release_finished(
+        self, release_plugin, current_nodes, released, release_comment, title
+    ):
+        """
+        Finish a release on the main thread, reporting the result.
+
+        Args:
+            release_plugin(object): The release plugin used for the release.
+            current_nodes(list(hou.Node)): The nodes that were being released.
+            released(list(hou.Node)): The nodes whose definitions were released.
+            release_comment(str): The release comment.
+            title(str): The title of the result dialog.
+        """
+        # A staged release with nothing changed stops early, which isn't a failure.
+        journal = getattr(release_plugin, "journal", None)
+        if not released and journal and journal.data.get("changed") == []:
+            self._discard_unchanged(current_nodes)
+            utils.display_message("No changes to release.", title=title)
+            return
+
+        if not released:
             logger.warning("HDA release failed.")
+            return
 
+        if not journal:
+            self._finish_release(release_plugin, released, release_comment)
+        else:
+            with journal.stage(releasejournal.INSTALL):
+                self._finish_release(release_plugin, released, release_comment)
+            journal.complete()
+
+            # Record how long each stage took
+            self.catalog.record_release_stages(
+                journal.data["repo"],
+                journal.data.get("release_version"),
+                journal.timings(),
+            )
 
-def null_decorator(function):
-    """A decorator that does nothing.
+        # Success
+        if len(current_nodes) == 1:
+            message = "HDA release successful!"
+        else:
+            message = "Released {count} of {total} HDAs.".format(
+                count=len(released), total=len(current_nodes)
+            )
+        utils.display_message(message, title=title)
 
-    Args:
-        function(function): The function to decorate.
-    """
-    pass
+    def _discard_unchanged(self, current_nodes):
+        """
+        Switch nodes whose edited definitions match those released back to the
+        released definitions, as there was nothing to release.
 
+        Args:
+            current_nodes(list(hou.Node)): The nodes that were being released.
+        """
+        paths = [current_node.path() for current_node in current_nodes]
+        for current_node in current_nodes:
+            definitionutils.uninstall_definition(
+                nodeutils.node_definition(current_node),
+                backup_dir=self.context.get("backup_dir"),
+            )
 
-def deferred_decorator(callback_returning_decorator):
-    """Borrowing from SideFX: $HFS/houdini/python3.9libs/sas/localassets.py
-    This decorator defers another decorator from being called until the
-    decorated function is actually called.
+        # Refresh every instance of the node types
+        for path in paths:
+            callbackutils.refresh_node_type(nodeutils.node_at_path(path).type())
 
-    Args:
-        callback_returning_decorator(function): A function that returns the
-            decorator to be used to decorate the function.
+    def _finish_release(self, release_plugin, current_nodes, release_comment):
+        """
+        Switch the released nodes over to the newly released definitions.
 
-    Returns:
-        function: The decorated function.
-    """
-    # We can't use the nonlocal keyword until Python 3, so use a mutable
-    # object to let inner functions modify items local to the closure's
-    # scope.
-    if callback_returning_decorator() is None:
-        return null_decorator
+        The repos are loaded once for all of the released definitions.
 
-    closure_vars = {"decorated_function": None}
+        Args:
+            release_plugin(object): The release plugin used for the release.
+            current_nodes(list(hou.Node)): The nodes whose definitions were released.
+            release_comment(str): The release comment.
+        """
+        paths = [current_node.path() for current_node in current_nodes]
 
-    def new_decorator(function):
-        def wrapper(*args, **kwargs):
-            decorated_function = closure_vars["decorated_function"]
-            if decorated_function is None:
-                # This is the first time the decorated function has been
-                # called, so compute the actual decorated function and cache
-                # it.
-                decorator = callback_returning_decorator()
-                decorated_function = decorator(function)
-                closure_vars["decorated_function"] = decorated_function
+        # Get the old definitions.
+        definitions = [
+            nodeutils.node_definition(current_node) for current_node in current_nodes
+        ]
 
-            # Call the actual decorated function.
-            return decorated_function(*args, **kwargs)
+        # Record the releases in the catalog
+        for definition in definitions:
+            self.catalog.record_release(
+                self.get_release_repo().context.get("repo_name"),
+                definition.nodeTypeName(),
+                version=getattr(release_plugin, "release_version", None),
+                comment=release_comment,
+            )
 
-        return wrapper
+        # Force the newly released definitions to be loaded
+        self.load_all(force=True)
 
-    return new_decorator
+        # Remove the editable definitions
+        for definition in definitions:
+            definitionutils.uninstall_definition(
+                definition, backup_dir=self.context.get("backup_dir")
+            )
 
+        # Refresh every instance of the node types
+        for path in paths:
+            callbackutils.refresh_node_type(nodeutils.node_at_path(path).type())
 
-@deferred_decorator(lambda: do_work_in_background_thread)
-def initialise_in_background():
-    """Initialise the Node Manager in the Houdini background thread."""
+
+def background_thread_decorator():
+    """Get the decorator used to run a generator in the Houdini background thread.
+
+    hdefereval is only imported when background initialisation is used, as it is
+    only available with a UI.
+
+    Returns:
+        function: The decorator, or None if the UI isn't available.
+    """
+    if not hou.isUIAvailable():
+        return None
+
+    from hdefereval import do_work_in_background_thread
+
+    return do_work_in_background_thread
+
+
+def initialise_steps():
+    """Initialise the Node Manager, yielding between steps."""
     logger.debug("Beginning initialisation using background thread.")
     yield
     manager_instance = NodeManager.init()
@@ -610,6 +1434,11 @@ def initialise_in_background():
     logger.debug("Initialisation complete.")
 
 
+def initialise_in_background():
+    """Initialise the Node Manager in the Houdini background thread."""
+    background_thread_decorator()(initialise_steps)()
+
+
 def initialise_in_foreground():
     """Initialise the Node Manager in the Houdini main thread."""
     logger.debug("Beginning initialisation using main thread.")
@@ -620,13 +1449,13 @@ def initialise_in_foreground():
 def initialise_node_manager():
     """Initialise the Node Manager."""
     logger.debug("Initialising Node Manager.")
-    background = config.node_manager_config.get("background") and hou.isUIAvailable()
-    if background and not do_work_in_background_thread:
+    background = config.node_manager_config.get("background")
+    if background and not hou.isUIAvailable():
         logger.warning(
             "Attempted to use background thread but UI not available, "
             "reverting to main thread."
         )
-    if background and do_work_in_background_thread:
+    if background and hou.isUIAvailable():
         initialise_in_background()
     else:
         initialise_in_foreground()
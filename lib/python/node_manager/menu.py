@@ -5,11 +5,10 @@
 import logging
 import sys
 
-import hdefereval
+import hou
 
-from node_manager import config
 from node_manager import manager
-from node_manager.utils import nodeutils
+from node_manager import utils
 
 logger = logging.getLogger(__name__)
 
@@ -17,10 +16,25 @@ logger = logging.getLogger(__name__)
 def get_node_manager():
     """Find the NodeManager instance stored in the current session.
 
+    This never blocks or starts loading, so menus stay responsive while the Node
+    Manager loads in the background.
+
     Returns:
-        (HDAManager): The instance for the running Node manager.
+        (HDAManager): The instance for the running Node manager, or None if it hasn't
+            finished loading.
     """
-    return manager.NodeManager.init()
+    manager_instance = manager.NodeManager.instance
+    if manager_instance and manager_instance.is_ready():
+        return manager_instance
+    return None
+
+
+def display_loading_message():
+    """Let the user know the Node Manager is still loading."""
+    utils.display_message(
+        "The Node Manager is still loading, please try again shortly.",
+        title="Node Manager",
+    )
 
 
 def display_node_manager(current_node):
@@ -32,14 +46,12 @@ def display_node_manager(current_node):
     Returns:
         bool: Should the Node Manager menu be displayed?
     """
-    if nodeutils.is_digital_asset(
-        current_node.path(),
-        include_hidden=config.node_manager_config.get("include_all_hdas", False)
-    ):
-        return True
-    else:
+    man = get_node_manager()
+    if not man:
         return False
 
+    return man.classify(current_node).digital_asset
+
 
 def edit(current_node):
     """Edit edit of the selected node.
@@ -49,6 +61,9 @@ def edit(current_node):
     """
     logger.debug("Edit.")
     man = get_node_manager()
+    if not man:
+        display_loading_message()
+        return
     man.edit_definition(current_node)
 
 
@@ -62,9 +77,11 @@ def display_edit(current_node):
 
     """
     man = get_node_manager()
+    if not man:
+        return False
 
     # We only want to show the edit menu for nodes managed by the node manager
-    return man.is_node_manager_node(current_node)
+    return man.classify(current_node).managed
 
 
 def edit_major(current_node):
@@ -75,6 +92,9 @@ def edit_major(current_node):
     """
     logger.debug("Edit Major.")
     man = get_node_manager()
+    if not man:
+        display_loading_message()
+        return
     man.edit_definition(current_node, major=True)
 
 
@@ -85,6 +105,9 @@ def edit_minor(current_node):
         current_node(hou.Node): The node to edit."""
     logger.debug("Edit minor.")
     man = get_node_manager()
+    if not man:
+        display_loading_message()
+        return
     man.edit_definition(current_node, minor=True)
 
 
@@ -96,6 +119,9 @@ def discard(current_node):
     """
     logger.debug("Discard.")
     man = get_node_manager()
+    if not man:
+        display_loading_message()
+        return
     man.discard_definition(current_node)
 
 
@@ -109,9 +135,11 @@ def display_discard(current_node):
 
     """
     man = get_node_manager()
+    if not man:
+        return False
 
     # We only want to show the discard menu for nodes not managed by the node manager
-    return not man.is_node_manager_node(current_node)
+    return man.classify(current_node).editable
 
 
 def display_publish(current_node):
@@ -124,9 +152,11 @@ def display_publish(current_node):
         (bool): Should the publish menu be displayed?
     """
     man = get_node_manager()
+    if not man:
+        return False
 
     # We only want to show the publish menu for nodes not managed by the node manager
-    return not man.is_node_manager_node(current_node)
+    return man.classify(current_node).editable
 
 
 def prepare_publish(current_node):
@@ -136,9 +166,192 @@ def prepare_publish(current_node):
         current_node(hou.Node): The node to prepare for publishing.
     """
     man = get_node_manager()
+    if not man:
+        display_loading_message()
+        return
     man.prepare_publish(current_node)
 
 
+def editable_nodes(nodes, limit=None):
+    """Get one node for each editable definition used by the given nodes.
+
+    Each node type is only classified once, however many of the nodes use it.
+
+    Args:
+        nodes(list(hou.Node)): The nodes to check.
+        limit(:obj:`int`,optional): Stop once this many editable nodes are found.
+
+    Returns:
+        (list(hou.Node)): The first node found using each editable definition.
+    """
+    man = get_node_manager()
+    if not man:
+        return []
+
+    node_types = set()
+    editable = []
+    for current_node in nodes:
+        node_type = current_node.type()
+        if node_type in node_types:
+            continue
+        node_types.add(node_type)
+        if man.classify(current_node).editable:
+            editable.append(current_node)
+            if limit and len(editable) >= limit:
+                break
+    return editable
+
+
+def display_publish_selected(current_node):
+    """Should the publish selected menu be displayed for the given node.
+
+    Args:
+        current_node(hou.Node): The node to check.
+
+    Returns:
+        (bool): Should the publish selected menu be displayed?
+    """
+    # Only offered when more than one edited definition is selected.
+    return len(editable_nodes(hou.selectedNodes(), limit=2)) > 1
+
+
+def prepare_publish_selected(current_node):
+    """Prepare the selected nodes for publishing together in a single release.
+
+    Args:
+        current_node(hou.Node): The node the menu was opened for.
+    """
+    logger.debug("Publish selected.")
+    man = get_node_manager()
+    if not man:
+        display_loading_message()
+        return
+    man.prepare_batch_publish(
+        editable_nodes(list(hou.selectedNodes()) or [current_node])
+    )
+
+
+def resumable_release(current_node):
+    """Get the most recent failed release of the given node.
+
+    Args:
+        current_node(hou.Node): The node to check.
+
+    Returns:
+        (releasejournal.ReleaseJournal): The journal of the failed release, or None if
+            there isn't one.
+    """
+    man = get_node_manager()
+    if not man:
+        return None
+
+    for journal in reversed(man.resumable_releases()):
+        if any(
+            record.get("node_path") == current_node.path()
+            for record in journal.data["items"]
+        ):
+            return journal
+    return None
+
+
+def display_resume_release(current_node):
+    """Should the resume release menu be displayed for the given node.
+
+    Args:
+        current_node(hou.Node): The node to check.
+
+    Returns:
+        (bool): Should the resume release menu be displayed?
+    """
+    # Only offered for nodes with a release that failed part way through.
+    return display_publish(current_node) and bool(resumable_release(current_node))
+
+
+def resume_release(current_node):
+    """Resume the most recent failed release of the given node.
+
+    Args:
+        current_node(hou.Node): The node the menu was opened for.
+    """
+    logger.debug("Resume release.")
+    man = get_node_manager()
+    if not man:
+        display_loading_message()
+        return
+    journal = resumable_release(current_node)
+    if journal:
+        man.resume_release(journal.release_dir)
+
+
+def confirm_upgrade_nodes(nodes=None):
+    """Show the upgrades that would be made, and make them if the user confirms.
+
+    Args:
+        nodes(:obj:`list` of :obj:`hou.Node`,optional): The nodes to upgrade. If not
+            provided, all outdated nodes in the scene are upgraded.
+
+    Returns:
+        (list(upgrade.UpgradeAction)): The upgrades that were made.
+    """
+    from node_manager import upgrade
+
+    man = get_node_manager()
+    if not man:
+        display_loading_message()
+        return []
+    actions = man.upgrade_nodes(nodes=nodes, dry_run=True)
+    if not actions:
+        utils.display_message(
+            "All nodes are up to date.", title="Node Manager: Upgrade Nodes"
+        )
+        return []
+
+    choice = utils.display_message(
+        "Upgrade {count} nodes to the latest version?".format(count=len(actions)),
+        buttons=("Upgrade", "Cancel"),
+        close_choice=1,
+        title="Node Manager: Upgrade Nodes",
+        details=upgrade.format_report(actions),
+        details_label="Upgrades",
+    )
+    if choice != 0:
+        logger.info("Upgrade cancelled by user.")
+        return []
+
+    return upgrade.apply_upgrades(man, actions)
+
+
+def upgrade_nodes(current_node):
+    """Upgrade the selected nodes to the latest compatible version.
+
+    The selected nodes are upgraded, or the given node if nothing is selected.
+
+    Args:
+        current_node(hou.Node): The node the menu was opened for.
+    """
+    logger.debug("Upgrade.")
+    confirm_upgrade_nodes(nodes=list(hou.selectedNodes()) or [current_node])
+
+
+def display_upgrade_nodes(current_node):
+    """Should the upgrade menu be displayed for the given node.
+
+    Args:
+        current_node(hou.Node): The node to check.
+
+    Returns:
+        (bool): Should the upgrade menu be displayed?
+    """
+    man = get_node_manager()
+    if not man:
+        return False
+
+    classification = man.classify(current_node)
+
+    # We only want to show the upgrade menu for outdated nodes
+    return classification.managed and not classification.latest
+
+
 def menu_error(method_name):
     """Raise a menu error.
 
@@ -159,6 +372,8 @@ def run_menu_callback(method_name, node, **kwargs):
         method_name(str): The method name to call.
         node(hou.Node): The houdini node the menu callback was called from.
     """
+    import hdefereval
+
     current_module = sys.modules[__name__]
     if hasattr(current_module, method_name) and callable(
         getattr(current_module, method_name)
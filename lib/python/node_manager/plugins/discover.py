@@ -7,6 +7,7 @@ import os
 
 from node_manager import repo
 from node_manager import utils
+from node_manager.utils import pathutils
 
 
 logger = logging.getLogger(__name__)
@@ -40,13 +41,26 @@ class NodeManagerPlugin(object):
         """Initialise Node Repositories from the NODE_MANAGER_REPOS environment
         variable.
 
+        All of the repo paths are probed at the same time, and any that can't be
+        reached within the probe timeout are marked as degraded rather than loaded.
+
         Returns:
             list: A list of Node Manager Repo objects.
         """
+        repo_paths = self.get_repo_paths()
+        probe_results = pathutils.probe_paths(
+            repo_paths,
+            timeout=self.manager.config.get(
+                "probe_timeout", pathutils.DEFAULT_PROBE_TIMEOUT
+            ),
+        )
+        self.manager.record_probe_results(probe_results)
+
         node_repos = {}
-        for path in self.get_repo_paths():
+        for path, probe_result in zip(repo_paths, probe_results):
             # Create the repository object
             node_repo = repo.NodeRepo(self.manager, path)
+            node_repo.degraded = not probe_result.reachable
             name = node_repo.get_name()
 
             # Add to repositories list
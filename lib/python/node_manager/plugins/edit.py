@@ -5,8 +5,6 @@
 import logging
 import os
 
-from packaging.version import parse
-
 import hou
 
 from node_manager import utils
@@ -43,7 +41,7 @@ class NodeManagerPlugin(object):
                 minor=minor,
             )
         )
-        definition = nodeutils.definition_from_node(current_node.path())
+        definition = nodeutils.node_definition(current_node)
 
         dialog_message = (
             "You are about to edit a hda that is not the lastest version, do "
@@ -58,6 +56,8 @@ class NodeManagerPlugin(object):
 
         new_version = None
         if major or minor:
+            from packaging.version import parse
+
             logger.debug("Major or Minor version updated for editable node.")
             current_version = utils.node_type_version(definition.nodeTypeName())
             logger.debug("Current version is {version}".format(version=current_version))
@@ -135,3 +135,4 @@ class NodeManagerPlugin(object):
         if not repo:
             logger.debug("Unistalling {path}".format(path=definition_path))
             hou.hda.uninstallFile(definition.libraryFilePath())
+            definitionutils.invalidate_classifications()
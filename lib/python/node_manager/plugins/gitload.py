@@ -2,6 +2,7 @@
 
 """Git Load plugin that will load node defintions stored in a Git repository."""
 
+import concurrent.futures
 import logging
 import os
 import subprocess
@@ -12,10 +13,15 @@ from git import Repo
 from git.exc import NoSuchPathError, InvalidGitRepositoryError
 
 from node_manager.plugins import load
+from node_manager.utils import gitutils
 
 logger = logging.getLogger(__name__)
 
 
+# The paths checked out to build the HDAs from.
+SPARSE_PATHS = ["config", "dcc/houdini/hda"]
+
+
 class NodeManagerPlugin(load.NodeManagerPlugin):
     name = "GitLoad"
 
@@ -77,6 +83,10 @@ class NodeManagerPlugin(load.NodeManagerPlugin):
     def clone_repo(self):
         """Clone the Node Manager repository.
 
+        The repo is cloned without file contents, and only the paths HDAs are built
+        from are checked out. An existing clone is updated by fetching and fast
+        forwarding main.
+
         Returns:
             git.Repo: The cloned repository.
         """
@@ -84,7 +94,7 @@ class NodeManagerPlugin(load.NodeManagerPlugin):
         repo_root = self.repo.context.get("git_repo_clone")
         try:
             cloned_repo = Repo(repo_root)
-            cloned_repo.git.pull()
+            gitutils.fast_forward(cloned_repo)
             logger.debug("Loaded repo from {path}".format(path=repo_root))
         except (NoSuchPathError, InvalidGitRepositoryError) as error:
             logger.debug("Couldn't load repo from {path}".format(path=repo_root))
@@ -98,14 +108,48 @@ class NodeManagerPlugin(load.NodeManagerPlugin):
             if not os.path.isdir(repo_root):
                 os.makedirs(repo_root)
                 logger.debug("Created repo directory: {path}".format(path=repo_root))
-            cloned_repo = Repo.clone_from(
-                self.repo.context.get("repo_path"), repo_root, depth=1
+            cloned_repo = gitutils.partial_clone(
+                self.repo.context.get("repo_path"), repo_root, sparse_paths=SPARSE_PATHS
             )
 
         return cloned_repo
 
-    def build_repo(self):
-        """Build the Node Manager repository."""
+    def build_hda(self, source_path, hda_path, compile_hda=False):
+        """Build a single HDA from its expanded source using hotl.
+
+        Args:
+            source_path(str): The path to the expanded HDA.
+            hda_path(str): The path to write the HDA to.
+            compile_hda(:obj:`bool`,optional): Build a non-commercial HDA.
+
+        Returns:
+            str: The path to the built HDA.
+
+        Raises:
+            RuntimeError: The HDA failed to build.
+        """
+        logger.info("Processing {source}".format(source=source_path))
+        hotl_cmd = [
+            "hotl",
+            "-c" if compile_hda else "-l",  # Maybe we should error-check this?
+            source_path,
+            hda_path,
+        ]
+        result = subprocess.call(hotl_cmd)
+        if result != 0:
+            raise RuntimeError(
+                "Failed to build HDA: {hda}".format(hda=os.path.basename(source_path))
+            )
+        return hda_path
+
+    def iter_build_repo(self):
+        """Build the Node Manager repository, yielding each HDA as it is built.
+
+        The HDAs are built in parallel, limited by the build_workers config option.
+
+        Yields:
+            str: The path to each built HDA, in the order they finish building.
+        """
         repo_root = self.repo.context.get("git_repo_clone")
         repo_build = self.repo.context.get("repo_load_path")
         if not os.path.exists(repo_build):
@@ -121,21 +165,43 @@ class NodeManagerPlugin(load.NodeManagerPlugin):
             )
             return
 
-        for hda in os.listdir(expanded_hda_dir):
-            path = os.path.join(expanded_hda_dir, hda)
-            hda_path = os.path.join(repo_build, hda)
-            logger.info("Processing {source}".format(source=path))
-            hotl_cmd = [
-                "hotl",
-                "-c"
-                if hou.isApprentice()
-                else "-l",  # Maybe we should error-check this?
-                path,
-                hda_path,
+        compile_hda = hou.isApprentice()
+        workers = self.manager.config.get("build_workers") or os.cpu_count() or 1
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            builds = [
+                executor.submit(
+                    self.build_hda,
+                    os.path.join(expanded_hda_dir, hda),
+                    os.path.join(repo_build, hda),
+                    compile_hda=compile_hda,
+                )
+                for hda in sorted(os.listdir(expanded_hda_dir))
             ]
-            result = subprocess.call(hotl_cmd)
-            if result != 0:
-                raise RuntimeError("Failed to build HDA: {hda}".format(hda=hda))
+            try:
+                for build in concurrent.futures.as_completed(builds):
+                    yield build.result()
+            finally:
+                for build in builds:
+                    build.cancel()
+
+    def build_repo(self):
+        """Build the Node Manager repository."""
+        for _ in self.iter_build_repo():
+            pass
+
+    def load_iter(self):
+        """Load the Node Manager repository, yielding each definition file once built.
+
+        The repo is cloned before the first file is yielded, so the repo config is
+        available by then.
+
+        Yields:
+            str: The path to each node definition file.
+        """
+        self.repo.context["git_repo"] = self.clone_repo()
+        for hda_path in self.iter_build_repo():
+            if os.path.splitext(hda_path)[1] in self.extensions:
+                yield hda_path
 
     def load(self):
         """Load the Node Manager repository."""
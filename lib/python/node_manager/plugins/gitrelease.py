@@ -2,18 +2,18 @@
 
 """Git Release Plugin that will release a node definition in expaned form to Git source control."""
 
+import collections
+import functools
 import json
 import logging
 import os
 import re
-import shutil
-import subprocess
-import time
 
 import hou
 
-from node_manager import utils
-from node_manager.utils import nodetypeutils
+from node_manager import releasejob
+from node_manager import releasejournal
+from node_manager.utils import gitutils
 from node_manager.plugins import release
 
 plugin_name = "GitRelease"
@@ -32,12 +32,21 @@ class NodeManagerPlugin(release.NodeManagerPlugin):
     name = plugin_name
     plugin_type = plugin_class
 
+    release_stages = (
+        releasejournal.CAPTURE,
+        releasejournal.EXPAND,
+        releasejournal.STAGE,
+        releasejournal.COMMIT,
+        releasejournal.PUSH,
+        releasejournal.VERIFY,
+        releasejournal.INSTALL,
+    )
+
     def __init__(self):
         """Initialise the GitRelease plugin."""
         super(NodeManagerPlugin, self).__init__()
 
         self._release_dir = None
-        self._node_type_name = None
         self.node_name = None
 
         logger.debug("Initialise Release.")
@@ -53,15 +62,6 @@ class NodeManagerPlugin(release.NodeManagerPlugin):
             return self.repo.context.get("repo_name")
         return None
 
-    def release_dir(self):
-        """
-        Get the path to the HDA edit release directory.
-
-        Returns:
-            (str): The release directory.
-        """
-        return os.path.join(self.repo.context.get("git_repo_root"), "release")
-
     def _git_repo(self):
         """Get the git repository.
 
@@ -79,14 +79,18 @@ class NodeManagerPlugin(release.NodeManagerPlugin):
         """
         return self.repo.context.get("git_repo_clone")
 
-    def _expand_dir(self):
+    def _expand_dir(self, node_name=None):
         """
         Get the path where the HDA will be expanded.
 
+        Args:
+            node_name(:obj:`str`,optional): The expanded HDA name, defaults to the node
+                being released.
+
         Returns:
             (str): The HDA expand directory.
         """
-        return os.path.join(self._release_dir, self.node_name)
+        return os.path.join(self._release_dir, node_name or self.node_name)
 
     def _node_root(self):
         """Get the path to the node root.
@@ -96,14 +100,18 @@ class NodeManagerPlugin(release.NodeManagerPlugin):
         """
         return os.path.join(self._git_dir(), "dcc", "houdini", "hda")
 
-    def _node_path(self):
+    def _node_path(self, node_name=None):
         """
         Get the path to the node to be released.
 
+        Args:
+            node_name(:obj:`str`,optional): The expanded HDA name, defaults to the node
+                being released.
+
         Returns:
             (str): The node path.
         """
-        return os.path.join(self._node_root(), self.node_name)
+        return os.path.join(self._node_root(), node_name or self.node_name)
 
     def _config_path(self):
         """Get the path to the config file.
@@ -123,26 +131,70 @@ class NodeManagerPlugin(release.NodeManagerPlugin):
             comment(str, optional): The comment to use for the release.
 
         Returns:
-            (str): The path of the released HDA.
+            (bool): True if the release was successful, None if there were no changes.
+        """
+        self.create_journal(
+            [self.capture_definition(definition)],
+            branch,
+            comment,
+            apprentice=hou.isApprentice(),
+        )
+        releasejob.ReleaseJob(self.run_release).run()
+        if self.journal.data.get("changed"):
+            return True
+        return None
 
-        Raises:
-            RuntimeError: The rez package released wasn't successful.
+    def abandon_release(self):
+        """Remove the local release branch and tag, if the release wasn't pushed."""
+        gitutils.abandon_release(
+            self._git_repo(), self.journal.data["branch"], tag=self.release_version
+        )
+
+    def _run_stage(self, job):
         """
-        config_path = self._config_path()
+        Write the changed files of each expanded HDA to a new local release branch.
 
-        # Create the branch
-        current = self._git_repo().create_head(branch)
-        current.checkout()
+        The expanded HDAs are compared with the tracked files before the repo is
+        touched, and the release is stopped if none of them have changed.
 
-        # # Check if expanded node directory already exists, delete it if it does
-        hda_path = self._node_path()
-        if os.path.exists(hda_path):
-            shutil.rmtree(hda_path)
-            logger.debug(
-                "Removed directory already exists, removing: {path}".format(
-                    path=hda_path
-                )
+        Args:
+            job(releasejob.ReleaseJob): The job running the release.
+        """
+        journal = self.journal
+        config_path = self._config_path()
+
+        # Start from the latest main, removing anything left by an earlier attempt.
+        gitutils.abandon_release(
+            self._git_repo(), journal.data["branch"], tag=self.release_version
+        )
+        gitutils.update_main(self._git_repo())
+        gitutils.clean_tree(self._git_repo(), self._node_root())
+        self.release_version = None
+        self.check_conflicts()
+
+        changes = collections.OrderedDict()
+        for item in self.release_items:
+            hda_changes = gitutils.tree_changes(
+                self._git_repo(),
+                self._expand_dir(item.node_name),
+                self._node_path(item.node_name),
             )
+            if hda_changes.changed or hda_changes.removed:
+                changes[item.node_name] = (item, hda_changes)
+            else:
+                logger.debug(
+                    "No changes have been made to {hda}, skipping.".format(
+                        hda=item.node_name
+                    )
+                )
+
+        journal.data["changed"] = list(changes)
+        if not changes:
+            return
+
+        # Create the local release branch
+        current = self._git_repo().create_head(journal.data["branch"])
+        current.checkout()
 
         repo_conf_data = {}
         if os.path.isfile(config_path):
@@ -154,53 +206,116 @@ class NodeManagerPlugin(release.NodeManagerPlugin):
             )
 
         # Get the release version
-        self.release_version = self.manager.get_release_version(
-            definition, repo_conf_data.get("version", "0.0.0")
+        self.release_version = self.manager.increment_version(
+            repo_conf_data.get("version", "0.0.0"),
+            self.manager.largest_increment(
+                [item.increment for item, _ in changes.values()]
+            ),
         )
+        journal.data["release_version"] = self.release_version
 
-        # Copy the expanaded HDA into it's correct location
-        shutil.copytree(self._expand_dir(), hda_path)
+        # Write only the changed files into each HDA's location
+        for node_name, (_, hda_changes) in changes.items():
+            gitutils.sync_tree(
+                self._expand_dir(node_name), self._node_path(node_name), hda_changes
+            )
 
-        # See if anything was updated
-        changes = [change.a_path for change in self._git_repo().index.diff(None)]
-        if not changes and not self._git_repo().untracked_files:
-            logger.debug("No changes have been made to this HDA, aborting.")
-            return None
+    def check_conflicts(self):
+        """
+        Check none of the HDAs being released have been released by someone else
+        since this release was first staged, so their changes aren't overwritten.
 
-        # Add and commit
+        Raises:
+            RuntimeError: A HDA being released has been changed on main.
+        """
+        journal = self.journal
+        if not journal.data.get("base"):
+            journal.data["base"] = gitutils.head_commit(self._git_repo())
+            return
+
+        conflicts = gitutils.changed_paths(
+            self._git_repo(),
+            journal.data["base"],
+            [
+                os.path.relpath(
+                    self._node_path(item.node_name), self._git_dir()
+                ).replace(os.sep, "/")
+                for item in self.release_items
+            ],
+        )
+        if conflicts:
+            raise RuntimeError(
+                "HDAs being released have been changed since the release started: "
+                "{paths}".format(paths=", ".join(conflicts))
+            )
+
+    def _run_commit(self, job):
+        """
+        Commit the staged HDAs and the version up, and tag the release.
+
+        Nothing is pushed until the release is finalised.
+
+        Args:
+            job(releasejob.ReleaseJob): The job running the release.
+        """
+        config_path = self._config_path()
+        logger.info("Committing {version}".format(version=self.release_version))
         self._git_repo().git.add(A=True)
-        self._git_repo().git.commit(m=comment)
-        self._git_repo().git.push("--set-upstream", "origin", current)
+        self._git_repo().git.commit(m=self.journal.data["comment"])
 
         # Increment version in config
+        repo_conf_data = {}
+        if os.path.isfile(config_path):
+            with open(config_path, "r") as repo_conf:
+                repo_conf_data = json.load(repo_conf)
         repo_conf_data["version"] = self.release_version
         os.makedirs(os.path.dirname(config_path), exist_ok=True)
         with open(config_path, "w") as repo_conf:
             json.dump(repo_conf_data, repo_conf)
 
-        # Commit and push
+        # Commit and tag
         self._git_repo().git.add(A=True)
         self._git_repo().git.commit(config_path, m="Version up")
-        self._git_repo().git.push()
-
-        # Push tag to repo
-        new_tag = self._git_repo().create_tag(
+        self._git_repo().create_tag(
             self.release_version,
             message="Release {version}".format(version=self.release_version),
         )
-        self._git_repo().remotes.origin.push(new_tag)
 
-        # merge to master
-        self._git_repo().git.reset("--hard")
-        main = self._git_repo().heads.main
-        main.checkout()
-        self._git_repo().git.pull()
-        self._git_repo().git.merge(current, "--no-ff")
-        self._git_repo().git.push()
+    def _run_push(self, job):
+        """
+        Merge the release branch to main, then push main and the tag together.
+
+        If another release is pushed first, the release is staged again on top of it,
+        with a new version, and the push retried.
+
+        Args:
+            job(releasejob.ReleaseJob): The job running the release.
+
+        Raises:
+            RuntimeError: The push was rejected, or kept being beaten by others.
+        """
+        logger.info("Pushing {version}".format(version=self.release_version))
+        self.release_version = gitutils.push_release(
+            self._git_repo(),
+            self.journal.data["branch"],
+            self.release_version,
+            functools.partial(self.restage_release, job),
+            retries=self.manager.config.get(
+                "release_retries", gitutils.RELEASE_RETRIES
+            ),
+        )
+
+    def _run_verify(self, job):
+        """
+        Check the release tag has reached the remote.
 
-        # remove release branch
-        remote = self._git_repo().remote(name="origin")
-        remote.push(refspec=(":{branch}".format(branch=branch)))
+        Args:
+            job(releasejob.ReleaseJob): The job running the release.
+
+        Raises:
+            RuntimeError: The tag isn't on the remote.
+        """
+        gitutils.verify_tag(self._git_repo(), self.release_version)
 
         # clean up release dir
         # shutil.rmtree(self._release_dir)
@@ -209,9 +324,11 @@ class NodeManagerPlugin(release.NodeManagerPlugin):
         )
 
         # success
-        logger.info("Release successful for {hda}.".format(hda=self.node_name))
-
-        return True
+        logger.info(
+            "Release successful for {hdas}.".format(
+                hdas=", ".join(sorted(self.journal.data["changed"]))
+            )
+        )
 
     def release(self, current_node, release_comment=None):
         """
@@ -227,50 +344,4 @@ class NodeManagerPlugin(release.NodeManagerPlugin):
         Returns:
             bool: Was the release successful.
         """
-        logger.info("Beginning HDA release.")
-
-        # Get the release definitionq
-        definition = self.get_release_definition(current_node)
-
-        node_file_path = definition.libraryFilePath()
-        if not release_comment:
-            release_comment = "Updated {name}".format(
-                name=nodetypeutils.node_type_name(node_file_path)
-            )
-
-        # Define the release directory
-        release_subdir = "release_{time}".format(time=int(time.time()))
-        full_release_dir = os.path.join(self.release_dir(), release_subdir)
-
-        # Expand the HDA ready for release
-        hda_name = utils.expanded_hda_name(definition)
-        expand_dir = os.path.join(full_release_dir, hda_name)
-
-        # expandToDirectory doesn't allow inclusion of contents - raise with SideFx, but
-        # reverting to subprocess.
-        cmd = [
-            "hotl",
-            "-x" if hou.isApprentice() else "-tp",  # Maybe we should error-check this?
-            expand_dir,
-            definition.libraryFilePath(),
-        ]
-        process = subprocess.Popen(cmd)
-        process.wait()
-
-        # verify release
-        if process.returncode != 0:
-            # Non-zero return code
-            raise RuntimeError("HDA expansion didn't complete successfully.")
-
-        # Determine the other information needed to conduct a release
-        node_type_name = definition.nodeTypeName()
-        branch = utils.release_branch_name(definition)
-        package = self.package_name()
-        if not package:
-            raise RuntimeError("No package found for definition")
-
-        self._release_dir = full_release_dir
-        self._node_type_name = node_type_name
-        self.node_name = hda_name
-
-        return self.process_release(definition, branch, comment=release_comment)
+        return bool(self.release_batch([current_node], release_comment=release_comment))
@@ -2,9 +2,17 @@
 
 """Default Release Plugin that will release a node definition to a directory on disk."""
 
+import collections
+import concurrent.futures
 import logging
 import os
+import shutil
+import time
 
+import hou
+
+from node_manager import releasejob
+from node_manager import releasejournal
 from node_manager import utils
 from node_manager.utils import definitionutils
 from node_manager.utils import nodeutils
@@ -20,16 +28,75 @@ logger = logging.getLogger(
 )
 
 
+# A definition captured on the main thread, ready to be released in the background.
+ReleaseItem = collections.namedtuple(
+    "ReleaseItem", ["node", "definition", "library_path", "node_name", "increment"]
+)
+
+
+def item_record(item):
+    """
+    Get a record of the given release item that can be saved in a release journal.
+
+    Args:
+        item(ReleaseItem): The release item.
+
+    Returns:
+        (dict): The release item record.
+    """
+    return {
+        "node_path": item.node.path() if item.node else None,
+        "library_path": item.library_path,
+        "node_name": item.node_name,
+        "increment": item.increment,
+    }
+
+
+def item_from_record(record):
+    """
+    Get the release item for the given record from a release journal.
+
+    This looks up the node in the current scene, so must be run on the main thread.
+
+    Args:
+        record(dict): The release item record.
+
+    Returns:
+        (ReleaseItem): The release item, without a node if it's not in the scene.
+    """
+    current_node = hou.node(record["node_path"]) if record.get("node_path") else None
+    return ReleaseItem(
+        node=current_node,
+        definition=None,
+        library_path=record["library_path"],
+        node_name=record["node_name"],
+        increment=record["increment"],
+    )
+
+
 class NodeManagerPlugin(object):
-    """Default Release Plugin."""
+    """Default Release Plugin.
+
+    Plugins that set release_stages release in stages, recorded in a journal in the
+    release directory. prepare_release() captures the release on the main thread,
+    and run_release() runs each stage in turn, calling the plugin's _run_<stage>
+    method, without using hou. The install stage is run by the Node Manager on the
+    main thread once the rest have completed. A release that fails can be resumed
+    with resume_release().
+    """
 
     name = plugin_name
     plugin_type = plugin_class
 
+    # The stages of a staged release, from releasejournal.STAGES.
+    release_stages = ()
+
     def __init__(self):
         """Initialise the DefaultRelease plugin."""
         self.manager = utils.get_manager()
         self.repo = self.manager.get_release_repo()
+        self.journal = None
+        self.release_items = []
         logger.debug("Initialise Release.")
 
     def get_release_definition(self, current_node):
@@ -41,10 +108,321 @@ class NodeManagerPlugin(object):
         Returns:
             hou.HDADefinition: The release definition.
         """
-        definition = nodeutils.definition_from_node(current_node.path())
+        definition = nodeutils.node_definition(current_node)
         definition.updateFromNode(current_node)
         return definition
 
+    def release_dir(self):
+        """
+        Get the path to the HDA edit release directory.
+
+        Releases are kept in the data directory, by repo, rather than with the clone
+        in the session's temporary directory, so a failed release can still be
+        resumed after Houdini is restarted.
+
+        Returns:
+            (str): The release directory.
+        """
+        return os.path.join(
+            self.manager.context.get("manager_data_dir"),
+            "releases",
+            self.repo.context.get("repo_name"),
+        )
+
+    def capture_release(self, current_nodes):
+        """Capture the definitions of the given nodes ready to be released.
+
+        Everything the release needs from hou is read here, so this must be run on
+        the main thread, but the release itself can then run in the background.
+
+        Args:
+            current_nodes(list(hou.Node)): The nodes to release the definitions for.
+
+        Returns:
+            list(ReleaseItem): The captured release of each node.
+        """
+        return [
+            self.capture_definition(
+                self.get_release_definition(current_node), current_node=current_node
+            )
+            for current_node in current_nodes
+        ]
+
+    def capture_definition(self, definition, current_node=None):
+        """Capture the given definition ready to be released.
+
+        Args:
+            definition(hou.HDADefinition): The definition to release.
+            current_node(:obj:`hou.Node`,optional): The node being released.
+
+        Returns:
+            ReleaseItem: The captured release.
+        """
+        return ReleaseItem(
+            node=current_node,
+            definition=definition,
+            library_path=definition.libraryFilePath(),
+            node_name=utils.expanded_hda_name(definition),
+            increment=self.manager.release_increment(definition),
+        )
+
+    def expand_definitions(self, items, release_dir, apprentice=False):
+        """Expand the given definitions into the release directory at the same time.
+
+        Only hotl is run, so this can be used outside the main thread. The number of
+        expansions run at once is limited by the build_workers config option.
+
+        Args:
+            items(list(ReleaseItem)): The captured definitions to expand.
+            release_dir(str): The directory to expand the definitions into.
+            apprentice(:obj:`bool`,optional): Is this a non-commercial session?
+
+        Raises:
+            RuntimeError: A HDA couldn't be expanded.
+        """
+        workers = self.manager.config.get("build_workers") or os.cpu_count() or 1
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=max(1, min(workers, len(items)))
+        ) as executor:
+            expansions = [
+                executor.submit(
+                    utils.expand_hda,
+                    item.library_path,
+                    os.path.join(release_dir, item.node_name),
+                    apprentice=apprentice,
+                )
+                for item in items
+            ]
+            for expansion in expansions:
+                expansion.result()
+
+    def release_batch(self, current_nodes, release_comment=None):
+        """Publish the definitions of several nodes being edited by the Node manager.
+
+        Staged releases release the definitions together, otherwise they are
+        released one at a time.
+
+        Args:
+            current_nodes(list(hou.Node)): The nodes to publish the definitions for.
+            release_comment(str, optional): The comment to use for the release.
+
+        Returns:
+            list(hou.Node): The nodes whose definitions were released.
+        """
+        if self.release_stages:
+            self.prepare_release(current_nodes, release_comment=release_comment)
+            return releasejob.ReleaseJob(self.run_release).run()
+
+        return [
+            current_node
+            for current_node in current_nodes
+            if self.release(current_node, release_comment=release_comment)
+        ]
+
+    def prepare_release(self, current_nodes, release_comment=None):
+        """Capture everything needed from hou to release the given nodes.
+
+        This must be run on the main thread, before run_release(). A journal for the
+        release is created in a new release directory.
+
+        Args:
+            current_nodes(list(hou.Node)): The nodes to publish the definitions for.
+            release_comment(str, optional): The comment to use for the release.
+
+        Raises:
+            RuntimeError: The package couldn't be found.
+        """
+        logger.info("Beginning HDA release.")
+        start = time.time()
+
+        # Get the release definitions
+        items = self.capture_release(current_nodes)
+
+        if not release_comment:
+            release_comment = "Updated {names}".format(
+                names=", ".join(
+                    nodetypeutils.node_type_name(item.library_path) for item in items
+                )
+            )
+
+        # Determine the other information needed to conduct a release
+        if len(items) == 1:
+            branch = utils.release_branch_name(items[0].definition)
+        else:
+            branch = utils.batch_release_branch_name(
+                [item.definition for item in items]
+            )
+        self.create_journal(items, branch, release_comment, hou.isApprentice())
+        self.journal.record_stage(releasejournal.CAPTURE, time.time() - start)
+
+    def create_journal(self, items, branch, comment, apprentice=False):
+        """Start a new release of the given captured definitions.
+
+        Args:
+            items(list(ReleaseItem)): The captured definitions to release.
+            branch(str): The name of the branch to release to.
+            comment(str): The comment to use for the release.
+            apprentice(:obj:`bool`,optional): Is this a non-commercial session?
+
+        Raises:
+            RuntimeError: The package couldn't be found.
+
+        Returns:
+            releasejournal.ReleaseJournal: The journal of the release.
+        """
+        package = self.package_name()
+        if not package:
+            raise RuntimeError("No package found for definition")
+        logger.debug("Using package: {package}".format(package=package))
+
+        # Define the release directory, keeping any earlier release made this second
+        release_subdir = "release_{time}".format(time=int(time.time()))
+        full_release_dir = os.path.join(self.release_dir(), release_subdir)
+        index = 1
+        while os.path.exists(full_release_dir):
+            full_release_dir = os.path.join(
+                self.release_dir(),
+                "{subdir}_{index}".format(subdir=release_subdir, index=index),
+            )
+            index += 1
+
+        self.journal = releasejournal.ReleaseJournal.create(
+            full_release_dir,
+            plugin=self.name,
+            repo=self.repo.context.get("repo_name"),
+            branch=branch,
+            package=package,
+            comment=comment,
+            apprentice=apprentice,
+            items=[item_record(item) for item in items],
+        )
+        self._release_dir = self.journal.release_dir
+        self.release_items = items
+        self.node_name = items[0].node_name
+        self.release_version = None
+        return self.journal
+
+    def resume_release(self, journal):
+        """Get ready to resume a release that failed.
+
+        This must be run on the main thread, before run_release(), as the nodes
+        being released are looked up in the current scene.
+
+        Args:
+            journal(releasejournal.ReleaseJournal): The journal of the release.
+        """
+        logger.info(
+            "Resuming HDA release from {path}.".format(path=journal.release_dir)
+        )
+        self.journal = journal
+        self._release_dir = journal.release_dir
+        self.release_items = [
+            item_from_record(record) for record in journal.data["items"]
+        ]
+        self.node_name = self.release_items[0].node_name
+        self.release_version = journal.data.get("release_version")
+
+    def run_release(self, job):
+        """Run the stages of the release prepared or resumed, that haven't completed.
+
+        This doesn't use hou, so can be run in the background.
+
+        Args:
+            job(releasejob.ReleaseJob): The job running the release.
+
+        The release can be cancelled until it has been pushed, after which it is
+        left to finish.
+
+        Raises:
+            RuntimeError: A stage of the release failed.
+            releasejob.ReleaseCancelled: The release was cancelled.
+
+        Returns:
+            list(hou.Node): The nodes whose definitions were released.
+        """
+        journal = self.journal
+
+        # Capturing and installing use hou, so are run on the main thread.
+        stages = [
+            stage
+            for stage in self.release_stages
+            if stage not in (releasejournal.CAPTURE, releasejournal.INSTALL)
+        ]
+
+        resume_stage = journal.resume_stage(stages)
+        if resume_stage:
+            journal.reset_from(resume_stage, stages)
+
+        for stage in stages:
+            if journal.completed(stage):
+                continue
+
+            if not journal.completed(releasejournal.PUSH) and job.cancelled():
+                self.abandon_release()
+                journal.cancel()
+                job.check_cancelled()
+
+            job.report(
+                float(self.release_stages.index(stage)) / len(self.release_stages),
+                stage.capitalize(),
+            )
+            with journal.stage(stage):
+                getattr(self, "_run_{stage}".format(stage=stage))(job)
+
+            if journal.data.get("changed") == []:
+                logger.info("No changes have been made to these HDAs, aborting.")
+                journal.complete()
+                break
+
+        changed = journal.data.get("changed") or []
+        return [
+            item.node
+            for item in self.release_items
+            if item.node_name in changed and item.node
+        ]
+
+    def restage_release(self, job):
+        """Stage and commit the release again, on top of whatever has been released
+        since it was first staged.
+
+        Args:
+            job(releasejob.ReleaseJob): The job running the release.
+
+        Returns:
+            str: The new release version, or None if there is nothing to release.
+        """
+        self._run_stage(job)
+        if not self.journal.data["changed"]:
+            return None
+        self._run_commit(job)
+        self.journal.save()
+        return self.release_version
+
+    def abandon_release(self):
+        """Undo anything a staged release has done that hasn't been pushed."""
+
+    def _run_expand(self, job):
+        """Expand the captured definitions into the release directory.
+
+        Args:
+            job(releasejob.ReleaseJob): The job running the release.
+
+        Raises:
+            RuntimeError: A HDA couldn't be expanded.
+        """
+        # Remove anything left by an earlier attempt, so only the new files remain.
+        for item in self.release_items:
+            expand_dir = os.path.join(self._release_dir, item.node_name)
+            if os.path.isdir(expand_dir):
+                shutil.rmtree(expand_dir)
+
+        logger.info("Expanding {count} HDAs".format(count=len(self.release_items)))
+        self.expand_definitions(
+            self.release_items,
+            self._release_dir,
+            apprentice=self.journal.data.get("apprentice", False),
+        )
+
     def release(self, current_node, release_comment=None):
         """Initialise Node Repositories from the NODE_MANAGER_REPOS environment
         variable.
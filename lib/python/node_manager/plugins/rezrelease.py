@@ -2,13 +2,13 @@
 
 """Rez release Plugin that will release a node definition to Git source control, releasing as a rez package."""
 
-import json
+import collections
+import functools
 import logging
 import os
 import re
 import shutil
 import subprocess
-import time
 from tempfile import mkstemp
 
 from git import Repo
@@ -16,8 +16,9 @@ from git.exc import NoSuchPathError, InvalidGitRepositoryError
 
 import hou
 
-from node_manager import utils
-from node_manager.utils import nodetypeutils
+from node_manager import releasejob
+from node_manager import releasejournal
+from node_manager.utils import gitutils
 from node_manager.plugins import release
 
 plugin_name = "RezRelease"
@@ -36,6 +37,8 @@ class NodeManagerPlugin(release.NodeManagerPlugin):
     name = plugin_name
     plugin_type = plugin_class
 
+    release_stages = releasejournal.STAGES
+
     def __init__(self):
         """Initialise the RezRelease plugin."""
         super(NodeManagerPlugin, self).__init__()
@@ -61,16 +64,6 @@ class NodeManagerPlugin(release.NodeManagerPlugin):
             return name.split(".")[0]
         return None
 
-    def release_dir(self):
-        """
-        Get the path to the HDA edit release directory.
-
-        Returns:
-            (str): The release directory.
-        """
-        logger.debug(self.repo.context)
-        return os.path.join(self.repo.context.get("git_repo_root"), "release")
-
     def _git_repo(self):
         """Get the git repository.
 
@@ -88,14 +81,18 @@ class NodeManagerPlugin(release.NodeManagerPlugin):
         """
         return self.repo.context.get("git_repo_clone")
 
-    def _expand_dir(self):
+    def _expand_dir(self, node_name=None):
         """
         Get the path where the HDA will be expanded.
 
+        Args:
+            node_name(:obj:`str`,optional): The expanded HDA name, defaults to the node
+                being released.
+
         Returns:
             (str): The HDA expand directory.
         """
-        return os.path.join(self._release_dir, self.node_name)
+        return os.path.join(self._release_dir, node_name or self.node_name)
 
     def _node_root(self):
         """Get the path to the node root.
@@ -105,14 +102,29 @@ class NodeManagerPlugin(release.NodeManagerPlugin):
         """
         return os.path.join(self._git_dir(), "dcc", "houdini", "hda")
 
-    def _node_path(self):
+    def _node_path(self, node_name=None):
         """
         Get the path to the node to be released.
 
+        Args:
+            node_name(:obj:`str`,optional): The expanded HDA name, defaults to the node
+                being released.
+
         Returns:
             (str): The node path.
         """
-        return os.path.join(self._node_root(), self.node_name)
+        return os.path.join(self._node_root(), node_name or self.node_name)
+
+    def _relative_path(self, path):
+        """Get the given path relative to the git repository.
+
+        Args:
+            path(str): The path in the git repository.
+
+        Returns:
+            (str): The "/" separated path relative to the repository root.
+        """
+        return os.path.relpath(path, self._git_dir()).replace(os.sep, "/")
 
     def _config_path(self):
         """Get the path to the config file.
@@ -169,15 +181,23 @@ class NodeManagerPlugin(release.NodeManagerPlugin):
             raise RuntimeError("The release version hasn't yet been set.")
         return os.path.join(self.manager.config.get("rez_packages_root"), self.manager.config.get("rez_package_name"), self.release_version)
 
-    def release_hda_path(self):
+    def release_hda_path(self, node_name=None):
         """
         Get the path the HDA will be released to.
 
+        Args:
+            node_name(:obj:`str`,optional): The expanded HDA name, defaults to the node
+                being released.
+
         Returns:
             (str): The path on disk where the HDA will be released.
         """
         return os.path.join(
-            self.release_package_path(), "dcc", "houdini", "hda", self.node_name
+            self.release_package_path(),
+            "dcc",
+            "houdini",
+            "hda",
+            node_name or self.node_name,
         )
 
     def process_release(self, definition, branch, package_name, comment=None):
@@ -191,56 +211,139 @@ class NodeManagerPlugin(release.NodeManagerPlugin):
             comment(str, optional): The comment to use for the release.
 
         Returns:
-            (str): The path of the released HDA.
+            (bool): True if the release was successful, None if there were no changes.
 
         Raises:
             RuntimeError: The rez package released wasn't successful.
         """
-        config_path = self._config_path()
+        self.create_journal(
+            [self.capture_definition(definition)],
+            branch,
+            comment,
+            apprentice=hou.isApprentice(),
+        )
+        self.journal.data["package"] = package_name
+        releasejob.ReleaseJob(self.run_release).run()
+        if self.journal.data.get("changed"):
+            return True
+        return None
 
-        # Create the branch
-        current = self._git_repo().create_head(branch)
-        current.checkout()
+    def abandon_release(self):
+        """Remove the local release branch and tag, if the release wasn't pushed."""
+        gitutils.abandon_release(
+            self._git_repo(), self.journal.data["branch"], tag=self.release_version
+        )
 
-        # Check if expanded node directory already exists, delete it if it does
-        hda_path = self._node_path()
-        if os.path.exists(hda_path):
-            shutil.rmtree(hda_path)
-            logger.debug(
-                "Removed directory already exists, removing: {path}".format(
-                    path=hda_path
-                )
-            )
+    def _run_stage(self, job):
+        """
+        Write the changed files of each expanded HDA to a new local release branch.
 
-        repo_conf_data = {}
-        if os.path.isfile(config_path):
-            with open(config_path, "r") as repo_conf:
-                repo_conf_data = json.load(repo_conf)
-        else:
-            logger.warning(
-                "No config found at {path}, skipping.".format(path=config_path)
+        The expanded HDAs are compared with the tracked files before the repo is
+        touched, and the release is stopped if none of them have changed.
+
+        Args:
+            job(releasejob.ReleaseJob): The job running the release.
+
+        Raises:
+            RuntimeError: The package version couldn't be found.
+        """
+        journal = self.journal
+
+        # Start from the latest main, removing anything left by an earlier attempt.
+        gitutils.abandon_release(
+            self._git_repo(), journal.data["branch"], tag=self.release_version
+        )
+        gitutils.update_main(self._git_repo())
+        gitutils.sparse_checkout(
+            self._git_repo(),
+            [
+                self._relative_path(self._node_path(item.node_name))
+                for item in self.release_items
+            ],
+        )
+        gitutils.clean_tree(self._git_repo(), self._node_root())
+        self.release_version = None
+        self.check_conflicts()
+
+        changes = collections.OrderedDict()
+        for item in self.release_items:
+            hda_changes = gitutils.tree_changes(
+                self._git_repo(),
+                self._expand_dir(item.node_name),
+                self._node_path(item.node_name),
             )
+            if hda_changes.changed or hda_changes.removed:
+                changes[item.node_name] = (item, hda_changes)
+            else:
+                logger.debug(
+                    "No changes have been made to {hda}, skipping.".format(
+                        hda=item.node_name
+                    )
+                )
 
-        package_version = self.version_from_package()
+        journal.data["changed"] = list(changes)
+        if not changes:
+            return
+
+        # Create the local release branch
+        current = self._git_repo().create_head(journal.data["branch"])
+        current.checkout()
 
         # Get the release version
-        self.release_version = self.manager.get_release_version(
-            definition, package_version
+        self.release_version = self.manager.increment_version(
+            self.version_from_package(),
+            self.manager.largest_increment(
+                [item.increment for item, _ in changes.values()]
+            ),
+        )
+        journal.data["release_version"] = self.release_version
+
+        # Write only the changed files into each HDA's location
+        for node_name, (_, hda_changes) in changes.items():
+            gitutils.sync_tree(
+                self._expand_dir(node_name), self._node_path(node_name), hda_changes
+            )
+
+    def check_conflicts(self):
+        """
+        Check none of the HDAs being released have been released by someone else
+        since this release was first staged, so their changes aren't overwritten.
+
+        Raises:
+            RuntimeError: A HDA being released has been changed on main.
+        """
+        journal = self.journal
+        if not journal.data.get("base"):
+            journal.data["base"] = gitutils.head_commit(self._git_repo())
+            return
+
+        conflicts = gitutils.changed_paths(
+            self._git_repo(),
+            journal.data["base"],
+            [
+                self._relative_path(self._node_path(item.node_name))
+                for item in self.release_items
+            ],
         )
+        if conflicts:
+            raise RuntimeError(
+                "HDAs being released have been changed since the release started: "
+                "{paths}".format(paths=", ".join(conflicts))
+            )
 
-        # Copy the expanaded HDA into it's correct location
-        shutil.copytree(self._expand_dir(), hda_path)
+    def _run_commit(self, job):
+        """
+        Commit the staged HDAs and the package version up, and tag the release.
 
-        # See if anything was updated
-        changes = [change.a_path for change in self._git_repo().index.diff(None)]
-        if not changes and not self._git_repo().untracked_files:
-            logger.debug("No changes have been made to this HDA, aborting.")
-            return None
+        Nothing is pushed until the release is finalised.
 
-        # Add and commit
+        Args:
+            job(releasejob.ReleaseJob): The job running the release.
+        """
+        package_name = self.journal.data["package"]
+        logger.info("Committing {version}".format(version=self.release_version))
         self._git_repo().git.add(A=True)
-        self._git_repo().git.commit(m=comment)
-        self._git_repo().git.push("--set-upstream", "origin", current)
+        self._git_repo().git.commit(m=self.journal.data["comment"])
 
         # Up the package version
         fh, abs_path = mkstemp()
@@ -282,64 +385,130 @@ class NodeManagerPlugin(release.NodeManagerPlugin):
             os.remove(self.package_py_path())
         shutil.move(abs_path, self.package_py_path())
 
-        # Commit and push
+        # Commit and tag
         self._git_repo().git.add(A=True)
         self._git_repo().git.commit(self.package_py_path(), m="Version up")
-        self._git_repo().git.push()
-
-        # Push tag to repo
-        new_tag = self._git_repo().create_tag(
+        self._git_repo().create_tag(
             self.release_version,
             message="Release {version}".format(version=self.release_version),
         )
-        self._git_repo().remotes.origin.push(new_tag)
 
-        # rez-release
-        subprocess_env = os.environ.copy()
-        logger.debug("rez-release starting")
-        process = subprocess.Popen(
-            ["rez-release", "--skip-repo-errors"],
-            cwd=self._git_dir(),
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            env=subprocess_env,
+    def _run_push(self, job):
+        """
+        Merge the release branch to main, then push main and the tag together.
+
+        The package is released from the pushed tag afterwards, so if rez-release
+        fails the release can be resumed without pushing again. The commit tagged is
+        recorded, so the tag can be restored if it has to be withdrawn.
+
+        If another release is pushed first, the release is staged again on top of it,
+        with a new version, and the push retried.
+
+        Args:
+            job(releasejob.ReleaseJob): The job running the release.
+
+        Raises:
+            RuntimeError: The push was rejected, or kept being beaten by others.
+        """
+        logger.info("Pushing {version}".format(version=self.release_version))
+        self.release_version = gitutils.push_release(
+            self._git_repo(),
+            self.journal.data["branch"],
+            self.release_version,
+            functools.partial(self.restage_release, job),
+            retries=self.manager.config.get(
+                "release_retries", gitutils.RELEASE_RETRIES
+            ),
         )
-        process.wait()
+        if self.release_version:
+            self.journal.data["release_commit"] = gitutils.head_commit(
+                self._git_repo(), "{tag}^{{commit}}".format(tag=self.release_version)
+            )
 
-        # verify release
-        if process.returncode != 0:
-            # Non-zero return code
-            try:
-                _stdout = process.stdout.read()
-                _stderr = process.stderr.read()
-            except Exception as e:
-                _stdout = ""
-                _stderr = str(e)
-            raise RuntimeError(
-                "rez-release didn't complete successfully: {} :: {} :: {}".format(
-                    process.returncode, _stdout, _stderr
+    def _run_package(self, job):
+        """
+        Release the rez package from the release tag.
+
+        If the package can't be released, the tag is withdrawn from the remote, so
+        the version isn't seen as released without a package. It's pushed again
+        once the release is resumed and the package released.
+
+        Args:
+            job(releasejob.ReleaseJob): The job running the release.
+
+        Raises:
+            RuntimeError: The rez package released wasn't successful.
+        """
+        logger.info(
+            "Releasing {package} {version}".format(
+                package=self.journal.data["package"], version=self.release_version
+            )
+        )
+
+        # The clone may be new if the release is resumed in another session.
+        gitutils.fetch_tag(
+            self._git_repo(),
+            self.release_version,
+            commit=self.journal.data.get("release_commit"),
+        )
+
+        # Release exactly what was tagged, even if main has moved on since. Every
+        # HDA in the package is built, so the whole tree is checked out.
+        try:
+            with gitutils.full_checkout(self._git_repo()):
+                self._git_repo().git.checkout(self.release_version)
+                try:
+                    self.run_rez_release()
+                finally:
+                    self._git_repo().git.checkout("main")
+        except Exception:
+            self.withdraw_release()
+            raise
+
+        logger.debug("rez-release complete")
+
+        if not gitutils.tag_pushed(self._git_repo(), self.release_version):
+            self._git_repo().git.push("origin", gitutils.tag_ref(self.release_version))
+            logger.info(
+                "Pushed {version} again now it has been released.".format(
+                    version=self.release_version
                 )
             )
-        release_path = self.release_hda_path()
-        if not os.path.isfile(release_path):
-            raise RuntimeError(
-                "Error when verifying the release, expected to find released hda at: "
-                "{path}".format(path=release_path)
+
+    def withdraw_release(self):
+        """
+        Withdraw the release tag from the remote, after the package failed to release.
+        """
+        try:
+            if gitutils.tag_pushed(self._git_repo(), self.release_version):
+                gitutils.withdraw_tag(self._git_repo(), self.release_version)
+        except Exception:
+            logger.exception(
+                "Couldn't withdraw {version}, it's tagged without a package.".format(
+                    version=self.release_version
+                )
             )
 
-        logger.debug("rez-release complete")
+    def _run_verify(self, job):
+        """
+        Check the released package contains every changed HDA, and the release tag
+        has reached the remote.
 
-        # merge to master
-        self._git_repo().git.reset("--hard")
-        main = self._git_repo().heads.main
-        main.checkout()
-        self._git_repo().git.pull()
-        self._git_repo().git.merge(current, "--no-ff")
-        self._git_repo().git.push()
+        Args:
+            job(releasejob.ReleaseJob): The job running the release.
 
-        # remove release branch
-        remote = self._git_repo().remote(name="origin")
-        remote.push(refspec=(":{branch}".format(branch=branch)))
+        Raises:
+            RuntimeError: A HDA or the tag is missing from the release.
+        """
+        changed = self.journal.data["changed"]
+        for node_name in changed:
+            release_path = self.release_hda_path(node_name)
+            if not os.path.isfile(release_path):
+                raise RuntimeError(
+                    "Error when verifying the release, expected to find released hda "
+                    "at: {path}".format(path=release_path)
+                )
+        gitutils.verify_tag(self._git_repo(), self.release_version)
 
         # clean up release dir
         logger.debug(
@@ -347,9 +516,44 @@ class NodeManagerPlugin(release.NodeManagerPlugin):
         )
 
         # success
-        logger.info("Release successful for {hda}.".format(hda=self.node_name))
+        logger.info(
+            "Release successful for {hdas}.".format(hdas=", ".join(sorted(changed)))
+        )
 
-        return True
+    def run_rez_release(self):
+        """
+        Release the rez package from the clone, logging its output as it runs.
+
+        Raises:
+            RuntimeError: The rez package released wasn't successful.
+        """
+        subprocess_env = os.environ.copy()
+        logger.debug("rez-release starting")
+        process = subprocess.Popen(
+            ["rez-release", "--skip-repo-errors"],
+            cwd=self._git_dir(),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            env=subprocess_env,
+            universal_newlines=True,
+        )
+
+        # Read the output as it is written, so it can be streamed to the logs, and
+        # the process never blocks on a full pipe.
+        output = []
+        for line in process.stdout:
+            output.append(line)
+            logger.info(line.rstrip())
+        process.wait()
+
+        # verify release
+        if process.returncode != 0:
+            # Non-zero return code
+            raise RuntimeError(
+                "rez-release didn't complete successfully: {} :: {}".format(
+                    process.returncode, "".join(output[-20:])
+                )
+            )
 
     def git_repo_root(self):
         """Get the git repo root directory.
@@ -372,14 +576,17 @@ class NodeManagerPlugin(release.NodeManagerPlugin):
     def clone_repo(self):
         """Clone the Node Manager repository.
 
+        Only package.py and the config are checked out to begin with, and each HDA
+        is added to the checkout when it's released.
+
         Returns:
             git.Repo: The cloned repository.
         """
         cloned_repo = None
         repo_root = self.repo.context.get("git_repo_clone")
         try:
+            # Releases fetch the latest main when they're staged.
             cloned_repo = Repo(repo_root)
-            cloned_repo.git.pull()
             logger.debug("Loaded repo from {path}".format(path=repo_root))
         except (NoSuchPathError, InvalidGitRepositoryError) as error:
             logger.debug("Couldn't load repo from {path}".format(path=repo_root))
@@ -393,8 +600,8 @@ class NodeManagerPlugin(release.NodeManagerPlugin):
             if not os.path.isdir(repo_root):
                 os.makedirs(repo_root)
                 logger.debug("Created repo directory: {path}".format(path=repo_root))
-            cloned_repo = Repo.clone_from(
-                self.repo.config.get("repo_url"), repo_root, depth=1
+            cloned_repo = gitutils.partial_clone(
+                self.repo.config.get("repo_url"), repo_root, sparse_paths=["config"]
             )
 
         return cloned_repo
@@ -413,62 +620,38 @@ class NodeManagerPlugin(release.NodeManagerPlugin):
         Returns:
             bool: Was the release successful.
         """
-        logger.info("Beginning HDA release.")
-
-        if not self.repo.context.get("git_repo"):
-            self.repo.context["git_repo"] = self.clone_repo()
-
-        # Get the release definitionq
-        definition = self.get_release_definition(current_node)
+        return bool(self.release_batch([current_node], release_comment=release_comment))
 
-        node_file_path = definition.libraryFilePath()
-        if not release_comment:
-            release_comment = "Updated {name}".format(
-                name=nodetypeutils.node_type_name(node_file_path)
-            )
+    def run_release(self, job):
+        """
+        Run the stages of the release that haven't completed, cloning the repo first
+        if needed.
 
-        # Define the release directory
-        release_subdir = "release_{time}".format(time=int(time.time()))
-        full_release_dir = os.path.join(self.release_dir(), release_subdir)
-
-        # Expand the HDA ready for release
-        hda_name = utils.expanded_hda_name(definition)
-        expand_dir = os.path.join(full_release_dir, hda_name)
-
-        # expandToDirectory doesn't allow inclusion of contents - raise with SideFx, but
-        # reverting to subprocess.
-        cmd = [
-            "hotl",
-            "-x" if hou.isApprentice() else "-tp",  # Maybe we should error-check this?
-            expand_dir,
-            definition.libraryFilePath(),
-        ]
-        process = subprocess.Popen(cmd)
-        process.wait()
+        This doesn't use hou, so can be run in the background.
 
-        # verify release
-        if process.returncode != 0:
-            # Non-zero return code
-            raise RuntimeError("HDA expansion didn't complete successfully.")
+        Args:
+            job(releasejob.ReleaseJob): The job running the release.
 
-        # Determine the other information needed to conduct a release
-        node_type_name = definition.nodeTypeName()
-        branch = utils.release_branch_name(definition)
-        package = self.package_name()
-        if not package:
-            raise RuntimeError("No package found for definition")
-        logger.debug("Using package: {package}".format(package=package))
+        Raises:
+            RuntimeError: A stage of the release failed.
+            releasejob.ReleaseCancelled: The release was cancelled before it was pushed.
 
-        self._release_dir = full_release_dir
-        self._node_type_name = node_type_name
-        self.node_name = hda_name
+        Returns:
+            list(hou.Node): The nodes whose definitions were released.
+        """
+        if not self.repo.context.get("git_repo"):
+            job.report(
+                0.0, "Cloning {repo}".format(repo=self.repo.context.get("repo_name"))
+            )
+            self.repo.context["git_repo"] = self.clone_repo()
 
-        self.process_release(definition, branch, package, comment=release_comment)
+        released = super(NodeManagerPlugin, self).run_release(job)
 
-        # Update the repo path so that we can load the new HDA
-        self.repo.context["repo_path"] = self.release_package_path()
+        # Update the repo path so that we can load the new HDAs
+        if self.journal.data.get("changed"):
+            self.repo.context["repo_path"] = self.release_package_path()
 
-        return True
+        return released
 
     def package_py_path(self):
         """
@@ -31,17 +31,54 @@ class NodeManagerPlugin(object):
         Returns:
             bool: True if the node is ready to release.
         """
+        if not self.is_valid(current_node):
+            return False
+
+        logger.info("Node is ready to release.")
+
+        # Run the publish
+        self.manager.publish_definition(current_node)
+        return True
+
+    def validate_batch(self, current_nodes):
+        """Validate several nodes, publishing them together if they are all valid.
+
+        Args:
+            current_nodes(list(hou.Node)): The nodes to validate.
+
+        Returns:
+            bool: True if the nodes are ready to release.
+        """
+        if not all([self.is_valid(current_node) for current_node in current_nodes]):
+            return False
+
+        logger.info("Nodes are ready to release.")
+
+        # Run the publish
+        self.manager.publish_definitions(current_nodes)
+        return True
+
+    def is_valid(self, current_node):
+        """Check the node can be released.
+
+        Args:
+            current_node(hou.Node): The node to check.
+
+        Returns:
+            bool: True if the node can be released.
+        """
         # Is the node a digital asset?
-        if not nodeutils.is_digital_asset(current_node.path()):
-            logger.warning("Node is not a digital asset.")
+        if not nodeutils.node_is_digital_asset(current_node):
+            logger.warning(
+                "Node is not a digital asset: {path}".format(path=current_node.path())
+            )
             return False
 
         # Is the node definition saved?
         if current_node.isEditable():
-            logger.warning("Node definition is not saved.")
+            logger.warning(
+                "Node definition is not saved: {path}".format(path=current_node.path())
+            )
             return False
 
-        logger.info("Node is ready to release.")
-
-        # Run the publish
-        self.manager.publish_definition(current_node)
+        return True
@@ -5,6 +5,7 @@
 import pyblish.api
 
 from node_manager import config
+from node_manager import inventory
 from node_manager import utils
 from node_manager.utils import nodeutils
 
@@ -28,13 +29,23 @@ class ValidateChildren(pyblish.api.InstancePlugin):
         node = instance.data["publish_node"]
         assert node, "No publish node found."
 
+        manager = utils.get_manager()
         for child in node.allNodes():
             if child == node:
                 # Ignore the node to be published
                 continue
-            if nodeutils.definition_from_node(child.path()):
+            definition = nodeutils.node_definition(child)
+            if definition:
+                if manager.inventory.state(definition) == inventory.OUTDATED:
+                    self.log.warning(
+                        "{child} is not using the latest version of {name}.".format(
+                            child=child.path(),
+                            name=definition.nodeTypeName(),
+                        )
+                    )
+
                 # do something better than this
-                path = child.type().definition().libraryFilePath()
+                path = definition.libraryFilePath()
                 if not config.node_manager_config.get("released_locations", []):
                     self.log.warning(
                         "No released locations configured, skipping check."
@@ -26,5 +26,5 @@ class ValidateIsHDA(pyblish.api.InstancePlugin):
         node = instance.data["publish_node"]
         assert node, "No publish node found."
 
-        if not nodeutils.definition_from_node(node.path()):
+        if not nodeutils.node_definition(node):
             raise RuntimeError("Node is not a HDA.")
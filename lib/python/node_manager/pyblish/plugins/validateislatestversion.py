@@ -27,7 +27,7 @@ class ValidateIsLatestVersion(pyblish.api.InstancePlugin):
         assert node, "No publish node found."
 
         m = utils.get_manager()
-        if not m.is_latest_version(node):
+        if not m.classify(node).latest:
             raise RuntimeError(
                 "{node} is not the latest version. Make sure to match the latest "
                 "version or have a higher version then the lastest version before "
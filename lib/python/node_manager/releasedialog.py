@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+
+"""Node manager release progress dialog."""
+
+import logging
+
+import hou
+
+from hutil.Qt import QtCore
+from hutil.Qt import QtWidgets
+
+
+logger = logging.getLogger(__name__)
+
+
+POLL_INTERVAL = 100
+
+# Keep the open dialogs alive until they are closed.
+_dialogs = set()
+
+
+class ReleaseDialog(QtWidgets.QDialog):
+    """Show the progress and logs of a release running in the background.
+
+    The job is polled from the Qt event loop, so the finished callback is always run
+    on the main thread, where it is safe to use hou.
+    """
+
+    def __init__(self, job, title, finished_callback=None, parent=None):
+        """
+        Initialise the dialog.
+
+        Args:
+            job(releasejob.ReleaseJob): The release to show.
+            title(str): The window title.
+            finished_callback(:obj:`function`,optional): Called with the job once it
+                has finished.
+            parent(:obj:`QtWidgets.QWidget`,optional): The parent widget.
+        """
+        super(ReleaseDialog, self).__init__(parent or hou.qt.mainWindow())
+        self.setWindowTitle(title)
+        self.setAttribute(QtCore.Qt.WA_DeleteOnClose)
+        self.resize(600, 300)
+
+        self.job = job
+        self.finished_callback = finished_callback
+
+        self.status = QtWidgets.QLabel(job.status)
+        self.progress = QtWidgets.QProgressBar()
+        self.progress.setRange(0, 100)
+        self.log = QtWidgets.QPlainTextEdit()
+        self.log.setReadOnly(True)
+        self.button = QtWidgets.QPushButton("Cancel")
+        self.button.clicked.connect(self.cancel_or_close)
+
+        buttons = QtWidgets.QHBoxLayout()
+        buttons.addStretch()
+        buttons.addWidget(self.button)
+
+        layout = QtWidgets.QVBoxLayout()
+        layout.addWidget(self.status)
+        layout.addWidget(self.progress)
+        layout.addWidget(self.log)
+        layout.addLayout(buttons)
+        self.setLayout(layout)
+
+        self.timer = QtCore.QTimer(self)
+        self.timer.timeout.connect(self.poll)
+        self.timer.start(POLL_INTERVAL)
+
+    def poll(self):
+        """Update the dialog from the job, finishing once the job is done."""
+        for message in self.job.drain_logs():
+            self.log.appendPlainText(message)
+        self.status.setText(self.job.status)
+        self.progress.setValue(int(self.job.progress * 100))
+
+        if not self.job.future.done():
+            return
+
+        self.timer.stop()
+        self.button.setText("Close")
+        self.button.setEnabled(True)
+        if self.finished_callback:
+            try:
+                self.finished_callback(self.job)
+            except Exception:
+                logger.exception("Release finished callback failed.")
+
+    def cancel_or_close(self):
+        """Cancel the release if it is running, otherwise close the dialog."""
+        if self.job.future.done():
+            self.close()
+            return
+
+        self.job.cancel()
+        self.button.setEnabled(False)
+        self.status.setText("Cancelling")
+
+    def closeEvent(self, event):
+        """Cancel the release if the dialog is closed while it is running.
+
+        Args:
+            event(QtGui.QCloseEvent): The close event.
+        """
+        if not self.job.future.done():
+            self.job.cancel()
+            event.ignore()
+            return
+
+        _dialogs.discard(self)
+        super(ReleaseDialog, self).closeEvent(event)
+
+
+def show(job, title, finished_callback=None):
+    """
+    Start the job and show its progress.
+
+    Args:
+        job(releasejob.ReleaseJob): The release to run.
+        title(str): The window title.
+        finished_callback(:obj:`function`,optional): Called on the main thread with
+            the job once it has finished.
+
+    Returns:
+        (ReleaseDialog): The dialog.
+    """
+    dialog = ReleaseDialog(job, title, finished_callback=finished_callback)
+    _dialogs.add(dialog)
+    job.start()
+    dialog.show()
+    return dialog
@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+
+"""Run a release in a background thread, reporting progress and logs."""
+
+import collections
+import logging
+import threading
+
+from concurrent.futures import Future
+
+
+logger = logging.getLogger(__name__)
+
+
+# The loggers streamed from a release, the release plugins and the Node Manager.
+STREAMED_LOGGERS = ("release", "node_manager")
+
+LOG_FORMAT = "%(levelname)s: %(message)s"
+
+
+class ReleaseCancelled(RuntimeError):
+    """The release was cancelled before anything was published."""
+
+
+class _JobLogHandler(logging.Handler):
+    """Collect the log records made by a release job's thread.
+
+    Only records made by the job's thread are collected, and the logger levels are
+    left as the session set them.
+    """
+
+    def __init__(self, job):
+        """
+        Initialise the handler.
+
+        Args:
+            job(ReleaseJob): The job to collect the records for.
+        """
+        super(_JobLogHandler, self).__init__(level=logging.INFO)
+        self.job = job
+        self.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    def emit(self, record):
+        """Queue the record if it came from the job's thread.
+
+        Args:
+            record(logging.LogRecord): The record to queue.
+        """
+        if record.thread == self.job.thread_id:
+            self.job.logs.append(self.format(record))
+
+
+class ReleaseJob(object):
+    """ReleaseJob - A release running in a background thread.
+
+    The release function is given the job, and should call report() as it progresses
+    and check_cancelled() before each step that can't be undone. Anything needing hou
+    should be done on the main thread before the job is started, or once future has
+    resolved. Log records made by the job's thread are queued in logs, so they can
+    be shown as the release runs, along with each step reported.
+    """
+
+    def __init__(self, release_function, name="NodeManagerRelease"):
+        """
+        Initialise the ReleaseJob.
+
+        Args:
+            release_function(function): Called with the job to run the release.
+            name(:obj:`str`,optional): The name of the release thread.
+        """
+        self.release_function = release_function
+        self.name = name
+        self.future = Future()
+        self.logs = collections.deque()
+        self.progress = 0.0
+        self.status = "Waiting"
+        self.thread_id = None
+        self._cancelled = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start the release in a background thread.
+
+        Returns:
+            (concurrent.futures.Future): Resolved with the release result.
+        """
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+        return self.future
+
+    def run(self):
+        """Run the release in this thread.
+
+        Returns:
+            object: The release result.
+        """
+        self._run()
+        return self.future.result()
+
+    def _run(self):
+        """Run the release, resolving the future with its result."""
+        self.thread_id = threading.get_ident()
+        handler = _JobLogHandler(self)
+        for name in STREAMED_LOGGERS:
+            logging.getLogger(name).addHandler(handler)
+
+        try:
+            result = self.release_function(self)
+            self.report(1.0, "Complete")
+            self.future.set_result(result)
+        except ReleaseCancelled as error:
+            self.report(self.progress, "Cancelled")
+            self.future.set_exception(error)
+        except Exception as error:
+            logger.exception("Release failed.")
+            self.report(self.progress, "Failed")
+            self.future.set_exception(error)
+        finally:
+            for name in STREAMED_LOGGERS:
+                logging.getLogger(name).removeHandler(handler)
+
+    def report(self, progress, status):
+        """
+        Report the progress of the release.
+
+        Args:
+            progress(float): The fraction of the release complete, from 0 to 1.
+            status(str): A short description of the current step.
+        """
+        self.progress = progress
+        self.status = status
+        # Queued directly, so the steps are shown whatever the session logs.
+        self.logs.append(status)
+        logger.debug(status)
+
+    def cancel(self):
+        """Ask the release to stop at the next step that can be safely stopped at."""
+        self._cancelled.set()
+
+    def cancelled(self):
+        """
+        Has the release been asked to stop?
+
+        Returns:
+            (bool): True if cancel() has been called.
+        """
+        return self._cancelled.is_set()
+
+    def check_cancelled(self):
+        """
+        Stop the release if it has been cancelled.
+
+        Raises:
+            ReleaseCancelled: The release has been cancelled.
+        """
+        if self.cancelled():
+            raise ReleaseCancelled("Release cancelled.")
+
+    def drain_logs(self):
+        """
+        Take the log messages queued since this was last called.
+
+        Returns:
+            (list(str)): The formatted log messages.
+        """
+        messages = []
+        while self.logs:
+            messages.append(self.logs.popleft())
+        return messages
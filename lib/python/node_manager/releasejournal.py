@@ -0,0 +1,274 @@
+#!/usr/bin/env python
+
+"""Record the stages of a release, so a failed release can be resumed.
+
+A release is made up of the stages in STAGES, run in order. Each release directory
+has a journal.json recording the captured release, which stages have completed and
+how long each took. The journal is written after every stage, so if a release fails
+it can be resumed from the stage that failed rather than started again. Stages that
+only change the local clone (stage, commit and push, which restores the clone if it
+fails) are restarted from the stage stage, as the clone is reset when they are.
+"""
+
+import contextlib
+import json
+import logging
+import os
+import time
+
+
+logger = logging.getLogger(__name__)
+
+
+JOURNAL_NAME = "journal.json"
+
+CAPTURE = "capture"
+EXPAND = "expand"
+STAGE = "stage"
+COMMIT = "commit"
+PUSH = "push"
+PACKAGE = "package"
+VERIFY = "verify"
+INSTALL = "install"
+STAGES = (CAPTURE, EXPAND, STAGE, COMMIT, PUSH, PACKAGE, VERIFY, INSTALL)
+
+# Failed stages that are resumed from an earlier stage.
+RESTART_STAGES = {COMMIT: STAGE, PUSH: STAGE}
+
+RUNNING = "running"
+FAILED = "failed"
+CANCELLED = "cancelled"
+COMPLETE = "complete"
+
+
+class ReleaseJournal(object):
+    """ReleaseJournal - The saved state of a release."""
+
+    # Counts the journals saved in this session, so lists of journals found can be
+    # cached until one changes.
+    saved = 0
+
+    def __init__(self, path, data=None):
+        """
+        Initialise the ReleaseJournal.
+
+        Args:
+            path(str): The path to the journal file.
+            data(:obj:`dict`,optional): The journal data.
+        """
+        self.path = path
+        self.data = data or {}
+        self.data.setdefault("status", RUNNING)
+        self.data.setdefault("stages", {})
+        self.data.setdefault("created", time.time())
+
+    @classmethod
+    def create(cls, release_dir, **data):
+        """
+        Create a new journal in the given release directory.
+
+        Args:
+            release_dir(str): The release directory.
+            **data: The captured release to record.
+
+        Returns:
+            (ReleaseJournal): The journal.
+        """
+        if not os.path.isdir(release_dir):
+            os.makedirs(release_dir)
+        journal = cls(os.path.join(release_dir, JOURNAL_NAME), data=dict(data))
+        journal.save()
+        return journal
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load a journal.
+
+        Args:
+            path(str): The path to the journal file, or the release directory.
+
+        Returns:
+            (ReleaseJournal): The journal.
+        """
+        if os.path.isdir(path):
+            path = os.path.join(path, JOURNAL_NAME)
+        with open(path, "r") as journal_file:
+            return cls(path, data=json.load(journal_file))
+
+    @property
+    def release_dir(self):
+        """str: The release directory the journal is in."""
+        return os.path.dirname(self.path)
+
+    @property
+    def status(self):
+        """str: The status of the release."""
+        return self.data["status"]
+
+    def save(self):
+        """Save the journal, replacing the previous one in a single step."""
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w") as journal_file:
+            json.dump(self.data, journal_file, indent=4, sort_keys=True)
+        os.replace(temp_path, self.path)
+        ReleaseJournal.saved += 1
+
+    def completed(self, stage):
+        """
+        Has the given stage completed?
+
+        Args:
+            stage(str): The stage to check.
+
+        Returns:
+            (bool): True if the stage has completed.
+        """
+        return self.data["stages"].get(stage, {}).get("status") == COMPLETE
+
+    def timings(self):
+        """
+        Get the duration of each stage that has run.
+
+        Returns:
+            (dict): The duration in seconds of each stage, keyed by stage.
+        """
+        return {
+            stage: record["duration"]
+            for stage, record in self.data["stages"].items()
+            if "duration" in record
+        }
+
+    @contextlib.contextmanager
+    def stage(self, stage):
+        """
+        Run a stage of the release, recording its duration and result.
+
+        Args:
+            stage(str): The stage being run.
+        """
+        record = {"status": RUNNING, "started": time.time()}
+        self.data["stages"][stage] = record
+        self.data["status"] = RUNNING
+        self.save()
+
+        start = time.time()
+        try:
+            yield
+        except BaseException as error:
+            record["status"] = FAILED
+            record["error"] = str(error)
+            self.data["status"] = FAILED
+            raise
+        else:
+            record["status"] = COMPLETE
+        finally:
+            record["duration"] = time.time() - start
+            self.save()
+            logger.debug(
+                "Release stage {stage} {status} in {duration:.2f}s".format(
+                    stage=stage, status=record["status"], duration=record["duration"]
+                )
+            )
+
+    def record_stage(self, stage, duration):
+        """
+        Record a stage that ran before the journal was created.
+
+        Args:
+            stage(str): The stage that ran.
+            duration(float): The duration of the stage in seconds.
+        """
+        self.data["stages"][stage] = {"status": COMPLETE, "duration": duration}
+        self.save()
+
+    def resume_stage(self, stages):
+        """
+        Get the stage a release should continue from.
+
+        Args:
+            stages(list(str)): The stages the release is made up of.
+
+        Returns:
+            (str): The first stage to run, or None if all have completed.
+        """
+        for stage in stages:
+            if not self.completed(stage):
+                return RESTART_STAGES.get(stage, stage)
+        return None
+
+    def reset_from(self, stage, stages):
+        """
+        Forget the given stage and all those after it, so they are run again.
+
+        Args:
+            stage(str): The first stage to run again.
+            stages(list(str)): The stages the release is made up of.
+        """
+        for later_stage in stages[stages.index(stage) :]:
+            self.data["stages"].pop(later_stage, None)
+        self.save()
+
+    def cancel(self):
+        """Mark the release as cancelled."""
+        self.data["status"] = CANCELLED
+        self.save()
+
+    def complete(self):
+        """Mark the release as complete."""
+        self.data["status"] = COMPLETE
+        self.save()
+
+
+def journals_state(release_root):
+    """
+    Get a cheap value that changes when the journals in the given directory change.
+
+    Journals saved in this session are counted, and release directories added or
+    removed, eg. by another session, change the directory's modification time.
+
+    Args:
+        release_root(str): The directory containing the release directories.
+
+    Returns:
+        (tuple): The state of the journals.
+    """
+    try:
+        modified = os.stat(release_root).st_mtime_ns
+    except OSError:
+        modified = None
+    return ReleaseJournal.saved, modified
+
+
+def find_journals(release_root, status=None):
+    """
+    Find the release journals in the given directory.
+
+    Args:
+        release_root(str): The directory containing the release directories.
+        status(:obj:`str`,optional): Only return journals with this status.
+
+    Returns:
+        (list(ReleaseJournal)): The journals found, oldest first.
+    """
+    journals = []
+    if not os.path.isdir(release_root):
+        return journals
+
+    for name in os.listdir(release_root):
+        path = os.path.join(release_root, name, JOURNAL_NAME)
+        if not os.path.isfile(path):
+            continue
+        try:
+            journal = ReleaseJournal.load(path)
+        except (OSError, ValueError) as error:
+            logger.warning(
+                "Couldn't read release journal {path}: {error}".format(
+                    path=path, error=error
+                )
+            )
+            continue
+        if status is None or journal.status == status:
+            journals.append(journal)
+
+    return sorted(journals, key=lambda journal: journal.data["created"])
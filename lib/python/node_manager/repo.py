@@ -8,6 +8,8 @@ import os
 
 import hou
 
+from node_manager import hdareader
+from node_manager import loadpolicy
 from node_manager import nodetype
 from node_manager import utils
 from node_manager.utils import nodetypeutils
@@ -36,13 +38,20 @@ class NodeRepo(object):
         self.manager = manager
         self.context = {}
         self.config = {}
+        self.policy = loadpolicy.LoadPolicy()
 
         self.context["repo_path"] = repo_path
         self.context["repo_name"] = self.get_name()
 
         self.editable = editable
+        self.node_manager_definition_files = []
+        self.definition_file_stream = None
+        # Degraded repos couldn't be reached, and aren't loaded until they can be.
+        self.degraded = False
         self.asset_subdirectory = "hda"
         self.node_types = dict()
+        # The repo path the load plugin was created for.
+        self.load_plugin_path = None
 
         self.commit_hash = None
 
@@ -72,14 +81,24 @@ class NodeRepo(object):
     def get_load_plugin(self):
         """Get the load plugin for this repo.
 
+        The load plugins set their paths from the repo path when they are created, so
+        the cached plugin is created again if the repo path has changed since, eg.
+        after a release.
+
         Returns:
             (obj): The load plugin for this repo.
         """
         logger.debug(
             "Using load plugin: {plugin}".format(plugin=self.manager.load_plugin)
         )
+        repo_path = self.context.get("repo_path")
+        if self.load_plugin_path != repo_path:
+            self.manager.plugins.invalidate("load", scope=self.context.get("repo_name"))
+            self.load_plugin_path = repo_path
+
         load_plugin = pluginutils.get_load_plugin(
             self.manager.load_plugin,
+            repo_name=self.context.get("repo_name"),
         )
         if not load_plugin:
             raise RuntimeError("Couldn't find Node Manager Load Plugin.")
@@ -93,6 +112,16 @@ class NodeRepo(object):
             list(NodeRepo): A list of NodeRepo objects.
         """
         load_plugin = self.get_load_plugin()
+
+        # Streaming load plugins provide load_iter(), yielding each definition file as
+        # it becomes ready. The files are then processed as they arrive by
+        # load_nodes(), which also loads the config once the first file is ready.
+        if hasattr(load_plugin, "load_iter"):
+            self.definition_file_stream = load_plugin.load_iter()
+            self.node_manager_definition_files = []
+            return
+
+        self.definition_file_stream = None
         self.node_manager_definition_files = load_plugin.load()
         self.load_config()
 
@@ -116,6 +145,8 @@ class NodeRepo(object):
 
         logger.info(f"Repo config: {self.config}")
 
+        self.policy = loadpolicy.LoadPolicy.from_config(self.config)
+
     def get_name(self):
         """Get the repo name.
 
@@ -153,7 +184,7 @@ class NodeRepo(object):
             hda_node_type = nodetype.NodeType(self.manager, name, namespace)
             self.node_types[index] = hda_node_type
 
-        hidden = any(n in current_name for n in self.config.get("ophide", []))
+        hidden = self.policy.is_hidden(current_name)
 
         # Otherwise load as normal
         self.node_types[index].add_version(
@@ -161,16 +192,130 @@ class NodeRepo(object):
             definition,
             hidden=hidden,
         )
+        self.manager.classifications.invalidate()
+
+    def read_definition_names(self, path):
+        """Read the definitions in the given file without using Houdini.
+
+        Args:
+            path(str): The path to the node definition file to read.
+
+        Returns:
+            (list(tuple)): The (category, node type name) of each definition, or None
+                if the file couldn't be read.
+        """
+        try:
+            return [
+                (definition.category, definition.node_type_name)
+                for definition in hdareader.definitions_in_file(path)
+            ]
+        except hdareader.HDAReaderError as error:
+            logger.warning(
+                "Couldn't index {path} without Houdini, falling back to hou: "
+                "{error}".format(path=path, error=error)
+            )
+            return None
+
+    def process_definition_files(self, paths, force=False, record=True):
+        """Process the given node definition files and handle the definitions they contain.
+
+        Definitions from every file are gathered before any are installed so that the
+        load policy's version retention rules can be applied across all of the files.
+        When the hdareader index backend is configured, files are indexed without
+        Houdini and files containing no definitions to install are never opened by it.
+
+        Args:
+            paths(list(str)): The paths to the node definition files to process.
+            force(:obj:`bool`,optional): Update the catalog even if the files are
+                unchanged.
+            record(:obj:`bool`,optional): Record the files in the catalog. Only the
+                repo's library files are recorded, not editable copies.
+        """
+        use_reader = self.manager.config.get("index_backend") == "hdareader"
+        file_definitions = {}
+        file_names = {}
+        for path in paths:
+            logger.debug("Processing {path}".format(path=path))
+            names = self.read_definition_names(path) if use_reader else None
+            if names is None:
+                file_definitions[path] = hou.hda.definitionsInFile(path)
+                names = [
+                    (definition.nodeTypeCategory().name(), definition.nodeTypeName())
+                    for definition in file_definitions[path]
+                ]
+            file_names[path] = names
+
+        retained = set(
+            self.policy.filter_names(
+                [name for names in file_names.values() for name in names]
+            )
+        )
+        for path in paths:
+            if path not in file_definitions:
+                if not retained.intersection(file_names[path]):
+                    logger.debug(
+                        "Nothing to install from {path}, skipping.".format(path=path)
+                    )
+                    continue
+                file_definitions[path] = hou.hda.definitionsInFile(path)
+
+            for definition in file_definitions[path]:
+                name = (definition.nodeTypeCategory().name(), definition.nodeTypeName())
+                if name in retained:
+                    self.process_definition(definition)
+
+        if record:
+            self.update_catalog(file_names, retained, force=force)
+
+    def update_catalog(self, file_names, retained, force=False):
+        """Record the given definition files in the Node Manager catalog.
 
-    def process_node_definition_file(self, path):
+        Only files that have changed since they were last recorded, or whose versions
+        are now hidden or installed differently, are updated.
+
+        Args:
+            file_names(dict): The (category, node type name) of the definitions found
+                in each file, keyed by path.
+            retained(set(tuple)): The (category, node type name) of the definitions
+                that were installed.
+            force(:obj:`bool`,optional): Update the catalog even if the files are
+                unchanged.
+        """
+        node_catalog = self.manager.catalog
+        if not node_catalog:
+            return
+
+        node_catalog.update_repo(
+            self.context.get("repo_name"),
+            self.context.get("repo_path"),
+            load_path=self.context.get("repo_load_path"),
+        )
+        for path, names in file_names.items():
+            records = []
+            for category, current_name in names:
+                records.append(
+                    {
+                        "category": category,
+                        "namespace": nodetypeutils.node_type_namespace(current_name),
+                        "name": nodetypeutils.node_type_name(current_name),
+                        "type_name": current_name,
+                        "version": nodetypeutils.node_type_version(current_name),
+                        "hidden": self.policy.is_hidden(current_name),
+                        "installed": (category, current_name) in retained,
+                    }
+                )
+            if not force and not node_catalog.file_changed(path, records):
+                continue
+            node_catalog.update_file(self.context.get("repo_name"), path, records)
+
+    def process_node_definition_file(self, path, record=True):
         """Process the given node definition file and handle any definitions it contains.
 
         Args:
             path(str): The path to the node definition file we are processing.
+            record(:obj:`bool`,optional): Record the file in the catalog.
         """
-        definitions = hou.hda.definitionsInFile(path)
-        for definition in definitions:
-            self.process_definition(definition)
+        self.process_definition_files([path], force=True, record=record)
 
     def load_nodes(self, force=False):
         """Load all definitions contained by this repository.
@@ -181,9 +326,77 @@ class NodeRepo(object):
         if force:
             self.initialise_repo()
 
-        for definition_file in self.node_manager_definition_files:
-            logger.debug("Processing {path}".format(path=definition_file))
-            self.process_node_definition_file(definition_file)
+        if self.definition_file_stream is not None:
+            self.process_definition_file_stream(force=force)
+        else:
+            self.process_definition_files(
+                self.node_manager_definition_files, force=force
+            )
+
+        if self.manager.catalog:
+            self.manager.catalog.prune_files(
+                self.context.get("repo_name"), self.node_manager_definition_files
+            )
+
+    def process_definition_file_stream(self, force=False):
+        """Process definition files as the streaming load plugin yields them.
+
+        Each file is indexed and installed as soon as it is ready, so this overlaps
+        with the plugin preparing the rest. If the load policy's version retention
+        rules need every definition before deciding what to install, the files are
+        gathered and processed together once the stream is complete instead.
+
+        Args:
+            force(:obj:`bool`,optional): Update the catalog even if the files are
+                unchanged.
+        """
+        stream = self.definition_file_stream
+        self.definition_file_stream = None
+
+        config_loaded = False
+        for path in stream:
+            # The plugin must have made the config available by its first file.
+            if not config_loaded:
+                self.load_config()
+                config_loaded = True
+
+            self.node_manager_definition_files.append(path)
+            if not self.policy.requires_all_definitions():
+                self.process_definition_files([path], force=force)
+
+        if not config_loaded:
+            self.load_config()
+
+        if self.policy.requires_all_definitions():
+            self.process_definition_files(
+                self.node_manager_definition_files, force=force
+            )
+
+    def version_records(self):
+        """Get a record of every version loaded by this repo.
+
+        Returns:
+            (list(dict)): The repo, category, namespace, name, type_name, version and
+                path of each version, matching the records in the catalog.
+        """
+        records = []
+        for hda_node_type in self.node_types.values():
+            for node_type_versions in hda_node_type.all_versions().values():
+                for node_type_version in node_type_versions:
+                    definition = node_type_version.definition
+                    current_name = definition.nodeTypeName()
+                    records.append(
+                        {
+                            "repo": self.context.get("repo_name"),
+                            "category": definition.nodeTypeCategory().name(),
+                            "namespace": hda_node_type.namespace,
+                            "name": hda_node_type.name,
+                            "type_name": current_name,
+                            "version": nodetypeutils.node_type_version(current_name),
+                            "path": node_type_version.path,
+                        }
+                    )
+        return records
 
     def remove_definition(self, definition):
         """Remove the given defintion from the repo.
@@ -202,6 +415,7 @@ class NodeRepo(object):
         index = utils.node_type_index(current_name, category)
         nodetype = self.manager.nodetype_from_definition(definition)
         nodetype.remove_version(definition)
+        self.manager.classifications.invalidate()
 
         # Remove the nodetype if no versions remain
         if len(nodetype.versions) == 0:
@@ -271,7 +485,8 @@ class NodeRepo(object):
         definition.copyToHDAFile(editable_path, new_name=new_name)
         logger.debug("Definition saved to {path}".format(path=editable_path))
 
-        # Add the newly written HDA to the Node Manager
-        self.process_node_definition_file(editable_path)
+        # Add the newly written HDA to the Node Manager, the editable copy isn't
+        # released so isn't recorded in the catalog.
+        self.process_node_definition_file(editable_path, record=False)
 
         return new_name
@@ -0,0 +1,202 @@
+#!/usr/bin/env python
+
+"""Upgrade node instances to the latest version of their node type."""
+
+import collections
+import logging
+
+import hou
+
+from node_manager.utils import callbackutils
+from node_manager.utils import nodetypeutils
+
+
+logger = logging.getLogger(__name__)
+
+
+UpgradeAction = collections.namedtuple(
+    "UpgradeAction", ["node_path", "current_type", "target_type"]
+)
+
+
+def _parse_version(version):
+    """Parse a node type version, returning None if it isn't a valid version.
+
+    Args:
+        version(str): The version to parse.
+
+    Returns:
+        (packaging.version.Version): The parsed version.
+    """
+    from packaging.version import InvalidVersion, Version
+
+    try:
+        return Version(version)
+    except (InvalidVersion, TypeError):
+        return None
+
+
+def latest_compatible_version(nodetype, current_version, allow_major=False):
+    """
+    Find the latest version of the node type that is compatible with the given version.
+
+    Args:
+        nodetype(node_manager.nodetype.NodeType): The Node Manager node type.
+        current_version(str): The version currently in use.
+        allow_major(:obj:`bool`,optional): Allow upgrades to a different major version.
+
+    Returns:
+        (str): The latest compatible version, or None if there is no newer version.
+    """
+    current = _parse_version(current_version)
+    if not current:
+        return None
+
+    candidates = []
+    for version in nodetype.all_versions():
+        parsed = _parse_version(version)
+        if not parsed or parsed <= current:
+            continue
+        if not allow_major and parsed.major != current.major:
+            continue
+        candidates.append((parsed, version))
+
+    if not candidates:
+        return None
+    return max(candidates)[1]
+
+
+def plan_upgrades(manager, nodes=None, allow_major=False):
+    """
+    Work out which nodes can be upgraded and to which node type.
+
+    This doesn't modify the scene, so it can also be used as a dry-run report.
+
+    Args:
+        manager(NodeManager): The instance of the running Node manager.
+        nodes(:obj:`list` of :obj:`hou.Node`,optional): The nodes to consider. If not
+            provided, all outdated nodes in the scene inventory are used.
+        allow_major(:obj:`bool`,optional): Allow upgrades to a different major version.
+
+    Returns:
+        (list(UpgradeAction)): The upgrades to make.
+    """
+    if nodes is None:
+        nodes = manager.inventory.outdated_nodes()
+
+    nodes_by_type = collections.OrderedDict()
+    for current_node in nodes:
+        # Nodes inside locked HDAs are defined by their parent's contents.
+        if current_node.isInsideLockedHDA():
+            continue
+        nodes_by_type.setdefault(current_node.type(), []).append(current_node)
+
+    actions = []
+    for node_type, type_nodes in nodes_by_type.items():
+        definition = node_type.definition()
+        if not definition:
+            continue
+
+        nodetype = manager.nodetype_from_definition(definition)
+        if not nodetype:
+            continue
+
+        current_name = definition.nodeTypeName()
+        latest = latest_compatible_version(
+            nodetype,
+            nodetypeutils.node_type_version(current_name),
+            allow_major=allow_major,
+        )
+        if not latest:
+            continue
+
+        target_type = nodetypeutils.node_type_name_from_components(
+            definition, version=latest
+        )
+        actions.extend(
+            UpgradeAction(current_node.path(), current_name, target_type)
+            for current_node in type_nodes
+        )
+
+    return actions
+
+
+def format_report(actions):
+    """
+    Format the given upgrades as a report.
+
+    Args:
+        actions(list(UpgradeAction)): The upgrades to report.
+
+    Returns:
+        (str): The report.
+    """
+    return "\n".join(
+        "{path}: {current} -> {target}".format(
+            path=action.node_path,
+            current=action.current_type,
+            target=action.target_type,
+        )
+        for action in actions
+    )
+
+
+def apply_upgrades(manager, actions):
+    """
+    Upgrade nodes by changing their node type.
+
+    All of the changes are made in a single undo group, with cooking and the Node
+    Manager node callbacks suspended. Progress is reported using an interruptable
+    operation, and the affected node types are refreshed once at the end.
+
+    Args:
+        manager(NodeManager): The instance of the running Node manager.
+        actions(list(UpgradeAction)): The upgrades to make.
+
+    Returns:
+        (list(UpgradeAction)): The upgrades that were made.
+    """
+    applied = []
+    update_mode = hou.updateModeSetting()
+    try:
+        with hou.InterruptableOperation(
+            "Node Manager: Upgrading nodes", open_interrupt_dialog=True
+        ) as operation, hou.undos.group(
+            "Node Manager: Upgrade nodes"
+        ), callbackutils.callbacks_suspended():
+            hou.setUpdateMode(hou.updateMode.Manual)
+            for index, action in enumerate(actions):
+                current_node = hou.node(action.node_path)
+                if not current_node:
+                    logger.warning(
+                        "Node no longer exists, skipping: {path}".format(
+                            path=action.node_path
+                        )
+                    )
+                    continue
+
+                current_node.changeNodeType(action.target_type, keep_parms=True)
+                applied.append(action)
+                operation.updateProgress(float(index + 1) / len(actions))
+    except hou.OperationInterrupted:
+        logger.warning(
+            "Upgrade interrupted after {count} of {total} nodes.".format(
+                count=len(applied), total=len(actions)
+            )
+        )
+    finally:
+        hou.setUpdateMode(update_mode)
+
+    manager.inventory.invalidate()
+
+    # Refresh each upgraded node type once, using the first node upgraded to it.
+    refresh_paths = collections.OrderedDict()
+    for action in applied:
+        refresh_paths.setdefault(action.target_type, action.node_path)
+    for path in refresh_paths.values():
+        upgraded_node = hou.node(path)
+        if upgraded_node:
+            callbackutils.refresh_node_type(upgraded_node.type())
+
+    logger.info("Upgraded {count} nodes.".format(count=len(applied)))
+    return applied
@@ -5,12 +5,12 @@
 import getpass
 import logging
 import os
+import subprocess
 import time
 
 import hou
 
 from node_manager import config
-from node_manager import manager
 from node_manager.utils import nodetypeutils
 
 
@@ -26,6 +26,9 @@ def get_manager():
     Raises:
         RuntimeError: Node Manager not initialised.
     """
+    # Imported here, as the manager imports utils.
+    from node_manager import manager
+
     manager_instance = manager.NodeManager.instance
     if not manager_instance:
         logger.warning("Node Manager not initialised.")
@@ -159,6 +162,22 @@ def release_branch_name(definition):
     )
 
 
+def batch_release_branch_name(definitions):
+    """
+    Generate a legal git release branch name for a batch of definitions.
+
+    Args:
+        definitions(list(hou.HDADefinition)): The HDA definitions being released.
+
+    Returns:
+        (str): The git release branch for the batch.
+    """
+    release_time = time.strftime("%d-%m-%y-%H-%M-%S", time.gmtime())
+    return "release_batch-{count}-{time}".format(
+        count=len(definitions), time=release_time
+    )
+
+
 def editable_hda_path_from_components(definition, edit_dir, namespace=None, name=None):
     """Get the editable HDA path.
 
@@ -232,6 +251,34 @@ def expanded_hda_name(definition):
     )
 
 
+def expand_hda(library_path, expand_dir, apprentice=False):
+    """Expand a HDA library to a directory using hotl.
+
+    hou.HDADefinition.expandToDirectory doesn't include the contents, so hotl is used
+    instead. This doesn't use hou, so can be run outside the main thread.
+
+    Args:
+        library_path(str): The path to the HDA library.
+        expand_dir(str): The directory to expand the library to.
+        apprentice(:obj:`bool`,optional): Is this a non-commercial session?
+
+    Raises:
+        RuntimeError: The HDA failed to expand.
+    """
+    cmd = [
+        "hotl",
+        "-x" if apprentice else "-tp",  # Maybe we should error-check this?
+        expand_dir,
+        library_path,
+    ]
+    if subprocess.call(cmd) != 0:
+        raise RuntimeError(
+            "HDA expansion didn't complete successfully: {path}".format(
+                path=library_path
+            )
+        )
+
+
 def is_released(path):
     """
     Check if the given path is within a released location on disk.
@@ -2,17 +2,23 @@
 
 """Handle callbacks relating to the NodeManager."""
 
+import contextlib
 import logging
 
 import hou
 
-from node_manager import config
 from node_manager import utils
 from node_manager.utils import nodeutils
 
 
 logger = logging.getLogger(__name__)
 
+# Nodes waiting to be processed by process_pending_nodes.
+_pending_nodes = []
+_pending_scheduled = False
+_hip_file_callback_registered = False
+_callbacks_suspended = False
+
 
 def cosmetic_callbacks_enabled():
     if not hou.isUIAvailable():
@@ -35,7 +41,7 @@ def node_changed(current_node):
         current_node(hou.Node): The node that was created or loaded.
     """
     manager = utils.get_manager()
-    if not manager:
+    if not manager or not manager.is_ready():
         logger.debug("Node manager not available, skipping.")
         return
     elif not cosmetic_callbacks_enabled():
@@ -45,10 +51,8 @@ def node_changed(current_node):
         logger.debug("UI available, cosmetic callbacks enabled.")
 
     # Is the node a digital asset?
-    if not nodeutils.is_digital_asset(
-        current_node.path(),
-        include_hidden=config.node_manager_config.get("include_all_hdas", False)
-    ):
+    classification = manager.classify(current_node)
+    if not classification.digital_asset:
         logger.debug(
             "Skipping node that isn't a NodeManager digital asset: {node}".format(
                 node=current_node.name(),
@@ -58,6 +62,212 @@ def node_changed(current_node):
 
     # We created or loaded a NodeManager node
     logger.debug("NodeCreatedOrLoaded: {node}".format(node=current_node.name()))
-    nodeutils.node_comment(
-        current_node, published=manager.is_node_manager_node(current_node)
+    nodeutils.node_comment(current_node, published=classification.managed)
+
+
+def queue_node_changed(current_node):
+    """Queue a created, loaded or updated node to be handled in a batch.
+
+    While a hip file is loading the batch is processed once it has finished loading,
+    otherwise it is processed when Houdini is next idle. This means bulk creates,
+    pastes and definition updates are handled together. It is also processed when
+    Houdini is next idle after a load, in case the load fails or is aborted without
+    AfterLoad being sent, so queued nodes are never left waiting.
+
+    Args:
+        current_node(hou.Node): The node that was created, loaded or updated.
+    """
+    global _pending_scheduled
+
+    # The scene has changed, so the inventory needs to be rebuilt.
+    manager = utils.get_manager()
+    if manager:
+        manager.inventory.invalidate()
+
+    # Cosmetic callbacks are only ever run with a UI.
+    if _callbacks_suspended or not hou.isUIAvailable():
+        return
+
+    _pending_nodes.append(current_node)
+    if _pending_scheduled:
+        return
+
+    if hou.hipFile.isLoadingHipFile():
+        register_hip_file_callback()
+
+    import hdefereval
+
+    hdefereval.executeDeferred(process_pending_nodes)
+    _pending_scheduled = True
+
+
+def node_deleted(current_node):
+    """Handle a node being deleted.
+
+    Args:
+        current_node(hou.Node): The node being deleted.
+    """
+    manager = utils.get_manager()
+    if manager:
+        manager.inventory.invalidate()
+
+
+@contextlib.contextmanager
+def callbacks_suspended():
+    """Suspend the Node Manager node callbacks.
+
+    Used by bulk operations that update the nodes themselves once they are complete.
+    """
+    global _callbacks_suspended
+
+    previous = _callbacks_suspended
+    _callbacks_suspended = True
+    try:
+        yield
+    finally:
+        _callbacks_suspended = previous
+
+
+def register_hip_file_callback():
+    """Register the hip file callback used to process nodes queued during a load."""
+    global _hip_file_callback_registered
+
+    if _hip_file_callback_registered:
+        return
+
+    hou.hipFile.addEventCallback(_hip_file_event)
+    _hip_file_callback_registered = True
+
+
+def _hip_file_event(event_type):
+    """Process any queued nodes once a hip file has loaded.
+
+    Args:
+        event_type(hou.hipFileEventType): The hip file event that occurred.
+    """
+    if event_type == hou.hipFileEventType.AfterLoad and _pending_nodes:
+        process_pending_nodes()
+
+
+def process_pending_nodes():
+    """Handle all queued nodes.
+
+    Nodes are grouped by node type so that each definition is only classified once,
+    however many instances of it there are.
+    """
+    global _pending_scheduled
+
+    nodes = list(_pending_nodes)
+    del _pending_nodes[:]
+    _pending_scheduled = False
+    if not nodes:
+        return
+
+    manager = utils.get_manager()
+    if not manager:
+        logger.debug("Node manager not available, skipping.")
+        return
+    elif not cosmetic_callbacks_enabled():
+        logger.debug("UI unavailable, cosmetic callbacks disabled.")
+        return
+    elif not manager.is_ready():
+        # Keep the nodes until the Node Manager has finished loading.
+        logger.debug("Node manager loading, deferring queued nodes.")
+        _pending_nodes.extend(nodes)
+        _pending_scheduled = True
+        manager.when_ready(
+            process_pending_nodes, failed_callback=discard_pending_nodes
+        )
+        return
+
+    nodes_by_type = {}
+    for current_node in nodes:
+        try:
+            nodes_by_type.setdefault(current_node.type(), []).append(current_node)
+        except hou.ObjectWasDeleted:
+            continue
+
+    logger.debug(
+        "Processing {count} queued nodes of {types} node types.".format(
+            count=len(nodes), types=len(nodes_by_type)
+        )
+    )
+    with hou.undos.disabler():
+        for node_type, type_nodes in nodes_by_type.items():
+            classification = manager.classifications.classify_definition(
+                node_type.definition()
+            )
+            if not classification.digital_asset:
+                continue
+
+            for current_node in type_nodes:
+                try:
+                    nodeutils.node_comment(
+                        current_node, published=classification.managed
+                    )
+                except hou.ObjectWasDeleted:
+                    continue
+
+
+def discard_pending_nodes():
+    """Discard the queued nodes, as the Node Manager failed to load.
+
+    The queue is started again, so nodes queued after a later load are handled.
+    """
+    global _pending_scheduled
+
+    logger.debug(
+        "Node manager failed to load, discarding {count} queued nodes.".format(
+            count=len(_pending_nodes)
+        )
+    )
+    del _pending_nodes[:]
+    _pending_scheduled = False
+
+
+def refresh_node_type(node_type):
+    """Refresh the Node Manager state shown on every instance of the given node type.
+
+    Instances are found using hou.NodeType.instances() and all of them are updated
+    inside a single undo disabler, followed by a single network editor redraw.
+
+    Args:
+        node_type(hou.NodeType): The node type to refresh.
+    """
+    manager = utils.get_manager()
+    if not manager:
+        logger.debug("Node manager not available, skipping.")
+        return
+    elif not cosmetic_callbacks_enabled():
+        logger.debug("UI unavailable, cosmetic callbacks disabled.")
+        return
+
+    classification = manager.classifications.classify_definition(
+        node_type.definition()
     )
+    if not classification.digital_asset:
+        logger.debug(
+            "Skipping node type that isn't a NodeManager digital asset: {name}".format(
+                name=node_type.name(),
+            )
+        )
+        return
+
+    instances = node_type.instances()
+    with hou.undos.disabler():
+        for current_node in instances:
+            nodeutils.node_comment(current_node, published=classification.managed)
+
+    redraw_network_editors()
+    logger.debug(
+        "Refreshed {count} instances of {name}".format(
+            count=len(instances), name=node_type.name()
+        )
+    )
+
+
+def redraw_network_editors():
+    """Redraw all of the network editors."""
+    for pane_tab in hou.ui.paneTabs():
+        if pane_tab.type() == hou.paneTabType.NetworkEditor:
+            pane_tab.redraw()
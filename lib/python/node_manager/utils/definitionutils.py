@@ -31,6 +31,13 @@ def embedded_definition(definition):
     return False
 
 
+def invalidate_classifications():
+    """Invalidate the Node Manager's cached node classifications, if it is running."""
+    manager_instance = utils.get_manager()
+    if manager_instance:
+        manager_instance.classifications.invalidate()
+
+
 def uninstall_definition(definition, backup_dir=None):
     """Uninistall the given definition from the current Houdini session.
 
@@ -46,6 +53,7 @@ def uninstall_definition(definition, backup_dir=None):
     # Uninstall the definition
     path = definition.libraryFilePath()
     hou.hda.uninstallFile(path)
+    invalidate_classifications()
 
     # If no backup directory is provided then just use a sub-directory of the current directory.
     if not backup_dir:
@@ -135,5 +143,6 @@ def create_definition_copy(
         oplibraries_file="Scanned Asset Library Directories",
         force_use_assets=True,
     )
+    invalidate_classifications()
 
     return new_name
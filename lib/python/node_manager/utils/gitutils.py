@@ -0,0 +1,627 @@
+#!/usr/bin/env python
+
+"""Git Utilities."""
+
+import collections
+import contextlib
+import hashlib
+import logging
+import os
+import random
+import shutil
+import time
+
+
+logger = logging.getLogger(__name__)
+
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# The number of times a release is restaged when the remote moves, and the delay in
+# seconds before the first retry, doubled after each retry up to the maximum.
+RELEASE_RETRIES = 3
+RETRY_DELAY = 0.5
+RETRY_MAX_DELAY = 8.0
+
+# Clone without file contents, which are then only fetched for the files checked out.
+PARTIAL_CLONE_OPTIONS = ["--filter=blob:none"]
+
+TreeChanges = collections.namedtuple("TreeChanges", ["changed", "removed"])
+
+
+class RemoteMoved(RuntimeError):
+    """The remote main branch moved on after the release was staged."""
+
+
+def tag_ref(tag):
+    """
+    Get the full ref for the given tag name.
+
+    Args:
+        tag(str): The tag name.
+
+    Returns:
+        (str): The tag ref.
+    """
+    return "refs/tags/{tag}".format(tag=tag)
+
+
+def partial_clone(url, path, sparse_paths=None, depth=1):
+    """
+    Clone a repository without the contents of any files that aren't checked out.
+
+    If sparse paths are given only the files at the root of the repository, and the
+    given directories, are checked out, so the time taken doesn't grow with the
+    size of the rest of the repository. Servers that don't support partial clones
+    send everything, as a normal clone would.
+
+    Args:
+        url(str): The repository to clone.
+        path(str): The directory to clone into.
+        sparse_paths(:obj:`list(str)`,optional): The directories to check out,
+            relative to the repository root. Everything is checked out if not given.
+        depth(:obj:`int`,optional): The number of commits of history to fetch.
+
+    Returns:
+        (git.Repo): The cloned repository.
+    """
+    from git import Repo
+
+    options = list(PARTIAL_CLONE_OPTIONS)
+    if sparse_paths is not None:
+        options.append("--sparse")
+    cloned_repo = Repo.clone_from(url, path, depth=depth, multi_options=options)
+    if sparse_paths:
+        sparse_checkout(cloned_repo, sparse_paths)
+    return cloned_repo
+
+
+def is_sparse(git_repo):
+    """
+    Does the given repository only check out some of its directories?
+
+    Args:
+        git_repo(git.Repo): The repository to check.
+
+    Returns:
+        (bool): True if the repository has a sparse checkout.
+    """
+    # Read with git, as the setting is usually in the worktree config.
+    return (
+        git_repo.git.config("--bool", "core.sparseCheckout", with_exceptions=False)
+        == "true"
+    )
+
+
+def sparse_checkout(git_repo, paths):
+    """
+    Widen a sparse checkout to include the given directories.
+
+    Repositories that check out everything are left as they are.
+
+    Args:
+        git_repo(git.Repo): The repository to widen.
+        paths(list(str)): The directories to add, relative to the repository root.
+    """
+    if not is_sparse(git_repo):
+        return
+    git_repo.git.sparse_checkout("add", *paths)
+    logger.debug("Added {paths} to the sparse checkout.".format(paths=", ".join(paths)))
+
+
+@contextlib.contextmanager
+def full_checkout(git_repo):
+    """
+    Check out every file while in the context, restoring a sparse checkout after.
+
+    Args:
+        git_repo(git.Repo): The repository to check out.
+    """
+    if not is_sparse(git_repo):
+        yield
+        return
+
+    paths = git_repo.git.sparse_checkout("list").splitlines()
+    git_repo.git.sparse_checkout("disable")
+    try:
+        yield
+    finally:
+        git_repo.git.sparse_checkout("set", "--cone", *paths)
+
+
+def blob_hash(path):
+    """
+    Hash the given file the way git hashes a blob, so it can be compared with the
+    object id of a tracked file without git reading or writing anything.
+
+    Args:
+        path(str): The path to the file.
+
+    Returns:
+        (str): The hex digest of the file's blob.
+    """
+    digest = hashlib.sha1()
+    digest.update("blob {size}\0".format(size=os.path.getsize(path)).encode("ascii"))
+    with open(path, "rb") as blob:
+        for chunk in iter(lambda: blob.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def directory_hashes(root):
+    """
+    Hash every file under the given directory.
+
+    Args:
+        root(str): The directory to hash.
+
+    Returns:
+        (dict): The blob hash of each file, keyed by its "/" separated path relative
+            to the directory.
+    """
+    hashes = {}
+    for directory, _, file_names in os.walk(root):
+        for file_name in file_names:
+            path = os.path.join(directory, file_name)
+            relative_path = os.path.relpath(path, root).replace(os.sep, "/")
+            hashes[relative_path] = blob_hash(path)
+    return hashes
+
+
+def tracked_hashes(git_repo, path, revision="HEAD"):
+    """
+    Get the blob hashes of the files tracked under the given directory.
+
+    Args:
+        git_repo(git.Repo): The repository the directory is in.
+        path(str): The path to the directory.
+        revision(:obj:`str`,optional): The revision to read the tree from.
+
+    Returns:
+        (dict): The blob hash of each tracked file, keyed by its "/" separated path
+            relative to the directory.
+    """
+    relative_root = os.path.relpath(path, git_repo.working_tree_dir).replace(
+        os.sep, "/"
+    )
+    output = git_repo.git.ls_tree("-r", "-z", revision, "--", relative_root + "/")
+
+    hashes = {}
+    for entry in output.split("\0"):
+        if not entry:
+            continue
+        info, _, tracked_path = entry.partition("\t")
+        _, object_type, object_id = info.split()
+        if object_type == "blob":
+            hashes[tracked_path[len(relative_root) + 1 :]] = object_id
+    return hashes
+
+
+def diff_hashes(source_hashes, target_hashes):
+    """
+    Compare the files in a source directory with those in a target directory.
+
+    Args:
+        source_hashes(dict): The blob hash of each source file, keyed by path.
+        target_hashes(dict): The blob hash of each target file, keyed by path.
+
+    Returns:
+        (TreeChanges): The source files that are new or different, and the target
+            files that no longer exist in the source.
+    """
+    changed = sorted(
+        path
+        for path, object_id in source_hashes.items()
+        if target_hashes.get(path) != object_id
+    )
+    removed = sorted(set(target_hashes) - set(source_hashes))
+    return TreeChanges(changed, removed)
+
+
+def clean_tree(git_repo, path):
+    """
+    Discard any uncommitted changes under the given directory, eg. left by an earlier
+    release that failed, so the working tree matches what is tracked.
+
+    Args:
+        git_repo(git.Repo): The repository the directory is in.
+        path(str): The path to the directory.
+    """
+    git_repo.git.reset("--hard")
+    git_repo.git.clean("-fdq", "--", path)
+
+
+def tree_changes(git_repo, source, target):
+    """
+    Compare a directory with the files tracked in the repo at the target path.
+
+    Args:
+        git_repo(git.Repo): The repository the target is in.
+        source(str): The directory with the new files.
+        target(str): The tracked directory the files will be synced to.
+
+    Returns:
+        (TreeChanges): The files to write and the files to remove.
+    """
+    return diff_hashes(directory_hashes(source), tracked_hashes(git_repo, target))
+
+
+def sync_tree(source, target, changes):
+    """
+    Apply the given changes from the source directory to the target directory.
+
+    Only the changed files are copied and only the removed files deleted, so files
+    that are unchanged are never touched.
+
+    Args:
+        source(str): The directory with the new files.
+        target(str): The directory to update.
+        changes(TreeChanges): The changes to apply.
+    """
+    for relative_path in changes.changed:
+        target_path = os.path.join(target, *relative_path.split("/"))
+        target_dir = os.path.dirname(target_path)
+        if not os.path.isdir(target_dir):
+            os.makedirs(target_dir)
+        shutil.copy2(os.path.join(source, *relative_path.split("/")), target_path)
+
+    for relative_path in changes.removed:
+        target_path = os.path.join(target, *relative_path.split("/"))
+        if os.path.lexists(target_path):
+            os.remove(target_path)
+
+        # Remove any directories left empty.
+        directory = os.path.dirname(target_path)
+        while directory != target and os.path.isdir(directory):
+            if os.listdir(directory):
+                break
+            os.rmdir(directory)
+            directory = os.path.dirname(directory)
+
+    logger.debug(
+        "Synced {target}: {changed} changed, {removed} removed.".format(
+            target=target, changed=len(changes.changed), removed=len(changes.removed)
+        )
+    )
+
+
+def update_main(git_repo, remote="origin", main="main"):
+    """
+    Check out main, matching the remote's main, so a release is staged on the latest
+    release rather than whatever was last pulled.
+
+    Args:
+        git_repo(git.Repo): The repository to update.
+        remote(:obj:`str`,optional): The name of the remote to fetch from.
+        main(:obj:`str`,optional): The name of the main branch.
+    """
+    git_repo.git.reset("--hard")
+    git_repo.heads[main].checkout()
+    git_repo.git.fetch(remote, main)
+    git_repo.git.reset("--hard", "{remote}/{main}".format(remote=remote, main=main))
+
+
+def fast_forward(git_repo, remote="origin", main="main"):
+    """
+    Bring main up to date with the remote by fetching it and fast forwarding.
+
+    Unlike a pull this never merges. If the local main has diverged from the
+    remote, eg. after a release that failed to push, it's reset to match.
+
+    Args:
+        git_repo(git.Repo): The repository to update.
+        remote(:obj:`str`,optional): The name of the remote to fetch from.
+        main(:obj:`str`,optional): The name of the main branch.
+
+    Returns:
+        (bool): True if main was changed.
+    """
+    from git.exc import GitCommandError
+
+    remote_main = "{remote}/{main}".format(remote=remote, main=main)
+    git_repo.git.fetch(remote, main)
+    git_repo.git.reset("--hard")
+    git_repo.heads[main].checkout()
+
+    previous = head_commit(git_repo)
+    try:
+        git_repo.git.merge("--ff-only", remote_main)
+    except GitCommandError:
+        logger.warning(
+            "{main} has diverged from {remote_main}, resetting to match.".format(
+                main=main, remote_main=remote_main
+            )
+        )
+        git_repo.git.reset("--hard", remote_main)
+
+    updated = head_commit(git_repo) != previous
+    logger.debug(
+        "{main} {state} {remote_main}.".format(
+            main=main,
+            state="updated to" if updated else "already up to date with",
+            remote_main=remote_main,
+        )
+    )
+    return updated
+
+
+def head_commit(git_repo, revision="HEAD"):
+    """
+    Get the commit the given revision points to.
+
+    Args:
+        git_repo(git.Repo): The repository to look in.
+        revision(:obj:`str`,optional): The revision to look up.
+
+    Returns:
+        (str): The commit hash.
+    """
+    return git_repo.git.rev_parse(revision).strip()
+
+
+def changed_paths(git_repo, since, paths, revision="HEAD"):
+    """
+    Get the files under the given paths that changed between two commits.
+
+    Args:
+        git_repo(git.Repo): The repository to compare in.
+        since(str): The commit to compare from.
+        paths(list(str)): The paths to compare.
+        revision(:obj:`str`,optional): The revision to compare to.
+
+    Returns:
+        (list(str)): The changed files, relative to the repository root.
+    """
+    output = git_repo.git.diff("--name-only", since, revision, "--", *paths)
+    return [path for path in output.splitlines() if path]
+
+
+def finalise_release(git_repo, branch, tag, remote="origin", main="main"):
+    """
+    Merge a local release branch into main and publish it with a single atomic push.
+
+    The release branch and tag only ever exist locally. Main is brought up to date
+    with the remote, the release branch merged into it, and then main and the tag
+    are pushed together, so the remote is either fully released or untouched. If
+    the push fails, the local main and tag are restored so the release can be
+    tried again.
+
+    The release is only merged onto the commit it was staged on, as its version was
+    worked out from there. If the remote has moved on, or the local main has
+    diverged from it, the local main and tag are restored and RemoteMoved is raised
+    so the release can be staged again on the latest main.
+
+    Args:
+        git_repo(git.Repo): The repository to release from.
+        branch(str): The name of the local release branch.
+        tag(str): The name of the local release tag.
+        remote(:obj:`str`,optional): The name of the remote to push to.
+        main(:obj:`str`,optional): The name of the main branch.
+
+    Raises:
+        RemoteMoved: The remote moved on after the release was staged.
+        RuntimeError: The push was rejected.
+    """
+    from git.exc import GitCommandError
+
+    remote_main = "{remote}/{main}".format(remote=remote, main=main)
+    git_repo.git.reset("--hard")
+    git_repo.heads[main].checkout()
+    try:
+        git_repo.git.pull("--ff-only", remote, main)
+    except GitCommandError:
+        # The local main has diverged from the remote, so match the remote and stage
+        # the release again on it.
+        git_repo.git.fetch(remote, main)
+        git_repo.git.reset("--hard", remote_main)
+        git_repo.delete_tag(tag)
+        raise RemoteMoved(
+            "{main} diverged from {remote_main} before {tag} was pushed.".format(
+                main=main, remote_main=remote_main, tag=tag
+            )
+        )
+
+    staged_on = git_repo.git.merge_base(main, branch).strip()
+    if staged_on != head_commit(git_repo, main):
+        git_repo.delete_tag(tag)
+        raise RemoteMoved(
+            "{remote_main} moved on before {tag} was pushed.".format(
+                remote_main=remote_main, tag=tag
+            )
+        )
+
+    git_repo.git.merge(branch, "--no-ff")
+
+    try:
+        git_repo.git.push("--atomic", remote, main, tag_ref(tag))
+    except GitCommandError as error:
+        git_repo.git.fetch(remote, main)
+        git_repo.git.reset("--hard", remote_main)
+        git_repo.delete_tag(tag)
+        if head_commit(git_repo, remote_main) != staged_on:
+            raise RemoteMoved(
+                "{remote_main} moved on while {tag} was pushed.".format(
+                    remote_main=remote_main, tag=tag
+                )
+            )
+        raise RuntimeError(
+            "Failed to push release {tag}: {error}".format(tag=tag, error=error)
+        )
+
+    git_repo.delete_head(branch, force=True)
+    logger.debug(
+        "Pushed {main} and {tag} to {remote}.".format(main=main, tag=tag, remote=remote)
+    )
+
+
+def retry_delay(attempt):
+    """
+    Get how long to wait before retrying a release.
+
+    The delay doubles with each attempt, with some jitter so releases that collided
+    don't collide again.
+
+    Args:
+        attempt(int): The number of attempts made so far, from 0.
+
+    Returns:
+        (float): The delay in seconds.
+    """
+    delay = min(RETRY_MAX_DELAY, RETRY_DELAY * 2**attempt)
+    return random.uniform(delay / 2, delay)
+
+
+def push_release(
+    git_repo,
+    branch,
+    tag,
+    restage,
+    retries=RELEASE_RETRIES,
+    remote="origin",
+    main="main",
+):
+    """
+    Finalise a release, staging it again on the latest main if the remote moves on.
+
+    Args:
+        git_repo(git.Repo): The repository to release from.
+        branch(str): The name of the local release branch.
+        tag(str): The name of the local release tag.
+        restage(function): Called to stage and commit the release again on the
+            latest main, with a new version. Returns the new tag, or None if there
+            is nothing left to release.
+        retries(:obj:`int`,optional): The number of times to restage the release.
+        remote(:obj:`str`,optional): The name of the remote to push to.
+        main(:obj:`str`,optional): The name of the main branch.
+
+    Raises:
+        RuntimeError: The push was rejected, or the remote kept moving on.
+
+    Returns:
+        (str): The tag released, or None if there was nothing left to release.
+    """
+    for attempt in range(retries + 1):
+        try:
+            finalise_release(git_repo, branch, tag, remote=remote, main=main)
+            return tag
+        except RemoteMoved as error:
+            if attempt == retries:
+                raise RuntimeError(
+                    "Failed to push release {tag} after {count} attempts: "
+                    "{error}".format(tag=tag, count=attempt + 1, error=error)
+                )
+            delay = retry_delay(attempt)
+            logger.warning(
+                "{error} Staging the release again in {delay:.1f}s.".format(
+                    error=error, delay=delay
+                )
+            )
+            time.sleep(delay)
+
+        tag = restage()
+        if not tag:
+            return None
+
+
+def abandon_release(git_repo, branch, tag=None, main="main"):
+    """
+    Abandon a release that hasn't been pushed, removing its local branch and tag.
+
+    Args:
+        git_repo(git.Repo): The repository the release was being made in.
+        branch(str): The name of the local release branch.
+        tag(:obj:`str`,optional): The name of the local release tag.
+        main(:obj:`str`,optional): The name of the main branch.
+    """
+    git_repo.git.reset("--hard")
+    git_repo.heads[main].checkout()
+    if branch in git_repo.heads:
+        git_repo.delete_head(branch, force=True)
+    if tag and tag in git_repo.tags:
+        git_repo.delete_tag(tag)
+    logger.debug("Abandoned release branch {branch}.".format(branch=branch))
+
+
+def tag_pushed(git_repo, tag, remote="origin"):
+    """
+    Has the given tag been pushed to the remote?
+
+    Args:
+        git_repo(git.Repo): The repository the release was made in.
+        tag(str): The name of the release tag.
+        remote(:obj:`str`,optional): The name of the remote to check.
+
+    Returns:
+        (bool): True if the tag is on the remote.
+    """
+    return bool(git_repo.git.ls_remote("--tags", remote, tag_ref(tag)).strip())
+
+
+def fetch_tag(git_repo, tag, commit=None, remote="origin"):
+    """
+    Make sure the given release tag exists locally, eg. in a new clone.
+
+    The tag is fetched from the remote if it's there. Otherwise, if it was withdrawn,
+    it is created again on the commit it tagged.
+
+    Args:
+        git_repo(git.Repo): The repository to fetch the tag into.
+        tag(str): The name of the release tag.
+        commit(:obj:`str`,optional): The commit the tag was made on.
+        remote(:obj:`str`,optional): The name of the remote to fetch from.
+
+    Raises:
+        RuntimeError: The tag isn't on the remote, and the commit isn't known.
+    """
+    if tag in git_repo.tags:
+        return
+
+    if tag_pushed(git_repo, tag, remote=remote):
+        git_repo.git.fetch(remote, "{ref}:{ref}".format(ref=tag_ref(tag)))
+        return
+
+    if not commit:
+        raise RuntimeError(
+            "{tag} wasn't found locally or on {remote}.".format(tag=tag, remote=remote)
+        )
+    git_repo.git.fetch(remote, commit)
+    git_repo.create_tag(tag, ref=commit, message="Release {tag}".format(tag=tag))
+
+
+def withdraw_tag(git_repo, tag, remote="origin"):
+    """
+    Remove a pushed release tag from the remote, keeping the local tag so it can be
+    pushed again once the release has been finished.
+
+    Args:
+        git_repo(git.Repo): The repository the release was made in.
+        tag(str): The name of the release tag.
+        remote(:obj:`str`,optional): The name of the remote to remove it from.
+    """
+    git_repo.git.push(remote, ":{ref}".format(ref=tag_ref(tag)))
+    logger.warning(
+        "Withdrew {tag} from {remote} until the release is finished.".format(
+            tag=tag, remote=remote
+        )
+    )
+
+
+def verify_tag(git_repo, tag, remote="origin"):
+    """
+    Check the given tag has been pushed to the remote.
+
+    Args:
+        git_repo(git.Repo): The repository the release was made in.
+        tag(str): The name of the release tag.
+        remote(:obj:`str`,optional): The name of the remote to check.
+
+    Raises:
+        RuntimeError: The tag isn't on the remote.
+    """
+    if not tag_pushed(git_repo, tag, remote=remote):
+        raise RuntimeError(
+            "Error when verifying the release, {tag} wasn't found on {remote}.".format(
+                tag=tag, remote=remote
+            )
+        )
+    logger.debug("Verified {tag} on {remote}.".format(tag=tag, remote=remote))
@@ -29,7 +29,15 @@ def node_comment(current_node, published=True):
     state = "Published"
     if not published:
         state = "Editable"
-    current_node.setComment("Node Manager: {state}".format(state=state))
+    comment = "Node Manager: {state}".format(state=state)
+
+    # Avoid modifying nodes that are already up to date.
+    if current_node.comment() == comment and current_node.isGenericFlagSet(
+        hou.nodeFlag.DisplayComment
+    ):
+        return
+
+    current_node.setComment(comment)
     current_node.setGenericFlag(hou.nodeFlag.DisplayComment, True)
     logger.debug("Set comment on node: {node}".format(node=current_node.name()))
 
@@ -51,6 +59,25 @@ def node_at_path(node_path):
     return houdini_node
 
 
+def node_type_name(houdini_node, short=True):
+    """Get the node type name for the given node.
+
+    By default this returns the short name ie. 'rebellion.pipeline::dispatcher::1.0.0'
+    would return 'dispatcher'.
+
+    Args:
+        houdini_node(hou.Node): The node to query the name for.
+        short(:obj:`bool`, optional): Should the short path rather than the full
+            namespaced path be returned.
+
+    Returns:
+        node_name(str): The name of the node type.
+    """
+    if short:
+        return houdini_node.type().nameComponents()[2]
+    return houdini_node.type().name()
+
+
 def type_name(node_path, short=True):
     """Get the name for the given node path.
 
@@ -67,17 +94,30 @@ def type_name(node_path, short=True):
     """
     houdini_node = node_at_path(node_path)
     if houdini_node:
-        if short:
-            components = houdini_node.type().nameComponents()
-            node_name = components[2]
-        else:
-            node_name = houdini_node.type().name()
-
-        return node_name
+        return node_type_name(houdini_node, short=short)
 
     return None
 
 
+def node_has_node_type(houdini_node, node_type, category=None):
+    """
+    Lookup if the given node and category has the supplied node_type.
+
+    Args:
+        houdini_node(hou.Node): The node to query.
+        node_type(str): The node type to query against.
+        category(:obj:`str`, optional): The node type category to query against.
+
+    Returns:
+        (bool): Was the match successful?
+    """
+    houdini_node_type = houdini_node.type()
+    if category and category != houdini_node_type.category().name():
+        return False
+
+    return houdini_node_type.nameComponents()[2] == node_type
+
+
 def has_node_type(node_path, node_type, category=None):
     """
     Lookup if the node at the given path and category has the supplied node_type.
@@ -90,18 +130,9 @@ def has_node_type(node_path, node_type, category=None):
     Returns:
         (bool): Was the match successful?
     """
-    category_name = None
-    if category:
-        houdini_node = node_at_path(node_path)
-        if houdini_node:
-            category_name = houdini_node.type().category().name()
-
-    name = type_name(node_path)
-    if category and category != category_name:
-        return False
-
-    if name == node_type:
-        return True
+    houdini_node = node_at_path(node_path)
+    if houdini_node:
+        return node_has_node_type(houdini_node, node_type, category=category)
 
     return False
 
@@ -126,13 +157,13 @@ def all_nodes_of_type(node_type, node_filter=hou.nodeTypeFilter.NoFilter):
     node_matches = [
         houdini_node
         for houdini_node in all_nodes
-        if type_name(houdini_node.path()) == node_type
+        if node_type_name(houdini_node) == node_type
     ]
     return node_matches
 
 
-def get_user_data(node_path, name):
-    """Query the user data based on the given node path and name.
+def node_user_data(houdini_node, name):
+    """Query the user data for the given node and name.
 
     This is to work around an issue with how user data is handled in locked HDAs. In
     that case, any user data set using the standard hou.Node.setUserData function will
@@ -141,7 +172,7 @@ def get_user_data(node_path, name):
     if the current node is locked.
 
     Args:
-        node_path(str): The path to the node to query.
+        houdini_node(hou.Node): The node to query.
         name(str): The user data name to query.
 
     Returns:
@@ -150,39 +181,54 @@ def get_user_data(node_path, name):
     Raises:
         RuntimeError: Couldn't find an unlocked parent node.
     """
-    houdini_node = node_at_path(node_path)
-    if houdini_node:
-        if not houdini_node.isInsideLockedHDA():
+    if not houdini_node.isInsideLockedHDA():
+        logger.debug(
+            "Reading User Data for '{name}' from {path}".format(
+                name=name, path=houdini_node.path()
+            )
+        )
+        return houdini_node.userData(name)
+
+    parent_node = houdini_node.parent()
+    user_data_name = "{path}.{name}".format(path=houdini_node.path(), name=name)
+
+    while parent_node:
+        if not parent_node.isInsideLockedHDA():
             logger.debug(
                 "Reading User Data for '{name}' from {path}".format(
-                    name=name, path=houdini_node.path()
+                    name=name, path=parent_node.path()
                 )
             )
-            return houdini_node.userData(name)
+            return parent_node.userData(user_data_name)
 
-        parent_node = houdini_node.parent()
-        user_data_name = "{path}.{name}".format(path=houdini_node.path(), name=name)
+        parent_node = parent_node.parent()
 
-        while parent_node:
-            if not parent_node.isInsideLockedHDA():
-                logger.debug(
-                    "Reading User Data for '{name}' from {path}".format(
-                        name=name, path=parent_node.path()
-                    )
-                )
-                return parent_node.userData(user_data_name)
+    raise RuntimeError(
+        "No unlocked parent node found for {path}".format(path=houdini_node.path())
+    )
 
-            parent_node = parent_node.parent()
 
-        raise RuntimeError(
-            "No unlocked parent node found for {path}".format(path=node_path)
-        )
+def get_user_data(node_path, name):
+    """Query the user data based on the given node path and name.
+
+    See node_user_data for details of how user data is handled in locked HDAs.
+
+    Args:
+        node_path(str): The path to the node to query.
+        name(str): The user data name to query.
+
+    Returns:
+        (str): The user data value for the given query.
+    """
+    houdini_node = node_at_path(node_path)
+    if houdini_node:
+        return node_user_data(houdini_node, name)
 
     return None
 
 
-def set_user_data(node_path, name, value):
-    """Set user data based on the given node path, name and value.
+def set_node_user_data(houdini_node, name, value):
+    """Set user data for the given node, name and value.
 
     This is to work around an issue with how user data is handled in locked HDAs. In
     that case, any user data set using the standard hou.Node.setUserData function will
@@ -191,66 +237,155 @@ def set_user_data(node_path, name, value):
     if the current node is locked.
 
     Args:
-        node_path(str): The path to the node to query.
-        name(str): The user data name to query.
+        houdini_node(hou.Node): The node to set the user data on.
+        name(str): The user data name to set.
         value(str): The value to set into the user data.
 
-    Returns:
-        (str): The user data value for the given query.
-
     Raises:
         RuntimeError: Couldn't find an unlocked parent node.
     """
-    houdini_node = node_at_path(node_path)
-    if houdini_node:
-        if not houdini_node.isInsideLockedHDA():
+    if not houdini_node.isInsideLockedHDA():
+        logger.debug(
+            "Writing User Data '{value}' for '{name}' from {path}".format(
+                value=value, name=name, path=houdini_node.path()
+            )
+        )
+        houdini_node.setUserData(name, value)
+        return
+
+    parent_node = houdini_node.parent()
+    user_data_name = "{path}.{name}".format(path=houdini_node.path(), name=name)
+
+    while parent_node:
+        if not parent_node.isInsideLockedHDA():
             logger.debug(
                 "Writing User Data '{value}' for '{name}' from {path}".format(
-                    value=value, name=name, path=houdini_node.path()
+                    value=value, name=name, path=parent_node.path()
                 )
             )
-            houdini_node.setUserData(name, value)
+            parent_node.setUserData(user_data_name, value)
             return
 
-        parent_node = houdini_node.parent()
-        user_data_name = "{path}.{name}".format(path=houdini_node.path(), name=name)
+        parent_node = parent_node.parent()
 
-        while parent_node:
-            if not parent_node.isInsideLockedHDA():
-                logger.debug(
-                    "Writing User Data '{value}' for '{name}' from {path}".format(
-                        value=value, name=name, path=parent_node.path()
-                    )
-                )
-                parent_node.setUserData(user_data_name, value)
-                return
+    raise RuntimeError(
+        "No unlocked parent node found for {path}".format(path=houdini_node.path())
+    )
 
-            parent_node = parent_node.parent()
 
-        raise RuntimeError(
-            "No unlocked parent node found for {path}".format(path=node_path)
-        )
+def set_user_data(node_path, name, value):
+    """Set user data based on the given node path, name and value.
 
+    See set_node_user_data for details of how user data is handled in locked HDAs.
 
-def definition_from_node(node_path):
+    Args:
+        node_path(str): The path to the node to query.
+        name(str): The user data name to query.
+        value(str): The value to set into the user data.
+    """
+    houdini_node = node_at_path(node_path)
+    if houdini_node:
+        set_node_user_data(houdini_node, name, value)
+
+
+def node_definition(houdini_node):
     """
     For the given hou.Node return it's hou.HDADefinition.
 
+    Args:
+        houdini_node(hou.Node): The Houdini node to get the definition for.
+
+    Returns:
+        (hou.HDADefinition): The definition for the given node.
+    """
+    node_type = houdini_node.type()
+    if node_type:
+        return node_type.definition()
+
+    return None
+
+
+def definition_from_node(node_path):
+    """
+    For the given hou.Node path return it's hou.HDADefinition.
+
     Args:
         node_path(str): The Houdini node path to get the definition for.
 
     Returns:
         (hou.HDADefinition): The definition for the given node path.
     """
-    node = node_at_path(node_path)
-    if node:
-        node_type = node.type()
-        if node_type:
-            return node_type.definition()
+    houdini_node = node_at_path(node_path)
+    if houdini_node:
+        return node_definition(houdini_node)
 
     return None
 
 
+def hda_exclude_paths():
+    """
+    Get the paths containing HDAs that the NodeManager shouldn't handle.
+
+    Returns:
+        (tuple): The excluded paths.
+    """
+    exclude_paths = list(config.node_manager_config.get("hda_exclude_path", []))
+    logger.debug("Excluding HDAs from: {path}".format(path=exclude_paths))
+
+    exclude_paths_envvar_str = os.getenv("NODE_MANAGER_HDA_EXCLUDE_PATH")
+    if exclude_paths_envvar_str:
+        logger.debug("Excluding HDAs from envvar: {path}".format(path=exclude_paths_envvar_str))
+        exclude_paths.extend(exclude_paths_envvar_str.split(os.pathsep))
+
+    sesi_path = os.getenv("HFS")
+    if sesi_path:
+        logger.debug("Excluding HDAs from HFS: {path}".format(path=sesi_path))
+        exclude_paths.append(sesi_path)
+    else:
+        logger.warning("HFS environment variable not set.")
+    logger.debug("Full exclude paths: {paths}".format(paths=exclude_paths))
+
+    return tuple(exclude_paths)
+
+
+def is_digital_asset_definition(definition, include_hidden=False):
+    """
+    Check if the given definition is a digital asset that the NodeManager should handle.
+
+    Args:
+        definition(hou.HDADefinition): The definition to check.
+        include_hidden(bool): Should hidden HDAs be included in the check?
+
+    Returns:
+        (bool): Should the NodeManager handle the definition.
+    """
+    if not definition:
+        return False
+
+    if include_hidden:
+        return True
+
+    library_path = definition.libraryFilePath()
+    logger.debug("Checking definition with library path: {path}".format(path=library_path))
+    return not library_path.startswith(hda_exclude_paths())
+
+
+def node_is_digital_asset(houdini_node, include_hidden=False):
+    """
+    Check if the given node is a digital asset that the NodeManager should handle.
+
+    Args:
+        houdini_node(hou.Node): The Houdini node to check.
+        include_hidden(bool): Should hidden HDAs be included in the check?
+
+    Returns:
+        (bool): Is the node a digital asset.
+    """
+    return is_digital_asset_definition(
+        node_definition(houdini_node), include_hidden=include_hidden
+    )
+
+
 def is_digital_asset(node_path, include_hidden=False):
     """
     Check if the given node path is a digital asset that the NodeManager should handle.
@@ -262,33 +397,10 @@ def is_digital_asset(node_path, include_hidden=False):
     Returns:
         (bool): Is the node at the given path a digital asset.
     """
-    definition = definition_from_node(node_path)
-    if definition:
-        if include_hidden:
-            return True
-        else:
-            library_path = definition.libraryFilePath()
-            logger.debug("Checking definition with library path: {path}".format(path=library_path))
-            exclude_paths = config.node_manager_config.get("hda_exclude_path", [])
-            logger.debug("Excluding HDAs from: {path}".format(path=exclude_paths))
-
-            exclude_paths_envvar_str = os.getenv("NODE_MANAGER_HDA_EXCLUDE_PATH")
-            if exclude_paths_envvar_str:
-                logger.debug("Excluding HDAs from envvar: {path}".format(path=exclude_paths_envvar_str))
-                exclude_paths_envvar = exclude_paths_envvar_str.split(os.pathsep)
-            else:
-                exclude_paths_envvar = []
-            full_exclude_paths = exclude_paths + exclude_paths_envvar
-
-            sesi_path = os.getenv("HFS")
-            if sesi_path:
-                logger.debug("Excluding HDAs from HFS: {path}".format(path=sesi_path))
-                full_exclude_paths.append(sesi_path)
-            else:
-                logger.warning("HFS environment variable not set.")
-            logger.debug("Full exclude paths: {paths}".format(paths=full_exclude_paths))
-
-            return not library_path.startswith(tuple(full_exclude_paths))
+    houdini_node = node_at_path(node_path)
+    if houdini_node:
+        return node_is_digital_asset(houdini_node, include_hidden=include_hidden)
+
     return False
 
 
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+
+"""Path Utilities."""
+
+import collections
+import logging
+import os
+import re
+import threading
+import time
+
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_PROBE_TIMEOUT = 5.0
+
+ProbeResult = collections.namedtuple(
+    "ProbeResult", ["path", "reachable", "elapsed", "error"]
+)
+
+# URLs, eg. https://host/repo.git, and scp style remotes, eg. user@host:repo.git.
+REMOTE_PATTERN = re.compile(r"^([a-zA-Z][a-zA-Z0-9+.-]*://|[^/\\:]{2,}:)")
+
+
+def is_local_path(path):
+    """Is the given path on the local filesystem, rather than a remote URL?
+
+    Args:
+        path(str): The path to check.
+
+    Returns:
+        (bool): False if the path is a URL or an scp style remote.
+    """
+    return not REMOTE_PATTERN.match(path)
+
+
+def probe_path(path):
+    """Check the given path is a directory we can read.
+
+    This will block for as long as the filesystem does, eg. on a stale NFS mount.
+    Remote URLs, eg. the remote of a git repo, aren't on the filesystem so aren't
+    checked, and are left to the load plugin.
+
+    Args:
+        path(str): The path to check.
+
+    Raises:
+        OSError: The path isn't a readable directory.
+    """
+    if not is_local_path(path):
+        return
+    if not os.path.isdir(path):
+        raise OSError("Not a directory: {path}".format(path=path))
+    if not os.access(path, os.R_OK | os.X_OK):
+        raise OSError("Directory not readable: {path}".format(path=path))
+
+
+def probe_paths(paths, timeout=DEFAULT_PROBE_TIMEOUT):
+    """Check the given paths are reachable, probing them all at the same time.
+
+    Each path is probed in a daemon thread, so a probe that hangs never blocks the
+    caller for longer than the timeout, or stops Houdini from exiting.
+
+    Args:
+        paths(list(str)): The paths to check.
+        timeout(:obj:`float`,optional): The number of seconds to wait for the probes.
+
+    Returns:
+        list(ProbeResult): The result for each path, in the order given.
+    """
+    results = {}
+    lock = threading.Lock()
+
+    def probe(path):
+        start = time.time()
+        error = None
+        try:
+            probe_path(path)
+        except OSError as probe_error:
+            error = str(probe_error)
+        with lock:
+            results[path] = ProbeResult(path, error is None, time.time() - start, error)
+
+    start = time.time()
+    threads = []
+    for path in paths:
+        thread = threading.Thread(
+            target=probe, args=(path,), name="NodeManagerProbe", daemon=True
+        )
+        thread.start()
+        threads.append(thread)
+
+    for thread in threads:
+        thread.join(max(0.0, start + timeout - time.time()))
+
+    probe_results = []
+    with lock:
+        for path in paths:
+            result = results.get(path)
+            if result is None:
+                result = ProbeResult(
+                    path,
+                    False,
+                    timeout,
+                    "Timed out after {timeout}s".format(timeout=timeout),
+                )
+            if not result.reachable:
+                logger.warning(
+                    "Path unreachable: {path} ({error})".format(
+                        path=path, error=result.error
+                    )
+                )
+            probe_results.append(result)
+
+    return probe_results
@@ -2,6 +2,8 @@
 
 """Plugin Utilities."""
 
+import ast
+import collections
 import importlib
 import logging
 import os
@@ -12,6 +14,21 @@ from node_manager import utils
 logger = logging.getLogger(__name__)
 
 
+DEFAULT_PLUGINS = {
+    "discover": "DefaultDiscover",
+    "load": "DefaultLoad",
+    "edit": "DefaultEdit",
+    "validate": "DefaultValidate",
+    "release": "DefaultRelease",
+}
+
+PluginSpec = collections.namedtuple("PluginSpec", ["name", "plugin_type", "path"])
+
+# The metadata found for each plugin file, keyed by path, along with the file's
+# modification time and size so that unchanged files are never parsed twice.
+_metadata_cache = {}
+
+
 def path_import(plugin_path):
     """See https://docs.python.org/3/library/importlib.html#importing-a-source-file-directly
 
@@ -46,57 +63,296 @@ def initialise_plugin(plugin_module, **kwargs):
     return plugin
 
 
-def import_plugins():
-    """Import all plugins found from the $NODE_MANAGER_PLUGINS_PATH environment
-    variable, returing a list of initialised plugins.
+def plugin_paths():
+    """Get the directories plugins are loaded from, in priority order.
+
+    The default plugins are followed by any specified by the
+    $NODE_MANAGER_PLUGINS_PATH environment variable.
 
     Returns:
-        list: A list of initialised plugins.
+        list(str): The plugin directories.
     """
-    plugins = []
-
-    # First add the plugins in the default location
-    plugins.extend(
-        import_plugins_from_path(
-            os.path.join(os.path.dirname(os.path.dirname(__file__)), "plugins")
-        )
-    )
-
-    # Followed by any specificed in the environment
+    paths = [os.path.join(os.path.dirname(os.path.dirname(__file__)), "plugins")]
     for plugin_path in os.environ.get("NODE_MANAGER_PLUGINS_PATH", "").split(":"):
         if os.path.isdir(plugin_path):
-            plugins.extend(import_plugins_from_path(plugin_path))
+            paths.append(plugin_path)
+    return paths
 
-    return plugins
 
-
-def import_plugins_from_path(plugin_path):
-    """Import all plugins found in the given plugin_path, returing a list of
-    initialised plugins.
+def plugin_files(plugin_path):
+    """Get the plugin files in the given directory.
 
     Args:
-        plugin_path(str): The path to the plugins to import.
+        plugin_path(str): The directory to search.
 
     Returns:
-        list: A list of initialised plugins.
+        list(str): The paths to the plugin files.
     """
-    plugins = []
-    for path in [
+    return [
         os.path.join(plugin_path, plugin_file)
-        for plugin_file in os.listdir(plugin_path)
+        for plugin_file in sorted(os.listdir(plugin_path))
         if not plugin_file.startswith("__")
         and not plugin_file.startswith(".")
         and plugin_file.endswith(".py")
-    ]:
-        plugin_module = path_import(path)
-        logger.info(
-            "Plugin imported from: {plugin_path}".format(
-                plugin_path=path,
+    ]
+
+
+def _static_value(node, constants):
+    """Get the value of an AST node if it is a string literal or module constant.
+
+    Args:
+        node(ast.AST): The node to evaluate.
+        constants(dict): The module level string constants.
+
+    Returns:
+        str: The value, or None if it can't be determined without importing.
+    """
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    if isinstance(node, ast.Name):
+        return constants.get(node.id)
+    return None
+
+
+def _parse_plugin_file(path):
+    """Read the plugin class metadata from the given file without executing it.
+
+    Args:
+        path(str): The path to the plugin file.
+
+    Returns:
+        dict: The plugin's name and plugin_type (None if not set on the class itself),
+            and the files of any base classes imported from other plugin modules.
+    """
+    with open(path) as plugin_file:
+        tree = ast.parse(plugin_file.read(), filename=path)
+
+    constants = {}
+    imports = {}
+    metadata = {"name": None, "plugin_type": None, "bases": []}
+    for node in tree.body:
+        if isinstance(node, ast.Assign):
+            value = _static_value(node.value, constants)
+            for target in node.targets:
+                if isinstance(target, ast.Name) and value is not None:
+                    constants[target.id] = value
+        elif isinstance(node, ast.ImportFrom) and node.module == "node_manager.plugins":
+            for alias in node.names:
+                imports[alias.asname or alias.name] = alias.name
+        elif isinstance(node, ast.ClassDef) and node.name == "NodeManagerPlugin":
+            for statement in node.body:
+                if not isinstance(statement, ast.Assign):
+                    continue
+                for target in statement.targets:
+                    if isinstance(target, ast.Name) and target.id in metadata:
+                        metadata[target.id] = _static_value(statement.value, constants)
+            for base in node.bases:
+                if isinstance(base, ast.Attribute) and isinstance(base.value, ast.Name):
+                    module_name = imports.get(base.value.id)
+                    if module_name:
+                        metadata["bases"].append(module_name)
+
+    return metadata
+
+
+def read_plugin_metadata(path, search_paths=None):
+    """Get the name and type of the plugin in the given file without importing it.
+
+    Attributes not set on the plugin class are looked up on its base classes, if they
+    come from other plugin modules. Results are cached until the file changes.
+
+    Args:
+        path(str): The path to the plugin file.
+        search_paths(:obj:`list` of :obj:`str`,optional): The directories to look for
+            base plugin modules in, after the plugin's own directory.
+
+    Returns:
+        PluginSpec: The plugin metadata. The name or plugin_type are None if they
+            can't be determined statically.
+    """
+    stat = os.stat(path)
+    cached = _metadata_cache.get(path)
+    if not cached or cached[0] != (stat.st_mtime, stat.st_size):
+        cached = ((stat.st_mtime, stat.st_size), _parse_plugin_file(path))
+        _metadata_cache[path] = cached
+    metadata = cached[1]
+
+    name = metadata["name"]
+    plugin_type = metadata["plugin_type"]
+    if name is None or plugin_type is None:
+        directories = [os.path.dirname(path)] + list(search_paths or [])
+        for module_name in metadata["bases"]:
+            for directory in directories:
+                base_path = os.path.join(directory, module_name + ".py")
+                if base_path != path and os.path.isfile(base_path):
+                    base = read_plugin_metadata(base_path, search_paths=search_paths)
+                    name = name if name is not None else base.name
+                    plugin_type = plugin_type if plugin_type is not None else base.plugin_type
+                    break
+
+    return PluginSpec(name, plugin_type, path)
+
+
+class PluginRegistry(object):
+    """PluginRegistry - The plugins available to the Node Manager.
+
+    Plugins are discovered by reading their name and type from the source without
+    executing them, so only the plugins that are used are ever imported. Plugins
+    whose metadata can't be read statically are imported when they are discovered.
+
+    Plugins are indexed by (plugin type, name), and one instance of each plugin is
+    kept for each scope it is requested for, eg. per repo for load plugins, until
+    it is invalidated.
+    """
+
+    def __init__(self):
+        """Initialise the PluginRegistry."""
+        self.specs = {}
+        self._modules = {}
+        self._instances = {}
+
+    def discover(self, paths=None):
+        """Find the plugins in the given directories.
+
+        The first plugin found with a given type and name is used.
+
+        Args:
+            paths(:obj:`list` of :obj:`str`,optional): The directories to search,
+                defaults to plugin_paths().
+        """
+        if paths is None:
+            paths = plugin_paths()
+
+        self.specs = {}
+        self.invalidate()
+        for plugin_path in paths:
+            for path in plugin_files(plugin_path):
+                try:
+                    spec = read_plugin_metadata(path, search_paths=paths)
+                except (OSError, SyntaxError) as error:
+                    logger.warning(
+                        "Couldn't read plugin {path}: {error}".format(
+                            path=path, error=error
+                        )
+                    )
+                    continue
+
+                if spec.name is None or spec.plugin_type is None:
+                    plugin_class = self.import_module(spec).NodeManagerPlugin
+                    spec = PluginSpec(plugin_class.name, plugin_class.plugin_type, path)
+                logger.debug(
+                    "Plugin {name} (Type: {plugin_type}) found in {path}".format(
+                        name=spec.name, plugin_type=spec.plugin_type, path=path
+                    )
+                )
+                self.specs.setdefault((spec.plugin_type, spec.name), spec)
+
+    def import_module(self, spec):
+        """Import the module for the given plugin, if it hasn't been already.
+
+        Args:
+            spec(PluginSpec): The plugin to import.
+
+        Returns:
+            object: The plugin module.
+        """
+        if spec.path not in self._modules:
+            self._modules[spec.path] = path_import(spec.path)
+            logger.info(
+                "Plugin imported from: {plugin_path}".format(plugin_path=spec.path)
             )
-        )
-        plugins.append(plugin_module)
+        return self._modules[spec.path]
+
+    def find(self, plugin_type, name):
+        """Find the given plugin.
+
+        Args:
+            plugin_type(str): The type of plugin.
+            name(str): The name of the plugin.
+
+        Returns:
+            PluginSpec: The plugin, or None if it wasn't found.
+        """
+        return self.specs.get((plugin_type, name))
+
+    def get_module(self, plugin_type, name):
+        """Get the module for the given plugin, importing it if needed.
+
+        Args:
+            plugin_type(str): The type of plugin.
+            name(str): The name of the plugin.
+
+        Returns:
+            object: The plugin module, or None if it wasn't found.
+        """
+        spec = self.find(plugin_type, name)
+        if not spec:
+            return None
+        return self.import_module(spec)
+
+    def get_instance(self, plugin_type, name, scope=None):
+        """Get the instance of the given plugin for the given scope, creating it if
+        needed.
+
+        Args:
+            plugin_type(str): The type of plugin.
+            name(str): The name of the plugin.
+            scope(:obj:`str`,optional): The scope the instance is used in, eg. the
+                repo name. If not provided, the instance is shared by the manager.
+
+        Returns:
+            object: The plugin, or None if it wasn't found.
+        """
+        key = (plugin_type, name, scope)
+        if key not in self._instances:
+            plugin_module = self.get_module(plugin_type, name)
+            if not plugin_module:
+                return None
+            self._instances[key] = initialise_plugin(plugin_module)
+        return self._instances[key]
+
+    def invalidate(self, plugin_type=None, scope=None):
+        """Discard cached plugin instances so they are created again when requested.
+
+        Args:
+            plugin_type(:obj:`str`,optional): Only discard plugins of this type.
+            scope(:obj:`str`,optional): Only discard plugins used in this scope.
+        """
+        for key in list(self._instances):
+            if plugin_type is not None and key[0] != plugin_type:
+                continue
+            if scope is not None and key[2] != scope:
+                continue
+            del self._instances[key]
+
+    def import_plugins(self, selected):
+        """Import the selected plugins.
+
+        Args:
+            selected(list(tuple)): The (plugin type, name) of each plugin to import.
+        """
+        for plugin_type, name in selected:
+            if not self.get_module(plugin_type, name):
+                logger.warning(
+                    "Plugin {name} (Type: {plugin_type}) not found.".format(
+                        name=name, plugin_type=plugin_type
+                    )
+                )
+
+
+def get_plugin(plugin_type, plugin_name, scope=None):
+    """Get the cached instance of the given plugin.
+
+    Args:
+        plugin_type(str): The type of plugin to get.
+        plugin_name(str): The name of the plugin to get.
+        scope(:obj:`str`,optional): The scope the plugin is used in, eg. the repo name.
 
-    return plugins
+    Returns:
+        object: The plugin, or None if it wasn't found.
+    """
+    manager_instance = utils.get_manager()
+    return manager_instance.plugins.get_instance(plugin_type, plugin_name, scope=scope)
 
 
 def get_discover_plugin(discover_plugin_name):
@@ -108,37 +364,22 @@ def get_discover_plugin(discover_plugin_name):
     Returns:
         object: The discover plugin.
     """
-    manager_instance = utils.get_manager()
-    if discover_plugin_name:
-        discover_plugin = discover_plugin_name
-    else:
-        discover_plugin = "DefaultDiscover"
-
-    for plugin_module in manager_instance._plugins:
-        if plugin_module.NodeManagerPlugin.name == discover_plugin:
-            return initialise_plugin(plugin_module)
+    return get_plugin("discover", discover_plugin_name or DEFAULT_PLUGINS["discover"])
 
 
-def get_load_plugin(load_plugin_name):
+def get_load_plugin(load_plugin_name, repo_name=None):
     """Get the given load plugin.
 
     Args:
         load_plugin_name(str): The name of the load plugin to get.
+        repo_name(:obj:`str`,optional): The name of the repo the plugin loads.
 
     Returns:
         object: The load plugin.
     """
-    manager_instance = utils.get_manager()
-    if load_plugin_name:
-        load_plugin = load_plugin_name
-    else:
-        load_plugin = "DefaultLoad"
-
-    for plugin_module in manager_instance._plugins:
-        if plugin_module.NodeManagerPlugin.name == load_plugin:
-            return initialise_plugin(
-                plugin_module,
-            )
+    return get_plugin(
+        "load", load_plugin_name or DEFAULT_PLUGINS["load"], scope=repo_name
+    )
 
 
 def get_edit_plugin(edit_plugin_name):
@@ -150,17 +391,7 @@ def get_edit_plugin(edit_plugin_name):
     Returns:
         object: The load plugin.
     """
-    manager_instance = utils.get_manager()
-    if edit_plugin_name:
-        edit_plugin = edit_plugin_name
-    else:
-        edit_plugin = "DefaultEdit"
-
-    for plugin_module in manager_instance._plugins:
-        if plugin_module.NodeManagerPlugin.name == edit_plugin:
-            return initialise_plugin(
-                plugin_module,
-            )
+    return get_plugin("edit", edit_plugin_name or DEFAULT_PLUGINS["edit"])
 
 
 def get_validate_plugin(validate_plugin_name):
@@ -172,17 +403,7 @@ def get_validate_plugin(validate_plugin_name):
     Returns:
         object: The validate plugin.
     """
-    manager_instance = utils.get_manager()
-    if validate_plugin_name:
-        validate_plugin = validate_plugin_name
-    else:
-        validate_plugin = "DefaultValidate"
-
-    for plugin_module in manager_instance._plugins:
-        if plugin_module.NodeManagerPlugin.name == validate_plugin:
-            return initialise_plugin(
-                plugin_module,
-            )
+    return get_plugin("validate", validate_plugin_name or DEFAULT_PLUGINS["validate"])
 
 
 def get_release_plugin(release_plugin_name):
@@ -194,14 +415,4 @@ def get_release_plugin(release_plugin_name):
     Returns:
         object: The release plugin.
     """
-    manager_instance = utils.get_manager()
-    if release_plugin_name:
-        publish_plugin = release_plugin_name
-    else:
-        publish_plugin = "DefaultRelease"
-
-    for plugin_module in manager_instance._plugins:
-        if plugin_module.NodeManagerPlugin.name == publish_plugin:
-            return initialise_plugin(
-                plugin_module,
-            )
+    return get_plugin("release", release_plugin_name or DEFAULT_PLUGINS["release"])
\ No newline at end of file